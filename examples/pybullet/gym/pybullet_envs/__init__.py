@@ -223,3 +223,5 @@ register(
 def getList():
 	btenvs = ['- ' + spec.id for spec in gym.envs.registry.all() if spec.id.find('Bullet')>=0]
 	return btenvs
+
+from pybullet_envs.vec_locomotion_envs import VecWalkerEnv
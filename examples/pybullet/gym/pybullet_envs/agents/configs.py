@@ -34,6 +34,8 @@ def default():
   # General
   algorithm = ppo.PPOAlgorithm
   num_agents = 30
+  envs_per_process = 1  # Environments stepped together in each process.
+  shared_memory = False  # Pass observations in shared memory, for images.
   eval_episodes = 30
   use_gpu = False
   # Network
@@ -108,6 +110,16 @@ def pybullet_kuka_grasping():
   steps = 1e7  # 10M
   return locals()
 
+def pybullet_kuka_cam_grasping():
+  """Configuration for Bullet Kuka grasping task from camera images."""
+  locals().update(default())
+  # Environment
+  env = 'KukaCamBulletEnv-v0'
+  shared_memory = True
+  max_length = 1000
+  steps = 1e7  # 10M
+  return locals()
+
 
 def pybullet_racecar():
   """Configuration for Bullet MIT Racecar task."""
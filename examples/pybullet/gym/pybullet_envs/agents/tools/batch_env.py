@@ -18,8 +18,12 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import functools
+
 import numpy as np
 
+from . import wrappers
+
 
 class BatchEnv(object):
   """Combine multiple environments to step them in batch."""
@@ -40,6 +44,7 @@ class BatchEnv(object):
     """
     self._envs = envs
     self._blocking = blocking
+    self._stepping = {}
     observ_space = self._envs[0].observation_space
     if not all(env.observation_space == observ_space for env in self._envs):
       raise ValueError('All environments must use the same observation space.')
@@ -98,6 +103,106 @@ class BatchEnv(object):
     info = tuple(infos)
     return observ, reward, done, info
 
+  def step_async(self, actions, indices=None):
+    """Start stepping environments that reset themselves when done.
+
+    Collect the results with step_wait() or step_wait_first(). Environments in
+    external processes are reset inside their process, using the promises of
+    their step_auto_reset() method. The last observation of a finished episode
+    is passed in info['terminal_observation'].
+
+    Args:
+      actions: Batched action to apply to the environments.
+      indices: The batch indices of environments to step; defaults to all.
+
+    Raises:
+      ValueError: Invalid actions, an index is given twice, or an environment
+        is still stepping.
+    """
+    if indices is None:
+      indices = np.arange(len(self._envs))
+    seen = set()
+    for index, action in zip(indices, actions):
+      if index in seen:
+        message = 'Environment at index {} is stepped twice.'
+        raise ValueError(message.format(index))
+      seen.add(index)
+      if index in self._stepping:
+        message = 'Environment at index {} is still stepping.'
+        raise ValueError(message.format(index))
+      if not self._envs[index].action_space.contains(action):
+        message = 'Invalid action at index {}: {}'
+        raise ValueError(message.format(index, action))
+    for index, action in zip(indices, actions):
+      env = self._envs[index]
+      # Look up the class, a missing attribute would be forwarded to the env.
+      if hasattr(type(env), 'step_auto_reset'):
+        promise = env.step_auto_reset(action, blocking=False)
+      else:
+        promise = functools.partial(wrappers.step_auto_reset, env, action)
+      if self._blocking:
+        transition = promise()
+        promise = lambda transition=transition: transition
+      self._stepping[index] = promise
+
+  def step_wait(self):
+    """Wait for all environments started by step_async().
+
+    Raises:
+      RuntimeError: No environment is stepping.
+
+    Returns:
+      Batch of observations, rewards, done flags, and infos, ordered by batch
+      index.
+    """
+    _, observ, reward, done, info = self._collect(sorted(self._stepping))
+    return observ, reward, done, info
+
+  def step_wait_first(self, num_ready):
+    """Wait until some of the environments started by step_async() are done.
+
+    Environments that are still stepping keep running and can be collected by
+    later calls, so slow environments do not stall the others. Environments that
+    cannot report whether they are ready count as ready.
+
+    Args:
+      num_ready: Return once at least this many environments are ready, at
+        least one.
+
+    Raises:
+      RuntimeError: No environment is stepping.
+
+    Returns:
+      Batch indices of the ready environments, and their batch of
+      observations, rewards, done flags, and infos.
+    """
+    pending = sorted(self._stepping)
+    num_ready = min(max(num_ready, 1), len(pending))
+    ready = [index for index in pending if self._ready(index)]
+    while len(ready) < num_ready:
+      waiting = [index for index in pending if index not in ready]
+      # Block shortly on one of the environments instead of spinning.
+      self._ready(waiting[0], timeout=0.001)
+      ready = [index for index in pending if self._ready(index)]
+    return self._collect(ready)
+
+  def _ready(self, index, timeout=0):
+    env = self._envs[index]
+    if self._blocking or not hasattr(type(env), 'ready'):
+      return True
+    return env.ready(timeout)
+
+  def _collect(self, indices):
+    if not indices:
+      raise RuntimeError('No environment is stepping, call step_async() first.')
+    transitions = [self._stepping.pop(index)() for index in indices]
+    observs, rewards, dones, infos = zip(*transitions)
+    observ = np.stack(observs)
+    reward = np.stack(rewards)
+    done = np.stack(dones)
+    info = tuple(infos)
+    return np.array(indices), observ, reward, done, info
+
   def reset(self, indices=None):
     """Reset the environment and convert the resulting observation.
 
@@ -0,0 +1,136 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the asynchronous stepping of the batch environment."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import functools
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from pybullet_envs.agents import tools
+
+
+class BatchEnvAsyncTest(tf.test.TestCase):
+
+  def test_step_wait_first_skips_slow_group(self):
+    fast = tools.wrappers.ExternalProcessGroup(
+        functools.partial(MockEnvironmentSlowStep, delay=0), 2)
+    slow = tools.wrappers.ExternalProcessGroup(
+        functools.partial(MockEnvironmentSlowStep, delay=1), 2)
+    batch_env = tools.BatchEnv(fast.envs + slow.envs, blocking=False)
+    batch_env.reset()
+    actions = [batch_env.action_space.sample() for _ in range(4)]
+    batch_env.step_async(actions)
+    indices, observ, _, _, _ = batch_env.step_wait_first(2)
+    self.assertAllEqual([0, 1], indices)
+    self.assertEqual(2, len(observ))
+    indices, _, _, _, _ = batch_env.step_wait_first(2)
+    self.assertAllEqual([2, 3], indices)
+    fast.close()
+    slow.close()
+
+  def test_step_wait_same_transitions_as_step_auto_reset(self):
+    constructor = functools.partial(MockEnvironmentSlowStep, delay=0)
+    group = tools.wrappers.ExternalProcessGroup(constructor, 2)
+    envs = [tools.wrappers.ExternalProcess(constructor)] + group.envs
+    batch_env = tools.BatchEnv(envs, blocking=False)
+    references = [constructor() for _ in envs]
+    self.assertAllClose(
+        [reference.reset() for reference in references], batch_env.reset())
+    for _ in range(5):
+      actions = [batch_env.action_space.sample() for _ in envs]
+      batch_env.step_async(actions)
+      observ, reward, done, info = batch_env.step_wait()
+      for index, reference in enumerate(references):
+        expected = tools.wrappers.step_auto_reset(reference, actions[index])
+        self.assertAllClose(expected[0], observ[index])
+        self.assertAllClose(expected[1], reward[index])
+        self.assertEqual(expected[2], done[index])
+        if done[index]:
+          self.assertAllClose(expected[3]['terminal_observation'],
+                              info[index]['terminal_observation'])
+    batch_env.close()
+
+  def test_step_auto_reset_shared_memory_large_observation(self):
+    # The terminal observations do not fit into the pipe buffer.
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(128, 128, 4), action_shape=(2,),
+        min_duration=1, max_duration=2)
+    envs = [tools.wrappers.SharedMemoryProcess(constructor) for _ in range(2)]
+    batch_env = tools.BatchEnv(envs, blocking=False)
+    references = [constructor() for _ in envs]
+    self.assertAllClose(
+        [reference.reset() for reference in references], batch_env.reset())
+    for step in range(6):
+      actions = [batch_env.action_space.sample() for _ in envs]
+      batch_env.step_async(actions)
+      if step % 2:
+        observ, _, done, info = batch_env.step_wait()
+        indices = range(len(envs))
+      else:
+        indices, observ, _, done, info = batch_env.step_wait_first(len(envs))
+      for position, index in enumerate(indices):
+        expected = tools.wrappers.step_auto_reset(
+            references[index], actions[index])
+        self.assertAllClose(expected[0], observ[position])
+        self.assertEqual(expected[2], done[position])
+        if done[position]:
+          self.assertAllClose(expected[3]['terminal_observation'],
+                              info[position]['terminal_observation'])
+    batch_env.close()
+
+  def test_step_wait_without_step_async(self):
+    batch_env = tools.BatchEnv(
+        [MockEnvironmentSlowStep(delay=0) for _ in range(2)], blocking=True)
+    batch_env.reset()
+    with self.assertRaises(RuntimeError):
+      batch_env.step_wait()
+    with self.assertRaises(RuntimeError):
+      batch_env.step_wait_first(1)
+
+  def test_step_async_duplicate_index(self):
+    batch_env = tools.BatchEnv(
+        [MockEnvironmentSlowStep(delay=0) for _ in range(2)], blocking=True)
+    batch_env.reset()
+    actions = [batch_env.action_space.sample() for _ in range(2)]
+    with self.assertRaises(ValueError):
+      batch_env.step_async(actions, indices=np.array([1, 1]))
+    # Nothing was stepped, so both environments can still be stepped.
+    batch_env.step_async(actions)
+    self.assertEqual(2, len(batch_env.step_wait()[0]))
+
+
+class MockEnvironmentSlowStep(tools.MockEnvironment):
+  """Sleep for a specified time in every step."""
+
+  def __init__(self, delay):
+    super(MockEnvironmentSlowStep, self).__init__(
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=2, max_duration=3)
+    self._delay = delay
+
+  def step(self, *args, **kwargs):
+    time.sleep(self._delay)
+    return super(MockEnvironmentSlowStep, self).step(*args, **kwargs)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -19,6 +19,8 @@ from __future__ import division
 from __future__ import print_function
 
 import atexit
+import collections
+import functools
 import multiprocessing
 import sys
 import traceback
@@ -297,6 +299,24 @@ class LimitDuration(object):
     return self._env.reset()
 
 
+def step_auto_reset(env, action):
+  """Step an environment and reset it right away when the episode ends.
+
+  Args:
+    env: The environment to step.
+    action: The action to apply to the environment.
+
+  Returns:
+    Transition tuple. When the episode ended, the observation is the first one
+    of the next episode and the last one is in info['terminal_observation'].
+  """
+  observ, reward, done, info = env.step(action)
+  if done:
+    info = dict(info, terminal_observation=observ)
+    observ = env.reset()
+  return observ, reward, done, info
+
+
 class ExternalProcess(object):
   """Step environment in a separate process for lock free paralellism."""
 
@@ -306,6 +326,7 @@ class ExternalProcess(object):
   _RESULT = 3
   _EXCEPTION = 4
   _CLOSE = 5
+  _STEP_AUTO_RESET = 6
 
   def __init__(self, constructor):
     """Step environment in a separate process for lock free paralellism.
@@ -399,6 +420,34 @@ class ExternalProcess(object):
     else:
       return promise
 
+  def step_auto_reset(self, action, blocking=True):
+    """Step the environment and reset it in the external process when done.
+
+    Args:
+      action: The action to apply to the environment.
+      blocking: Whether to wait for the result.
+
+    Returns:
+      Transition tuple as returned by the step_auto_reset() function when
+      blocking, otherwise callable that returns the transition tuple.
+    """
+    self._conn.send((self._STEP_AUTO_RESET, action))
+    if blocking:
+      return self._receive()
+    else:
+      return self._receive
+
+  def ready(self, timeout=0):
+    """Whether the result of the last request arrived.
+
+    Args:
+      timeout: Seconds to wait for the result.
+
+    Returns:
+      Boolean.
+    """
+    return self._conn.poll(timeout)
+
   def reset(self, blocking=True):
     """Reset the environment.
 
@@ -461,6 +510,9 @@ class ExternalProcess(object):
           result = getattr(env, name)(*args, **kwargs)
           conn.send((self._RESULT, result))
           continue
+        if message == self._STEP_AUTO_RESET:
+          conn.send((self._RESULT, step_auto_reset(env, payload)))
+          continue
         if message == self._CLOSE:
           assert payload is None
           break
@@ -472,6 +524,521 @@ class ExternalProcess(object):
     conn.close()
 
 
+
+class SharedMemoryProcess(ExternalProcess):
+  """Step environment in a separate process, exchanging arrays in shared memory.
+
+  Works like ExternalProcess, but actions and observations are written to NumPy
+  arrays in shared memory that are allocated once from the action and
+  observation spaces, and steps and resets are signaled with events instead of
+  pickled messages. Only non-empty info dicts, attribute access and other
+  method calls still go through the pipe. Observations are returned with the
+  dtype of the observation space.
+
+  Only one request can be in flight at a time, so the promise returned by a
+  non-blocking step or reset has to be called before the next request. Needs
+  `multiprocessing.shared_memory` (Python 3.8 or newer).
+  """
+
+  # Message type for passing the shared buffers to the worker via the pipe.
+  _BUFFERS = 7
+
+  # Commands signaled via the request event.
+  _SIGNAL_PIPE = 1
+  _SIGNAL_STEP = 2
+  _SIGNAL_RESET = 3
+  _SIGNAL_CLOSE = 4
+  _SIGNAL_STEP_AUTO_RESET = 5
+
+  # Flags of the response to a step or reset.
+  _FLAG_INFO = 1
+  _FLAG_EXCEPTION = 2
+
+  def __init__(self, constructor):
+    """Step environment in a separate process, exchanging arrays in shared memory.
+
+    Args:
+      constructor: Callable that creates and returns an OpenAI gym environment.
+
+    Attributes:
+      observation_space: The cached observation space of the environment.
+      action_space: The cached action space of the environment.
+    """
+    self._conn, conn = multiprocessing.Pipe()
+    self._request = multiprocessing.Event()
+    self._response = multiprocessing.Event()
+    self._command = multiprocessing.RawValue('i', 0)
+    self._flags = multiprocessing.RawValue('i', 0)
+    self._reward = multiprocessing.RawValue('d', 0.0)
+    self._done = multiprocessing.RawValue('b', 0)
+    self._memory = []
+    self._observ = None
+    self._action = None
+    # The worker has to share the resource tracker, otherwise it would report
+    # the memory it attached to as leaked when it exits.
+    from multiprocessing import resource_tracker
+    resource_tracker.ensure_running()
+    self._process = multiprocessing.Process(
+        target=self._worker, args=(constructor, conn))
+    atexit.register(self.close)
+    self._process.start()
+    self._observ_space = None
+    self._action_space = None
+
+  def __getattr__(self, name):
+    """Request an attribute from the environment.
+
+    Note that this involves communication with the external process, so it can
+    be slow.
+
+    Args:
+      name: Attribute to access.
+
+    Returns:
+      Value of the attribute.
+    """
+    self._conn.send((self._ACCESS, name))
+    self._signal(self._SIGNAL_PIPE)
+    return self._receive()
+
+  def call(self, name, *args, **kwargs):
+    """Asynchronously call a method of the external environment.
+
+    Args:
+      name: Name of the method to call.
+      *args: Positional arguments to forward to the method.
+      **kwargs: Keyword arguments to forward to the method.
+
+    Returns:
+      Promise object that blocks and provides the return value when called.
+    """
+    payload = name, args, kwargs
+    self._conn.send((self._CALL, payload))
+    self._signal(self._SIGNAL_PIPE)
+    return self._receive
+
+  def close(self):
+    """Send a close signal to the external process, join it and free memory."""
+    self._signal(self._SIGNAL_CLOSE)
+    self._conn.close()
+    self._process.join()
+    # The arrays have to be released before the memory they point to.
+    self._observ = None
+    self._action = None
+    for memory in self._memory:
+      memory.close()
+      memory.unlink()
+    self._memory = []
+
+  def step(self, action, blocking=True):
+    """Step the environment.
+
+    Args:
+      action: The action to apply to the environment.
+      blocking: Whether to wait for the result.
+
+    Returns:
+      Transition tuple when blocking, otherwise callable that returns the
+      transition tuple.
+    """
+    self._allocate()
+    self._action[...] = action
+    self._signal(self._SIGNAL_STEP)
+    if blocking:
+      return self._receive_transition()
+    else:
+      return self._receive_transition
+
+  def step_auto_reset(self, action, blocking=True):
+    """Step the environment and reset it in the external process when done.
+
+    Args:
+      action: The action to apply to the environment.
+      blocking: Whether to wait for the result.
+
+    Returns:
+      Transition tuple as returned by the step_auto_reset() function when
+      blocking, otherwise callable that returns the transition tuple.
+    """
+    self._allocate()
+    self._action[...] = action
+    self._signal(self._SIGNAL_STEP_AUTO_RESET)
+    if blocking:
+      return self._receive_transition()
+    else:
+      return self._receive_transition
+
+  def ready(self, timeout=0):
+    """Whether the result of the last step or reset arrived.
+
+    Args:
+      timeout: Seconds to wait for the result.
+
+    Returns:
+      Boolean.
+    """
+    return self._response.wait(timeout)
+
+  def reset(self, blocking=True):
+    """Reset the environment.
+
+    Args:
+      blocking: Whether to wait for the result.
+
+    Returns:
+      New observation when blocking, otherwise callable that returns the new
+      observation.
+    """
+    self._allocate()
+    self._signal(self._SIGNAL_RESET)
+    if blocking:
+      return self._receive_observ()
+    else:
+      return self._receive_observ
+
+  def _signal(self, command):
+    self._command.value = command
+    self._request.set()
+
+  def _allocate(self):
+    """Allocate the shared buffers on first use and attach the worker to them."""
+    if self._observ is not None:
+      return
+    from multiprocessing import shared_memory
+    arrays, buffers = [], []
+    for space in (self.observation_space, self.action_space):
+      dtype = np.dtype(space.dtype)
+      size = int(np.prod(space.shape)) * dtype.itemsize
+      memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+      self._memory.append(memory)
+      arrays.append(np.ndarray(space.shape, dtype, memory.buf))
+      buffers.append((memory.name, space.shape, dtype.str))
+    self._conn.send((self._BUFFERS, buffers))
+    self._signal(self._SIGNAL_PIPE)
+    self._receive()
+    self._observ, self._action = arrays
+
+  def _wait(self):
+    """Wait until the worker answered a step or reset.
+
+    Raises:
+      Exception: An exception was raised inside the worker process.
+      RuntimeError: The worker process exited without answering.
+    """
+    while not self._response.wait(0.1):
+      if not self._process.is_alive():
+        raise RuntimeError('Environment process exited unexpectedly.')
+    self._response.clear()
+    if self._flags.value & self._FLAG_EXCEPTION:
+      self._receive()
+
+  def _receive_transition(self):
+    self._wait()
+    info = {}
+    if self._flags.value & self._FLAG_INFO:
+      info = self._receive()
+    return self._observ.copy(), self._reward.value, bool(self._done.value), info
+
+  def _receive_observ(self):
+    self._wait()
+    return self._observ.copy()
+
+  def _worker(self, constructor, conn):
+    """The process waits for signals and writes environment results to memory.
+
+    Args:
+      constructor: Constructor for the OpenAI Gym environment.
+      conn: Connection for communication to the main process.
+    """
+    from multiprocessing import shared_memory
+    memory = []
+    observ = action = None
+    try:
+      env = constructor()
+      while True:
+        try:
+          # Only block for short times to have keyboard exceptions be raised.
+          if not self._request.wait(0.1):
+            continue
+        except KeyboardInterrupt:
+          break
+        self._request.clear()
+        command = self._command.value
+        if command in (self._SIGNAL_STEP, self._SIGNAL_STEP_AUTO_RESET):
+          # The action buffer is overwritten by the next step, so copy it.
+          if command == self._SIGNAL_STEP:
+            transition = env.step(action.copy())
+          else:
+            transition = step_auto_reset(env, action.copy())
+          observ[...], reward, done, info = transition
+          self._reward.value = reward
+          self._done.value = bool(done)
+          self._flags.value = self._FLAG_INFO if info else 0
+          # Respond before sending the info, since the main process only reads
+          # the pipe after the response and a large info, e.g. the terminal
+          # observation of an image environment, does not fit into its buffer.
+          self._response.set()
+          if info:
+            conn.send((self._RESULT, info))
+          continue
+        if command == self._SIGNAL_RESET:
+          observ[...] = env.reset()
+          self._flags.value = 0
+          self._response.set()
+          continue
+        if command == self._SIGNAL_CLOSE:
+          break
+        message, payload = conn.recv()
+        if message == self._BUFFERS:
+          arrays = []
+          for name, shape, dtype in payload:
+            memory.append(shared_memory.SharedMemory(name=name))
+            arrays.append(np.ndarray(shape, dtype, memory[-1].buf))
+          observ, action = arrays
+          conn.send((self._RESULT, None))
+          continue
+        if message == self._ACCESS:
+          name = payload
+          result = getattr(env, name)
+          conn.send((self._RESULT, result))
+          continue
+        if message == self._CALL:
+          name, args, kwargs = payload
+          result = getattr(env, name)(*args, **kwargs)
+          conn.send((self._RESULT, result))
+          continue
+        raise KeyError('Received message of unknown type {}'.format(message))
+    except Exception:  # pylint: disable=broad-except
+      stacktrace = ''.join(traceback.format_exception(*sys.exc_info()))
+      tf.logging.error('Error in environment process: {}'.format(stacktrace))
+      self._flags.value = self._FLAG_EXCEPTION
+      self._response.set()
+      conn.send((self._EXCEPTION, stacktrace))
+    observ = action = arrays = None
+    for buffer in memory:
+      buffer.close()
+    conn.close()
+
+
+class ExternalProcessGroup(object):
+  """Step several environments together in one separate process.
+
+  Hosting more than one environment per process saves interpreters, physics
+  servers and messages, so the split of processes and environments per process
+  can be tuned to the number of cores. The environments are accessed through
+  the proxies in `envs`, which behave like ExternalProcess objects and can be
+  combined in a BatchEnv. Their actions are collected and sent in one message
+  as soon as every environment of the group has one, and the transitions come
+  back in one message as well.
+  """
+
+  def __init__(self, constructor, num_envs):
+    """Step several environments together in one separate process.
+
+    Args:
+      constructor: Callable that creates and returns an OpenAI gym environment.
+      num_envs: Number of environments hosted by the process.
+
+    Attributes:
+      envs: List of proxies for the environments in the process.
+    """
+    self._process = ExternalProcess(
+        functools.partial(_EnvironmentGroup, constructor, num_envs))
+    self._promises = collections.deque()
+    self._num_sent = 0
+    self._num_received = 0
+    self._results = {}
+    self._actions = []
+    self._step_tickets = {}
+    self._transitions = {}
+    self._observ_space = None
+    self._action_space = None
+    self.envs = [_GroupMember(self, index) for index in range(num_envs)]
+
+  @property
+  def observation_space(self):
+    if not self._observ_space:
+      self._observ_space = self._process.observation_space
+    return self._observ_space
+
+  @property
+  def action_space(self):
+    if not self._action_space:
+      self._action_space = self._process.action_space
+    return self._action_space
+
+  def close(self):
+    """Send a close message to the external process and join it."""
+    self._process.close()
+
+  def _send(self, name, *args):
+    """Call a method of the environment group and return a ticket for it."""
+    self._promises.append(self._process.call(name, *args))
+    self._num_sent += 1
+    return self._num_sent - 1
+
+  def _receive(self, ticket):
+    """Return the result of a ticket, receiving earlier results on the way."""
+    while ticket not in self._results:
+      self._results[self._num_received] = self._promises.popleft()()
+      self._num_received += 1
+    return self._results.pop(ticket)
+
+  def _poll(self, ticket, timeout):
+    """Receive the results that arrived, return whether the ticket's did."""
+    while ticket not in self._results:
+      if not self._process.ready(timeout):
+        return False
+      self._results[self._num_received] = self._promises.popleft()()
+      self._num_received += 1
+    return True
+
+  def _step(self, index, action, blocking, auto_reset=False):
+    self._actions.append((index, action, auto_reset))
+    if blocking or len(self._actions) == len(self.envs):
+      self._flush()
+    promise = functools.partial(self._transition, index)
+    if blocking:
+      return promise()
+    else:
+      return promise
+
+  def _flush(self):
+    """Send the collected actions to the process."""
+    ticket = self._send('step', self._actions)
+    for index, _, _ in self._actions:
+      self._step_tickets[index] = ticket
+    self._actions = []
+
+  def _transition(self, index):
+    if index not in self._transitions:
+      if index not in self._step_tickets:
+        # Not every environment of the group was stepped, send what we have.
+        self._flush()
+      for other, transition in self._receive(self._step_tickets[index]):
+        self._transitions[other] = transition
+        del self._step_tickets[other]
+    return self._transitions.pop(index)
+
+  def _ready(self, index, timeout):
+    if index in self._transitions:
+      return True
+    if index not in self._step_tickets:
+      if all(other != index for other, _, _ in self._actions):
+        return False
+      # Polling means waiting, so do not wait for the other members' actions.
+      self._flush()
+    return self._poll(self._step_tickets[index], timeout)
+
+  def _reset(self, index, blocking):
+    promise = functools.partial(self._receive, self._send('reset', index))
+    if blocking:
+      return promise()
+    else:
+      return promise
+
+
+class _GroupMember(object):
+  """Proxy for one environment of an ExternalProcessGroup."""
+
+  def __init__(self, group, index):
+    self._group = group
+    self._index = index
+
+  @property
+  def observation_space(self):
+    return self._group.observation_space
+
+  @property
+  def action_space(self):
+    return self._group.action_space
+
+  def __getattr__(self, name):
+    """Request an attribute from the environment in the external process."""
+    return self._group._receive(
+        self._group._send('attribute', self._index, name))
+
+  def step(self, action, blocking=True):
+    """Step the environment.
+
+    Args:
+      action: The action to apply to the environment.
+      blocking: Whether to wait for the result.
+
+    Returns:
+      Transition tuple when blocking, otherwise callable that returns the
+      transition tuple.
+    """
+    return self._group._step(self._index, action, blocking)
+
+  def step_auto_reset(self, action, blocking=True):
+    """Step the environment and reset it in the external process when done.
+
+    Args:
+      action: The action to apply to the environment.
+      blocking: Whether to wait for the result.
+
+    Returns:
+      Transition tuple as returned by the step_auto_reset() function when
+      blocking, otherwise callable that returns the transition tuple.
+    """
+    return self._group._step(self._index, action, blocking, auto_reset=True)
+
+  def ready(self, timeout=0):
+    """Whether the result of the last step arrived.
+
+    Actions of the group that are still collected are sent right away.
+
+    Args:
+      timeout: Seconds to wait for the result.
+
+    Returns:
+      Boolean.
+    """
+    return self._group._ready(self._index, timeout)
+
+  def reset(self, blocking=True):
+    """Reset the environment.
+
+    Args:
+      blocking: Whether to wait for the result.
+
+    Returns:
+      New observation when blocking, otherwise callable that returns the new
+      observation.
+    """
+    return self._group._reset(self._index, blocking)
+
+  def close(self):
+    """Close the process of the group, this closes the other members too."""
+    self._group.close()
+
+
+class _EnvironmentGroup(object):
+  """The environments inside the process of an ExternalProcessGroup."""
+
+  def __init__(self, constructor, num_envs):
+    self._envs = [constructor() for _ in range(num_envs)]
+
+  def __getattr__(self, name):
+    # Spaces and other shared attributes are read from the first environment.
+    return getattr(self._envs[0], name)
+
+  def step(self, actions):
+    transitions = []
+    for index, action, auto_reset in actions:
+      if auto_reset:
+        transitions.append((index, step_auto_reset(self._envs[index], action)))
+      else:
+        transitions.append((index, self._envs[index].step(action)))
+    return transitions
+
+  def reset(self, index):
+    return self._envs[index].reset()
+
+  def attribute(self, index, name):
+    return getattr(self._envs[index], name)
+
 class ConvertTo32Bit(object):
   """Convert data types of an OpenAI Gym environment to 32 bit."""
 
@@ -0,0 +1,187 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for environment wrappers."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import functools
+
+import tensorflow as tf
+
+from pybullet_envs.agents import tools
+
+
+class ExternalProcessTest(tf.test.TestCase):
+
+  def test_close_no_hang_after_init(self):
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=2, max_duration=2)
+    env = tools.wrappers.ExternalProcess(constructor)
+    env.close()
+
+  def test_close_no_hang_after_step(self):
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=5, max_duration=5)
+    env = tools.wrappers.ExternalProcess(constructor)
+    env.reset()
+    env.step(env.action_space.sample())
+    env.step(env.action_space.sample())
+    env.close()
+
+  def test_reraise_exception_in_init(self):
+    constructor = MockEnvironmentCrashInInit
+    env = tools.wrappers.ExternalProcess(constructor)
+    with self.assertRaises(Exception):
+      env.step(env.action_space.sample())
+
+  def test_reraise_exception_in_step(self):
+    constructor = functools.partial(
+        MockEnvironmentCrashInStep, crash_at_step=3)
+    env = tools.wrappers.ExternalProcess(constructor)
+    env.reset()
+    env.step(env.action_space.sample())
+    env.step(env.action_space.sample())
+    with self.assertRaises(Exception):
+      env.step(env.action_space.sample())
+
+
+class SharedMemoryProcessTest(tf.test.TestCase):
+
+  def test_close_no_hang_after_init(self):
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=2, max_duration=2)
+    env = tools.wrappers.SharedMemoryProcess(constructor)
+    env.close()
+
+  def test_close_no_hang_after_step(self):
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=5, max_duration=5)
+    env = tools.wrappers.SharedMemoryProcess(constructor)
+    env.reset()
+    env.step(env.action_space.sample())
+    env.step(env.action_space.sample())
+    env.close()
+
+  def test_same_transitions_as_external_process(self):
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=3, max_duration=3)
+    external = tools.wrappers.ExternalProcess(constructor)
+    shared = tools.wrappers.SharedMemoryProcess(constructor)
+    self.assertAllClose(external.reset(), shared.reset())
+    for _ in range(3):
+      action = external.action_space.sample()
+      expected = external.step(action)
+      observ, reward, done, info = shared.step(action, blocking=False)()
+      self.assertAllClose(expected[0], observ)
+      self.assertAllClose(expected[1], reward)
+      self.assertEqual(expected[2], done)
+      self.assertEqual(expected[3], info)
+    external.close()
+    shared.close()
+
+  def test_step_auto_reset(self):
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=2, max_duration=2)
+    env = tools.wrappers.SharedMemoryProcess(constructor)
+    reference = constructor()
+    self.assertAllClose(reference.reset(), env.reset())
+    for _ in range(5):
+      action = env.action_space.sample()
+      expected = tools.wrappers.step_auto_reset(reference, action)
+      observ, reward, done, info = env.step_auto_reset(action)
+      self.assertAllClose(expected[0], observ)
+      self.assertAllClose(expected[1], reward)
+      self.assertEqual(expected[2], done)
+      if done:
+        self.assertAllClose(expected[3]['terminal_observation'],
+                            info['terminal_observation'])
+    env.close()
+
+  def test_step_auto_reset_large_observation(self):
+    # The terminal observation in the info does not fit into the pipe buffer.
+    constructor = functools.partial(
+        tools.MockEnvironment,
+        observ_shape=(256, 341, 4), action_shape=(2,),
+        min_duration=1, max_duration=1)
+    env = tools.wrappers.SharedMemoryProcess(constructor)
+    reference = constructor()
+    reference.reset()
+    env.reset()
+    for _ in range(2):
+      action = env.action_space.sample()
+      expected = tools.wrappers.step_auto_reset(reference, action)
+      observ, _, done, info = env.step_auto_reset(action)
+      self.assertTrue(done)
+      self.assertAllClose(expected[0], observ)
+      self.assertAllClose(expected[3]['terminal_observation'],
+                          info['terminal_observation'])
+    env.close()
+
+  def test_reraise_exception_in_init(self):
+    constructor = MockEnvironmentCrashInInit
+    env = tools.wrappers.SharedMemoryProcess(constructor)
+    with self.assertRaises(Exception):
+      env.step(env.action_space.sample())
+
+  def test_reraise_exception_in_step(self):
+    constructor = functools.partial(
+        MockEnvironmentCrashInStep, crash_at_step=3)
+    env = tools.wrappers.SharedMemoryProcess(constructor)
+    env.reset()
+    env.step(env.action_space.sample())
+    env.step(env.action_space.sample())
+    with self.assertRaises(Exception):
+      env.step(env.action_space.sample())
+
+
+class MockEnvironmentCrashInInit(object):
+  """Raise an error when instantiated."""
+
+  def __init__(self, *unused_args, **unused_kwargs):
+    raise RuntimeError()
+
+
+class MockEnvironmentCrashInStep(tools.MockEnvironment):
+  """Raise an error after specified number of steps in an episode."""
+
+  def __init__(self, crash_at_step):
+    super(MockEnvironmentCrashInStep, self).__init__(
+        observ_shape=(2, 3), action_shape=(2,),
+        min_duration=crash_at_step + 1, max_duration=crash_at_step + 1)
+    self._crash_at_step = crash_at_step
+
+  def step(self, *args, **kwargs):
+    transition = super(MockEnvironmentCrashInStep, self).step(*args, **kwargs)
+    if self.steps[-1] == self._crash_at_step:
+      raise RuntimeError()
+    return transition
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -104,7 +104,8 @@ def train(config, env_processes):
   with tf.device('/cpu:0'):
     batch_env = utility.define_batch_env(
         lambda: _create_environment(config),
-        config.num_agents, env_processes)
+        config.num_agents, env_processes, config.envs_per_process or 1,
+        bool(config.shared_memory))
     graph = utility.define_simulation_graph(
         batch_env, config.algorithm, config)
     loop = _define_loop(
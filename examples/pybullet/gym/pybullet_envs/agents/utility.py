@@ -54,19 +54,41 @@ def define_simulation_graph(batch_env, algo_cls, config):
   return tools.AttrDict(locals())
 
 
-def define_batch_env(constructor, num_agents, env_processes):
+def define_batch_env(constructor, num_agents, env_processes,
+                     envs_per_process=1, shared_memory=False):
   """Create environments and apply all desired wrappers.
 
   Args:
     constructor: Constructor of an OpenAI gym environment.
     num_agents: Number of environments to combine in the batch.
     env_processes: Whether to step environment in external processes.
+    envs_per_process: Number of environments stepped together in each external
+      process; the last process gets the remainder.
+    shared_memory: Whether external processes exchange actions and
+      observations in shared memory instead of pickling them through a pipe.
+
+  Raises:
+    ValueError: Shared memory is requested for more than one environment per
+      process.
 
   Returns:
     In-graph environments object.
   """
+  if env_processes and shared_memory and envs_per_process > 1:
+    raise ValueError(
+        'Shared memory only supports one environment per process.')
   with tf.variable_scope('environments'):
-    if env_processes:
+    if env_processes and shared_memory:
+      envs = [
+          tools.wrappers.SharedMemoryProcess(constructor)
+          for _ in range(num_agents)]
+    elif env_processes and envs_per_process > 1:
+      groups = [
+          tools.wrappers.ExternalProcessGroup(
+              constructor, min(envs_per_process, num_agents - start))
+          for start in range(0, num_agents, envs_per_process)]
+      envs = [env for group in groups for env in group.envs]
+    elif env_processes:
       envs = [
           tools.wrappers.ExternalProcess(constructor)
           for _ in range(num_agents)]
@@ -8,6 +8,7 @@ import numpy as np
 import copy
 import math
 import pybullet_data
+from pybullet_utils.joint_motor_array import JointMotorArray
 
 
 class Kuka:
@@ -67,6 +68,11 @@ class Kuka:
         self.motorNames.append(str(jointInfo[1]))
         self.motorIndices.append(i)
 
+    self.motors = JointMotorArray(p, self.kukaUid, self.motorIndices, forces=self.maxForce)
+    self.armMotors = JointMotorArray(p, self.kukaUid, range(self.kukaEndEffectorIndex+1), position_gains=0.3, velocity_gains=1, forces=self.maxForce)
+    #gripper angle, finger A, finger B and both finger tips
+    self.fingerMotors = JointMotorArray(p, self.kukaUid, [7,8,11,10,13], forces=[self.maxForce,self.fingerAForce,self.fingerBForce,self.fingerTipForce,self.fingerTipForce])
+
   def getActionDimension(self):
     if (self.useInverseKinematics):
       return len(self.motorIndices)
@@ -144,24 +150,23 @@ class Kuka:
       #print("self.kukaEndEffectorIndex")
       #print(self.kukaEndEffectorIndex)
       if (self.useSimulation):
-        for i in range (self.kukaEndEffectorIndex+1):
-          #print(i)
-          p.setJointMotorControl2(bodyUniqueId=self.kukaUid,jointIndex=i,controlMode=p.POSITION_CONTROL,targetPosition=jointPoses[i],targetVelocity=0,force=self.maxForce,maxVelocity=self.maxVelocity, positionGain=0.3,velocityGain=1)
+        #maxVelocity is not supported by setJointMotorControlArray, so the arm is still commanded joint by joint
+        self.armMotors.set_positions(jointPoses[:self.kukaEndEffectorIndex+1], max_velocities=self.maxVelocity)
       else:
         #reset the joint state (ignoring all dynamics, not recommended to use during simulation)
         for i in range (self.numJoints):
           p.resetJointState(self.kukaUid,i,jointPoses[i])
       #fingers
-      p.setJointMotorControl2(self.kukaUid,7,p.POSITION_CONTROL,targetPosition=self.endEffectorAngle,force=self.maxForce)
-      p.setJointMotorControl2(self.kukaUid,8,p.POSITION_CONTROL,targetPosition=-fingerAngle,force=self.fingerAForce)
-      p.setJointMotorControl2(self.kukaUid,11,p.POSITION_CONTROL,targetPosition=fingerAngle,force=self.fingerBForce)
-      
-      p.setJointMotorControl2(self.kukaUid,10,p.POSITION_CONTROL,targetPosition=0,force=self.fingerTipForce)
-      p.setJointMotorControl2(self.kukaUid,13,p.POSITION_CONTROL,targetPosition=0,force=self.fingerTipForce)
+      self.fingerMotors.set_positions([self.endEffectorAngle,-fingerAngle,fingerAngle,0,0])
       
       
     else:
-      for action in range (len(motorCommands)):
-        motor = self.motorIndices[action]
-        p.setJointMotorControl2(self.kukaUid,motor,p.POSITION_CONTROL,targetPosition=motorCommands[action],force=self.maxForce)
+      numCommands = len(motorCommands)
+      if numCommands > self.motors.num_joints:
+        raise IndexError("Got %d motor commands for %d motors." % (numCommands, self.motors.num_joints))
+      if numCommands == self.motors.num_joints:
+        self.motors.set_positions(motorCommands)
+      else:
+        #only the leading motors are commanded
+        p.setJointMotorControlArray(self.kukaUid,self.motorIndices[:numCommands],p.POSITION_CONTROL,targetPositions=motorCommands,forces=self.motors.forces[:numCommands])
       
@@ -5,6 +5,7 @@ import copy
 import math
 import numpy as np
 from . import motor
+from pybullet_utils import joint_motor_array
 import os
 
 INIT_POSITION = [0, 0, .2]
@@ -122,6 +123,13 @@ class Minitaur(object):
     self._motor_id_list = [
         self._joint_name_to_id[motor_name] for motor_name in MOTOR_NAMES
     ]
+    self._motor_array = joint_motor_array.JointMotorArray(
+        self._pybullet_client,
+        self.quadruped,
+        self._motor_id_list,
+        position_gains=self._kp,
+        velocity_gains=self._kd,
+        forces=self._max_force)
 
   def Reset(self, reload_urdf=True):
     """Reset the minitaur to its initial states.
@@ -385,13 +393,8 @@ class Minitaur(object):
         self._applied_motor_torque = np.multiply(actual_torque,
                                                  self._motor_direction)
 
-        for motor_id, motor_torque, motor_enabled in zip(
-            self._motor_id_list, self._applied_motor_torque,
-            self._motor_enabled_list):
-          if motor_enabled:
-            self._SetMotorTorqueById(motor_id, motor_torque)
-          else:
-            self._SetMotorTorqueById(motor_id, 0)
+        self._motor_array.set_torques(
+            np.where(self._motor_enabled_list, self._applied_motor_torque, 0))
       else:
         torque_commands = -self._kp * (q - motor_commands) - self._kd * qdot
 
@@ -403,15 +406,11 @@ class Minitaur(object):
         self._applied_motor_torques = np.multiply(self._observed_motor_torques,
                                                   self._motor_direction)
 
-        for motor_id, motor_torque in zip(self._motor_id_list,
-                                          self._applied_motor_torques):
-          self._SetMotorTorqueById(motor_id, motor_torque)
+        self._motor_array.set_torques(self._applied_motor_torques)
     else:
       motor_commands_with_direction = np.multiply(motor_commands,
                                                   self._motor_direction)
-      for motor_id, motor_command_with_direction in zip(
-          self._motor_id_list, motor_commands_with_direction):
-        self._SetDesiredMotorAngleById(motor_id, motor_command_with_direction)
+      self._motor_array.set_positions(motor_commands_with_direction)
 
   def GetMotorAngles(self):
     """Get the eight motor angles at the current moment.
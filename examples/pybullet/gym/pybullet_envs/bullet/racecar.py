@@ -3,6 +3,7 @@ import copy
 import math
 
 import numpy as np
+from pybullet_utils.joint_motor_array import JointMotorArray
 
 class Racecar:
 
@@ -51,6 +52,8 @@ class Racecar:
 		self.motorizedwheels=[8,15]
 		self.speedMultiplier = 20.
 		self.steeringMultiplier = 0.5
+		self.wheelMotors = JointMotorArray(self._p, car, self.motorizedwheels, forces=self.maxForce)
+		self.steeringMotors = JointMotorArray(self._p, car, self.steeringLinks)
 
 	def getActionDimension(self):
 		return self.nMotors
@@ -77,7 +80,5 @@ class Racecar:
 		#print("maxForce")
 		#print(self.maxForce)
 
-		for motor in self.motorizedwheels:
-			self._p.setJointMotorControl2(self.racecarUniqueId,motor,self._p.VELOCITY_CONTROL,targetVelocity=targetVelocity,force=self.maxForce)
-		for steer in self.steeringLinks:
-			self._p.setJointMotorControl2(self.racecarUniqueId,steer,self._p.POSITION_CONTROL,targetPosition=steeringAngle)
+		self.wheelMotors.set_velocities([targetVelocity]*len(self.motorizedwheels))
+		self.steeringMotors.set_positions([steeringAngle]*len(self.steeringLinks))
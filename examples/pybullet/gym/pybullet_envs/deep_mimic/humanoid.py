@@ -5,8 +5,10 @@ parentdir = os.path.dirname(os.path.dirname(currentdir))
 os.sys.path.insert(0,parentdir)
 
 from collections import OrderedDict
-from pybullet_utils.bullet_client import BulletClient
-import pybullet_data
+import numpy as np
+from pybullet_envs.deep_mimic import motion_capture_data
+from pybullet_envs.deep_mimic import quaternion_utils
+from pybullet_envs.deep_mimic.kinematic_tree import KinematicTree
 
 jointTypes = ["JOINT_REVOLUTE","JOINT_PRISMATIC",
               "JOINT_SPHERICAL","JOINT_PLANAR","JOINT_FIXED"]
@@ -105,29 +107,50 @@ class HumanoidPose(object):
     leftShoulderRotStart = [frameData[40],frameData[41],frameData[42],frameData[39]]
   
 
-  def __ComputeSphericalRotVel(self, quatStart, quatEnd, frameFraction, keyFrameDuration, bullet_client):
-    '''This is currently a helper function for computing Slerp
+  @staticmethod
+  def InterpolateFrames(frameFraction, frameData, frameDataNext, frameVelocities=None):
+    '''Interpolates between two motion frames in one pass over all joints
 
-    Computes the spherical rotation and velocity when transitioning from `quatStart` to `quatEnd`
-    at the time `frameFraction`, assuming the transition takes total time `keyFrameDuration`.
-    '''
-    start = [quatStart[1], quatStart[2], quatStart[3], quatStart[0]]
-    end   = [quatEnd[1],   quatEnd[2],   quatEnd[3],   quatEnd[0]  ]
-    rot = bullet_client.getQuaternionSlerp(start, end, frameFraction)
-    vel = self.ComputeAngVel(start, end, keyFrameDuration, bullet_client)
-    return rot, vel
+    Slerps the root orientation and the spherical joints, lerps the root position
+    and the revolute joints.
 
-  def __ComputeLinearRotVel(self, start, end, frameFraction, keyFrameDuration):
-    '''This is a helper function for computing Slerp
+    Returns a pose vector, with the root position, the root orientation and the joint
+    rotations (quaternions in the x,y,z,w order of pybullet), and a velocity vector,
+    laid out like a row of MotionCaptureData.FrameVelocities(). `frameVelocities` is
+    that row for `frameData`; it is computed from the two frames if not given.
 
-    Computes the linear rotation and velocity when transitioning from angle `start` to `end`
-    at the time `frameFraction`, assuming the transition takes total time `keyFrameDuration`.
+    Leading axes of the frames and fractions interpolate a batch of frame pairs, in
+    which case `frameVelocities` is required.
     '''
-    rot = [start + frameFraction * (end - start)]
-    vel = [(end - start) / keyFrameDuration]
-    return rot, vel
-    
-  def Slerp(self, frameFraction, frameData, frameDataNext, bullet_client):
+    frameFraction = np.asarray(frameFraction)[..., None]
+    start = np.asarray(frameData)[..., _POSE_FROM_FRAME]
+    end = np.asarray(frameDataNext)[..., _POSE_FROM_FRAME]
+    pose = start + frameFraction * (end - start)
+    pose[..., _POSE_QUATERNION_INDICES] = quaternion_utils.slerp(
+      start[..., _POSE_QUATERNION_INDICES], end[..., _POSE_QUATERNION_INDICES],
+      frameFraction)
+    if frameVelocities is None:
+      frameVelocities = motion_capture_data.compute_frame_velocities(
+        [frameData, frameDataNext])[0]
+    return pose, np.array(frameVelocities)
+
+  def SetFromVectors(self, poseVector, velocityVector):
+    '''Sets the base and joint attributes from a pose and a velocity vector
+
+    The attributes are views into the vectors, see InterpolateFrames for their layout.
+    '''
+    self._poseVector = poseVector
+    self._velocityVector = velocityVector
+    self._basePos = poseVector[0:3]
+    self._baseOrn = poseVector[3:7]
+    self._baseLinVel = velocityVector[0:3]
+    self._baseAngVel = velocityVector[3:6]
+    for joint_name in humanoidJoints:
+      self.__SetJointRot(joint_name, poseVector[_JOINT_POSE_SLICES[joint_name]])
+      self.__SetJointVel(joint_name, velocityVector[_JOINT_VELOCITY_SLICES[joint_name]])
+
+  def Slerp(self, frameFraction, frameData, frameDataNext, bullet_client=None,
+            frameVelocities=None):
     '''
     Sets a set of attributes on the `self` object, including:
       _basePose
@@ -137,47 +160,13 @@ class HumanoidPose(object):
       _[bodypart]Rot
       _[bodypart]Vel
 
+    `bullet_client` is unused, the interpolation runs in numpy, see InterpolateFrames.
+
     TODO: why not create a new object and make this a static method?
     '''
-    keyFrameDuration = frameData[0]
-    basePos1Start = [frameData[1],frameData[2],frameData[3]]
-    basePos1End = [frameDataNext[1],frameDataNext[2],frameDataNext[3]]
-    self._basePos = [basePos1Start[0]+frameFraction*(basePos1End[0]-basePos1Start[0]), 
-      basePos1Start[1]+frameFraction*(basePos1End[1]-basePos1Start[1]), 
-      basePos1Start[2]+frameFraction*(basePos1End[2]-basePos1Start[2])]
-    self._baseLinVel = self.ComputeLinVel(basePos1Start,basePos1End, keyFrameDuration)
-    baseOrn1Start = [frameData[5],frameData[6], frameData[7],frameData[4]]
-    baseOrn1Next = [frameDataNext[5],frameDataNext[6], frameDataNext[7],frameDataNext[4]]
-    
-    self._baseOrn, self._baseAngVel = self.__ComputeSphericalRotVel(
-      frameData[4:8], frameDataNext[4:8],
-      frameFraction, keyFrameDuration, bullet_client
-    )
-    
-    ##pre-rotate to make z-up
-    #y2zPos=[0,0,0.0]
-    #y2zOrn = p.getQuaternionFromEuler([1.57,0,0])
-    #basePos,baseOrn = p.multiplyTransforms(y2zPos, y2zOrn,basePos1,baseOrn1)
+    self.SetFromVectors(*HumanoidPose.InterpolateFrames(
+      frameFraction, frameData, frameDataNext, frameVelocities))
 
-    idx = 8
-
-    for joint_name, joint_info in humanoidJoints.items():
-      if joint_info['spherical']:
-        rot, vel = self.__ComputeSphericalRotVel(
-          frameData[idx:idx+4], frameDataNext[idx:idx+4],
-          frameFraction, keyFrameDuration, bullet_client
-        )
-        idx += 4
-      else:
-        rot, vel = self.__ComputeLinearRotVel(
-          frameData[idx], frameDataNext[idx],
-          frameFraction, keyFrameDuration
-        )
-        idx += 1
-
-      self.__SetJointRot(joint_name, rot)
-      self.__SetJointVel(joint_name, vel)
-  
 
   @staticmethod
   def PoseFromAction(action, bullet_client):
@@ -217,28 +206,18 @@ class Humanoid(object):
     """
     self._baseShift = baseShift
     self._pybullet_client = pybullet_client
-    
-    self.kin_client = BulletClient(pybullet_client.DIRECT)# use SHARED_MEMORY for visual debugging, start a GUI physics server first
-    self.kin_client.resetSimulation()
-    self.kin_client.setAdditionalSearchPath(pybullet_data.getDataPath())
-    self.kin_client.configureDebugVisualizer(self.kin_client.COV_ENABLE_Y_AXIS_UP,1)
-    self.kin_client.setGravity(0,-9.8,0)
+    self._referenceTable = None
+    self._referenceSample = None
     
     self._motion_data = motion_data
     print("LOADING humanoid!")
     self._humanoid = self._pybullet_client.loadURDF(
       "humanoid/humanoid.urdf", [0,0.9,0],globalScaling=0.25, useFixedBase=False)
-      
-    self._kinematicHumanoid = self.kin_client.loadURDF(
-      "humanoid/humanoid.urdf", [0,0.9,0],globalScaling=0.25, useFixedBase=False)
-      
+    #the kinematic reference character is computed in numpy, see ComputeReferenceLinkStates
+    self._kinematicTree = KinematicTree.FromBody(self._pybullet_client, self._humanoid)
       
     #print("human #joints=", self._pybullet_client.getNumJoints(self._humanoid))
-    pose = HumanoidPose()
-    
-    for i in range (self._motion_data.NumFrames()-1):
-      frameData = self._motion_data._motion_data['Frames'][i]
-      pose.PostProcessMotionData(frameData)
+    #the motion data arrives with normalized quaternions, see MotionCaptureData.Load
     
     self._pybullet_client.resetBasePositionAndOrientation(self._humanoid,self._baseShift,[0,0,0,1])
     self._pybullet_client.changeDynamics(self._humanoid, -1, linearDamping=0, angularDamping=0)
@@ -251,6 +230,8 @@ class Humanoid(object):
     
     self._initial_state = self._pybullet_client.saveState()
     self._allowed_body_parts=[11,14]
+    #GetState lists the links in DeepMimic order
+    self.pb2dmJoints=[0,1,2,9,10,11,3,4,5,12,13,14,6,7,8]
     self.Reset()
     
   def Reset(self):
@@ -266,8 +247,23 @@ class Humanoid(object):
     #count = (loop) ? count : cMathUtil::Clamp(count, 0, 1);
     return count
 
+  def SetReferenceTable(self, referenceTable):
+    '''Sets the ReferenceMotionTable of the motion data used by SetSimSample'''
+    self._referenceTable = referenceTable
+    self._referenceSample = None
+
+  def SetSimSample(self, index):
+    '''Sets the sim time to sample `index` of the reference table
+
+    The reference pose and phase are then looked up in the table, instead of being
+    interpolated from the motion data, until the next SetSimTime.
+    '''
+    self._simTime = self._referenceTable.TimeOfSample(index)
+    self._referenceSample = index
+
   def SetSimTime(self, t):
     self._simTime = t
+    self._referenceSample = None
     #print("SetTimeTime time =",t)
     keyFrameDuration = self._motion_data.KeyFrameDuration()
     cycleTime = keyFrameDuration*(self._motion_data.NumFrames()-1)
@@ -318,6 +314,8 @@ class Humanoid(object):
     return headingOrn
 
   def GetPhase(self):
+    if self._referenceSample is not None:
+      return self._referenceTable.Lookup(self._referenceSample)[2]
     keyFrameDuration = self._motion_data.KeyFrameDuration()
     cycleTime = keyFrameDuration*(self._motion_data.NumFrames()-1)
     phase = self._simTime / cycleTime
@@ -347,10 +345,17 @@ class Humanoid(object):
     return invOrigTransPos, invOrigTransOrn
     
   def InitializePoseFromMotionData(self):
+    if self._referenceSample is not None:
+      poseVector, velocityVector, _ = self._referenceTable.Lookup(self._referenceSample)
+      pose = HumanoidPose()
+      pose.SetFromVectors(poseVector, velocityVector)
+      return pose
     frameData = self._motion_data._motion_data['Frames'][self._frame]
     frameDataNext = self._motion_data._motion_data['Frames'][self._frameNext]
     pose = HumanoidPose()
-    pose.Slerp(self._frameFraction, frameData, frameDataNext, self._pybullet_client)
+    frameVelocities = self._motion_data.FrameVelocities()[self._frame]
+    pose.Slerp(self._frameFraction, frameData, frameDataNext, self._pybullet_client,
+               frameVelocities)
     return pose  
     
   def ApplyAction(self, action):
@@ -410,65 +415,76 @@ class Humanoid(object):
     #    if (len(jsm[0])>0):
     #      bc.resetJointStateMultiDof(self._humanoidDebug,j,jsm[0])
         
-  def GetState(self):
+  def GetState(self, out=None):
+    '''Returns the state as a float32 vector of length STATE_SIZE
+
+    The phase and the root height, then per link its position and w,x,y,z orientation
+    relative to the root in the heading frame, then per link its world linear and
+    angular velocity. All links come from one getLinkStates call and are transformed
+    together. `out` is an optional preallocated vector to fill and return.
+    '''
+    if out is None:
+      out = np.empty(STATE_SIZE, dtype=np.float32)
+    out[0] = self.GetPhase()
 
-    stateVector = []
-    phase = self.GetPhase()
-    #print("phase=",phase)
-    stateVector.append(phase)
-    
     rootTransPos, rootTransOrn=self.BuildOriginTrans()
     basePos,baseOrn = self._pybullet_client.getBasePositionAndOrientation(self._humanoid)
-    
-    rootPosRel, dummy = self._pybullet_client.multiplyTransforms(rootTransPos, rootTransOrn, basePos,[0,0,0,1])
-    #print("!!!rootPosRel =",rootPosRel )
-    #print("rootTransPos=",rootTransPos)
-    #print("basePos=",basePos)
-    localPos,localOrn = self._pybullet_client.multiplyTransforms( rootTransPos, rootTransOrn , basePos,baseOrn )
-    
-    localPos=[localPos[0]-rootPosRel[0],localPos[1]-rootPosRel[1],localPos[2]-rootPosRel[2]]
-    #print("localPos=",localPos)
-        
-    stateVector.append(rootPosRel[1])
-    
-    self.pb2dmJoints=[0,1,2,9,10,11,3,4,5,12,13,14,6,7,8]
-    
-    for pbJoint in range (self._pybullet_client.getNumJoints(self._humanoid)):
-      j = self.pb2dmJoints[pbJoint]
-      #print("joint order:",j)
-      ls = self._pybullet_client.getLinkState(self._humanoid, j, computeForwardKinematics=True)
-      linkPos = ls[0]
-      linkOrn = ls[1]
-      linkPosLocal, linkOrnLocal = self._pybullet_client.multiplyTransforms(rootTransPos, rootTransOrn, linkPos,linkOrn)
-      if (linkOrnLocal[3]<0):
-        linkOrnLocal=[-linkOrnLocal[0],-linkOrnLocal[1],-linkOrnLocal[2],-linkOrnLocal[3]]
-      linkPosLocal=[linkPosLocal[0]-rootPosRel[0],linkPosLocal[1]-rootPosRel[1],linkPosLocal[2]-rootPosRel[2]]
-      for l in linkPosLocal:
-        stateVector.append(l)
-      
-      #re-order the quaternion, DeepMimic uses w,x,y,z
-      stateVector.append(linkOrnLocal[3])
-      stateVector.append(linkOrnLocal[0])
-      stateVector.append(linkOrnLocal[1])
-      stateVector.append(linkOrnLocal[2])
-    
-    
-    for pbJoint in range (self._pybullet_client.getNumJoints(self._humanoid)):
-      j = self.pb2dmJoints[pbJoint]
-      ls = self._pybullet_client.getLinkState(self._humanoid, j, computeLinkVelocity=True)
-      linkLinVel = ls[6]
-      linkAngVel = ls[7]
-      for l in linkLinVel:
-        stateVector.append(l)
-      for l in linkAngVel:
-        stateVector.append(l)
-    
-    #print("stateVector len=",len(stateVector))  
-    #for st in range (len(stateVector)):
-    #  print("state[",st,"]=",stateVector[st])
-    return stateVector
+    rootTransMat = np.reshape(self._pybullet_client.getMatrixFromQuaternion(rootTransOrn), (3, 3))
+    rootPosRel = rootTransMat.dot(basePos) + rootTransPos
+    out[1] = rootPosRel[1]
+
+    #one row per link: position, orientation, linear and angular velocity
+    linkStates = np.array([ls[0]+ls[1]+ls[6]+ls[7] for ls in self._pybullet_client.getLinkStates(
+      self._humanoid, self.pb2dmJoints, computeLinkVelocity=True, computeForwardKinematics=True)])
+    numLinks = len(linkStates)
+    poseState = out[2:2+7*numLinks].reshape(numLinks, 7)
+    velocityState = out[2+7*numLinks:].reshape(numLinks, 6)
+
+    #apply the root transform to all links at once, relative to the root position
+    poseState[:, 0:3] = (linkStates[:, 0:3] - basePos).dot(rootTransMat.T)
+    #rootTransOrn * linkOrn as a matrix product, with the rows in the w,x,y,z order
+    #of DeepMimic
+    x, y, z, w = rootTransOrn
+    linkOrnLocal = linkStates[:, 3:7].dot(np.array([
+      [-x, -y, -z, w],
+      [w, -z, y, x],
+      [z, w, -x, y],
+      [-y, x, w, z]]).T)
+    linkOrnLocal[linkOrnLocal[:, 0] < 0] *= -1
+    poseState[:, 3:7] = linkOrnLocal
+    velocityState[:] = linkStates[:, 7:13]
+    return out
   
   
+  def ComputeReferenceJointStates(self, pose):
+    '''Returns the joint positions and velocities of a pose set from motion data
+
+    They are indexed by joint index and padded to 4 positions and 3 velocities per
+    joint, as KinematicTree.ComputeLinkStates expects them.
+    '''
+    numJoints = self._kinematicTree.numLinks
+    jointPositions = np.zeros((numJoints, 4))
+    jointVelocities = np.zeros((numJoints, 3))
+    jointPositions[_JOINT_POSITION_ROWS, _JOINT_POSITION_COLUMNS] = (
+      pose._poseVector[_JOINT_POSITION_POSE_INDICES])
+    jointVelocities[_JOINT_VELOCITY_ROWS, _JOINT_VELOCITY_COLUMNS] = (
+      pose._velocityVector[_JOINT_VELOCITY_INDICES])
+    return jointPositions, jointVelocities
+
+  def ComputeReferenceLinkStates(self, pose=None):
+    '''Computes the link states of the kinematic reference character
+
+    Uses forward kinematics in numpy instead of applying `pose` to a second
+    humanoid in a second physics client. `pose` defaults to the reference pose at
+    the current sim time. Returns a kinematic_tree.LinkStates.
+    '''
+    if pose is None:
+      pose = self.InitializePoseFromMotionData()
+    jointPositions, jointVelocities = self.ComputeReferenceJointStates(pose)
+    return self._kinematicTree.ComputeLinkStates(
+      pose._basePos + np.asarray(self._baseShift), pose._baseOrn,
+      pose._baseLinVel, pose._baseAngVel, jointPositions, jointVelocities)
+
   def GetReward(self):
     #from DeepMimic double cSceneImitate::CalcRewardImitate
     pose_w = 0.5
@@ -503,9 +519,8 @@ class Humanoid(object):
     #create a mimic reward, comparing the dynamics humanoid with a kinematic one
     
     pose = self.InitializePoseFromMotionData()
-    #print("self._kinematicHumanoid=",self._kinematicHumanoid)
-    #print("kinematicHumanoid #joints=",self.kin_client.getNumJoints(self._kinematicHumanoid))
-    self.ApplyPose(pose, True, True, self._kinematicHumanoid, self.kin_client)
+    #the joint states of the kinematic character are the reference pose itself
+    kinJointPositions, kinJointVelocities = self.ComputeReferenceJointStates(pose)
 
     #const Eigen::VectorXd& pose0 = sim_char.GetPose();
     #const Eigen::VectorXd& vel0 = sim_char.GetVel();
@@ -550,7 +565,7 @@ class Humanoid(object):
       
       #print("simJointInfo.pos=",simJointInfo[0])
       #print("simJointInfo.vel=",simJointInfo[1])
-      kinJointInfo = self.kin_client.getJointStateMultiDof(self._kinematicHumanoid,j)
+      kinJointInfo = (kinJointPositions[j], kinJointVelocities[j])
       #print("kinJointInfo.pos=",kinJointInfo[0])
       #print("kinJointInfo.vel=",kinJointInfo[1])
       if (len(simJointInfo[0])==1):
@@ -632,6 +647,10 @@ class Humanoid(object):
     return pos
 
 
+#the length of the vector returned by Humanoid.GetState: the phase, the root height,
+#7 pose and 6 velocity entries per link
+STATE_SIZE = 2 + 13*15
+
 humanoidJoints = OrderedDict([
   ['chest', {
     'spherical': True,
@@ -693,4 +712,66 @@ humanoidJoints = OrderedDict([
     'joint_index': 7,
     'max_force': 60,
   }],
-])
\ No newline at end of file
+])
+
+
+def _BuildMotionLayout():
+  '''Builds the index arrays that map motion frames to pose and velocity vectors'''
+  poseFromFrame = list(range(motion_capture_data.ROOT_POS_OFFSET,
+                             motion_capture_data.ROOT_POS_OFFSET+3))
+  quaternionIndices = []
+  jointPoseSlices = OrderedDict()
+  jointVelocitySlices = OrderedDict()
+
+  def AddQuaternion(frameOffset):
+    #motion frames store w,x,y,z
+    quaternionIndices.append(list(range(len(poseFromFrame), len(poseFromFrame)+4)))
+    poseFromFrame.extend([frameOffset+1, frameOffset+2, frameOffset+3, frameOffset])
+
+  AddQuaternion(motion_capture_data.ROOT_ORN_OFFSET)
+  frameOffset = motion_capture_data.JOINTS_OFFSET
+  velocityOffset = 6
+  for joint_name, joint_info in humanoidJoints.items():
+    poseOffset = len(poseFromFrame)
+    if joint_info['spherical']:
+      AddQuaternion(frameOffset)
+      frameOffset += 4
+      velocityDofs = 3
+    else:
+      poseFromFrame.append(frameOffset)
+      frameOffset += 1
+      velocityDofs = 1
+    jointPoseSlices[joint_name] = slice(poseOffset, len(poseFromFrame))
+    jointVelocitySlices[joint_name] = slice(velocityOffset, velocityOffset+velocityDofs)
+    velocityOffset += velocityDofs
+  return (np.array(poseFromFrame), np.array(quaternionIndices),
+          jointPoseSlices, jointVelocitySlices)
+
+
+(_POSE_FROM_FRAME, _POSE_QUATERNION_INDICES,
+ _JOINT_POSE_SLICES, _JOINT_VELOCITY_SLICES) = _BuildMotionLayout()
+
+
+def _BuildJointStateLayout():
+  '''Builds the index arrays that map pose and velocity vectors to joint states'''
+  positionRows, positionColumns, poseIndices = [], [], []
+  velocityRows, velocityColumns, velocityIndices = [], [], []
+  for joint_name, joint_info in humanoidJoints.items():
+    poseSlice = _JOINT_POSE_SLICES[joint_name]
+    for column, index in enumerate(range(poseSlice.start, poseSlice.stop)):
+      positionRows.append(joint_info['joint_index'])
+      positionColumns.append(column)
+      poseIndices.append(index)
+    velocitySlice = _JOINT_VELOCITY_SLICES[joint_name]
+    for column, index in enumerate(range(velocitySlice.start, velocitySlice.stop)):
+      velocityRows.append(joint_info['joint_index'])
+      velocityColumns.append(column)
+      velocityIndices.append(index)
+  return tuple(np.array(indices) for indices in (
+    positionRows, positionColumns, poseIndices,
+    velocityRows, velocityColumns, velocityIndices))
+
+
+(_JOINT_POSITION_ROWS, _JOINT_POSITION_COLUMNS, _JOINT_POSITION_POSE_INDICES,
+ _JOINT_VELOCITY_ROWS, _JOINT_VELOCITY_COLUMNS,
+ _JOINT_VELOCITY_INDICES) = _BuildJointStateLayout()
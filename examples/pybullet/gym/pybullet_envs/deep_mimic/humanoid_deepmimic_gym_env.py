@@ -20,6 +20,7 @@ from pybullet_envs.deep_mimic.humanoid import Humanoid
 from pkg_resources import parse_version
 from pybullet_utils import bullet_client
 from pybullet_envs.deep_mimic.motion_capture_data import MotionCaptureData
+from pybullet_envs.deep_mimic.reference_motion_table import ReferenceMotionTable
 
 RENDER_HEIGHT = 360
 RENDER_WIDTH = 480
@@ -35,12 +36,17 @@ class HumanoidDeepMimicGymEnv(gym.Env):
 
   def __init__(self,
                urdf_root=pybullet_data.getDataPath(),
-               render=False):
+               render=False,
+               use_reference_table=False):
     """Initialize the gym environment.
 
     Args:
       urdf_root: The path to the urdf data folder.
       render: Whether to render the simulation.
+      use_reference_table: Whether to look the reference motion up in a
+        ReferenceMotionTable sampled at the control time step, instead of
+        interpolating it at every step. Episodes then start at a random sample
+        of the first motion cycle.
     Raises:
       ValueError: If the urdf_version is not supported.
     """
@@ -55,6 +61,9 @@ class HumanoidDeepMimicGymEnv(gym.Env):
     self._ground_id = None
     self._pybullet_client = None
     self._humanoid = None
+    self._use_reference_table = use_reference_table
+    self._reference_table = None
+    self._reference_sample = 0
     self._control_time_step = 8.*(1./240.)#0.033333
     self.seed()
     observation_high = (self._get_observation_upper_bound())
@@ -93,11 +102,19 @@ class HumanoidDeepMimicGymEnv(gym.Env):
       #self._pybullet_client.configureDebugVisualizer(self._pybullet_client.COV_ENABLE_PLANAR_REFLECTION,self._ground_id)
       shift=[0,0,0]
       self._humanoid = Humanoid(self._pybullet_client,self._motion,shift)
+      if self._use_reference_table:
+        self._reference_table = ReferenceMotionTable(self._motion, self._control_time_step)
+        self._humanoid.SetReferenceTable(self._reference_table)
 
     self._humanoid.Reset()
-    simTime = random.randint(0,self._motion.NumFrames()-2)
-    self._humanoid.SetSimTime(simTime)
-    self._initial_frame = simTime
+    if self._reference_table:
+      self._reference_sample = random.randrange(self._reference_table.NumCycleSamples())
+      self._humanoid.SetSimSample(self._reference_sample)
+      self._initial_frame = self._reference_table.TimeOfSample(self._reference_sample)
+    else:
+      simTime = random.randint(0,self._motion.NumFrames()-2)
+      self._humanoid.SetSimTime(simTime)
+      self._initial_frame = simTime
     pose = self._humanoid.InitializePoseFromMotionData()
     self._humanoid.ApplyPose(pose, True, True, self._humanoid._humanoid,self._pybullet_client)
 
@@ -151,8 +168,13 @@ class HumanoidDeepMimicGymEnv(gym.Env):
     for s in range (8):
       #print("step:",s)
       self._pybullet_client.stepSimulation()
-    self._initial_frame = self._initial_frame + self._control_time_step
-    self._humanoid.SetSimTime(self._initial_frame)
+    if self._reference_table:
+      self._reference_sample += self._reference_table.numSubsteps
+      self._humanoid.SetSimSample(self._reference_sample)
+      self._initial_frame = self._reference_table.TimeOfSample(self._reference_sample)
+    else:
+      self._initial_frame = self._initial_frame + self._control_time_step
+      self._humanoid.SetSimTime(self._initial_frame)
     reward = self._reward()
     done = self._termination()
     self._env_step_counter += 1
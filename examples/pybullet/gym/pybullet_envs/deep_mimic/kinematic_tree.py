@@ -0,0 +1,192 @@
+"""Forward kinematics of a pybullet multibody in numpy, without a server.
+
+The tree is read once from a loaded body. Link poses and velocities then follow
+from the base state and the joint states alone, for one pose or for a batch of
+poses along leading axes.
+"""
+import collections
+
+import numpy as np
+
+from pybullet_envs.deep_mimic import quaternion_utils
+
+# pybullet joint types.
+JOINT_REVOLUTE = 0
+JOINT_SPHERICAL = 2
+JOINT_FIXED = 4
+
+# The poses and velocities of the link centers of mass, like the first two and
+# the last two entries of pybullet.getLinkState. Each field has one row per
+# link, in the order of the joint indices.
+LinkStates = collections.namedtuple(
+    'LinkStates',
+    ['positions', 'orientations', 'linearVelocities', 'angularVelocities'])
+
+
+class KinematicTree(object):
+  """The joint tree of a multibody with revolute, spherical and fixed joints."""
+
+  def __init__(self, parentIndices, jointTypes, jointAxes, parentFramePositions,
+               parentFrameOrientations, inertialPositions,
+               inertialOrientations):
+    """Constructs the tree.
+
+    Args:
+      parentIndices: The parent link of each link, -1 for the base.
+      jointTypes: The pybullet joint type of each link.
+      jointAxes: The axis of each joint, in the joint frame.
+      parentFramePositions: The position of each joint in the center of mass
+        frame of its parent.
+      parentFrameOrientations: The orientation of each joint in the center of
+        mass frame of its parent.
+      inertialPositions: The position of each center of mass in its link frame.
+      inertialOrientations: The orientation of each center of mass frame in its
+        link frame.
+    Raises:
+      ValueError: If a joint is neither revolute, spherical nor fixed.
+    """
+    jointTypes = np.asarray(jointTypes)
+    unsupported = set(jointTypes) - set(
+        [JOINT_REVOLUTE, JOINT_SPHERICAL, JOINT_FIXED])
+    if unsupported:
+      raise ValueError('unsupported joint types %s' % sorted(unsupported))
+    self._numLinks = len(jointTypes)
+    self._sphericalMask = (jointTypes == JOINT_SPHERICAL)[:, None]
+    self._revoluteMask = (jointTypes == JOINT_REVOLUTE)[:, None]
+    self._jointAxes = np.asarray(jointAxes, dtype=np.float64)
+    self._parentFramePositions = np.asarray(
+        parentFramePositions, dtype=np.float64)[..., None]
+    self._parentFrameMatrices = quaternion_utils.to_matrix(
+        parentFrameOrientations)
+    self._inertialPositions = np.asarray(
+        inertialPositions, dtype=np.float64)[..., None]
+    self._inertialMatrices = quaternion_utils.to_matrix(inertialOrientations)
+
+    # Group the links by depth, so that each group only depends on the ones
+    # before it. The states are stored with the base at slot 0, link i at
+    # slot i + 1.
+    depths = []
+    # ancestors[i, k] is 1 if joint k moves link i.
+    self._ancestors = np.zeros((self._numLinks, self._numLinks))
+    for link, parent in enumerate(parentIndices):
+      depths.append(0 if parent < 0 else depths[parent] + 1)
+      if parent >= 0:
+        self._ancestors[link] = self._ancestors[parent]
+      self._ancestors[link, link] = 1
+    depths = np.array(depths)
+    parentSlots = np.asarray(parentIndices) + 1
+    self._levels = []
+    for depth in range(depths.max() + 1 if self._numLinks else 0):
+      links = np.nonzero(depths == depth)[0]
+      self._levels.append((links, links + 1, parentSlots[links]))
+
+  @staticmethod
+  def FromBody(bullet_client, bodyId):
+    """Reads the tree of a body loaded in a bullet client."""
+    parentIndices = []
+    jointTypes = []
+    jointAxes = []
+    parentFramePositions = []
+    parentFrameOrientations = []
+    inertialPositions = []
+    inertialOrientations = []
+    for j in range(bullet_client.getNumJoints(bodyId)):
+      jointInfo = bullet_client.getJointInfo(bodyId, j)
+      dynamicsInfo = bullet_client.getDynamicsInfo(bodyId, j)
+      jointTypes.append(jointInfo[2])
+      jointAxes.append(jointInfo[13])
+      parentFramePositions.append(jointInfo[14])
+      parentFrameOrientations.append(jointInfo[15])
+      parentIndices.append(jointInfo[16])
+      inertialPositions.append(dynamicsInfo[3])
+      inertialOrientations.append(dynamicsInfo[4])
+    return KinematicTree(parentIndices, jointTypes, jointAxes,
+                         parentFramePositions, parentFrameOrientations,
+                         inertialPositions, inertialOrientations)
+
+  @property
+  def numLinks(self):
+    return self._numLinks
+
+  def ComputeLinkStates(self, basePos, baseOrn, baseLinVel, baseAngVel,
+                        jointPositions, jointVelocities):
+    """Computes the poses and velocities of the link centers of mass.
+
+    Leading axes of the arguments are batch axes. Entries of fixed joints are
+    ignored.
+
+    Args:
+      basePos: The world position of the base center of mass.
+      baseOrn: The world orientation of the base center of mass frame.
+      baseLinVel: The world linear velocity of the base center of mass.
+      baseAngVel: The world angular velocity of the base.
+      jointPositions: The joint positions, shape [..., numLinks, 4]. A
+        quaternion for a spherical joint, the angle in the first entry for a
+        revolute joint.
+      jointVelocities: The joint velocities, shape [..., numLinks, 3]. The
+        angular velocity in the child link frame for a spherical joint, the
+        rate in the first entry for a revolute joint.
+
+    Returns:
+      A LinkStates of arrays with shape [..., numLinks, 3 or 4].
+    """
+    basePos = np.asarray(basePos, dtype=np.float64)
+    baseOrn = np.asarray(baseOrn, dtype=np.float64)
+    jointPositions = np.asarray(jointPositions, dtype=np.float64)
+    jointVelocities = np.asarray(jointVelocities, dtype=np.float64)
+    batchShape = np.broadcast(basePos[..., 0], jointPositions[..., 0, 0]).shape
+
+    halfAngles = 0.5 * jointPositions[..., :1]
+    revoluteRotations = np.concatenate(
+        [self._jointAxes * np.sin(halfAngles), np.cos(halfAngles)], axis=-1)
+    jointRotations = np.where(
+        self._sphericalMask, jointPositions,
+        np.where(self._revoluteMask, revoluteRotations, [0., 0., 0., 1.]))
+    localMatrices = np.matmul(self._parentFrameMatrices,
+                              quaternion_utils.to_matrix(jointRotations))
+    localAngularVelocities = np.where(
+        self._sphericalMask, jointVelocities,
+        np.where(self._revoluteMask,
+                 self._jointAxes * jointVelocities[..., :1], 0.))
+
+    # Rotation matrices and column vector positions of the link frames and
+    # of the centers of mass, with the base center of mass at slot 0.
+    slots = self._numLinks + 1
+    matrices = np.empty(batchShape + (slots, 3, 3))
+    positions = np.empty(batchShape + (slots, 3, 1))
+    frameMatrices = np.empty(batchShape + (self._numLinks, 3, 3))
+    framePositions = np.empty(batchShape + (self._numLinks, 3, 1))
+    matrices[..., 0, :, :] = quaternion_utils.to_matrix(baseOrn)
+    positions[..., 0, :, :] = basePos[..., None]
+    for links, linkSlots, parentSlots in self._levels:
+      parentMatrices = matrices[..., parentSlots, :, :]
+      levelMatrices = np.matmul(parentMatrices, localMatrices[..., links, :, :])
+      levelPositions = positions[..., parentSlots, :, :] + np.matmul(
+          parentMatrices, self._parentFramePositions[links])
+      frameMatrices[..., links, :, :] = levelMatrices
+      framePositions[..., links, :, :] = levelPositions
+      matrices[..., linkSlots, :, :] = np.matmul(levelMatrices,
+                                                 self._inertialMatrices[links])
+      positions[..., linkSlots, :, :] = levelPositions + np.matmul(
+          levelMatrices, self._inertialPositions[links])
+    positions = positions[..., 0]
+    framePositions = framePositions[..., 0]
+
+    # A link moves with the base and rotates about each joint above it, the
+    # joints are at the link frame origins.
+    baseLinVel = np.asarray(baseLinVel, dtype=np.float64)[..., None, :]
+    baseAngVel = np.asarray(baseAngVel, dtype=np.float64)[..., None, :]
+    jointAngularVelocities = np.matmul(
+        frameMatrices, localAngularVelocities[..., None])[..., 0]
+    angularVelocities = baseAngVel + np.matmul(self._ancestors,
+                                               jointAngularVelocities)
+    comPositions = positions[..., 1:, :]
+    linearVelocities = (
+        baseLinVel - quaternion_utils.cross(baseAngVel, positions[..., :1, :]) +
+        quaternion_utils.cross(angularVelocities, comPositions) -
+        np.matmul(self._ancestors,
+                  quaternion_utils.cross(jointAngularVelocities,
+                                         framePositions)))
+    return LinkStates(comPositions,
+                      quaternion_utils.from_matrix(matrices[..., 1:, :, :]),
+                      linearVelocities, angularVelocities)
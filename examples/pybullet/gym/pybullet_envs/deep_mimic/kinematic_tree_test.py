@@ -0,0 +1,85 @@
+"""Tests the numpy forward kinematics against pybullet's link states."""
+import os, inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0, parentdir)
+
+import unittest
+
+import numpy as np
+import pybullet
+import pybullet_data
+
+from pybullet_envs.deep_mimic.humanoid import Humanoid
+from pybullet_envs.deep_mimic.kinematic_tree import KinematicTree
+from pybullet_envs.deep_mimic.motion_capture_data import MotionCaptureData
+from pybullet_utils.bullet_client import BulletClient
+
+
+class KinematicTreeTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    cls.bc = BulletClient(connection_mode=pybullet.DIRECT)
+    cls.bc.setAdditionalSearchPath(pybullet_data.getDataPath())
+    motion = MotionCaptureData()
+    motion.Load(
+        os.path.join(pybullet_data.getDataPath(),
+                     "motions/humanoid3d_backflip.txt"),
+        cache_dir=None)
+    cls.humanoid = Humanoid(cls.bc, motion, [0.3, 0, 0.2])
+    cls.times = np.linspace(0, 2.5, 12)
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.bc.disconnect()
+
+  def _reference_pose(self, t):
+    self.humanoid.SetSimTime(t)
+    return self.humanoid.InitializePoseFromMotionData()
+
+  def test_reference_link_states_match_pybullet(self):
+    body = self.humanoid._humanoid
+    for t in self.times:
+      pose = self._reference_pose(t)
+      self.humanoid.ApplyPose(pose, True, True, body, self.bc)
+      linkStates = self.humanoid.ComputeReferenceLinkStates(pose)
+      for j in range(self.bc.getNumJoints(body)):
+        linkState = self.bc.getLinkState(
+            body, j, computeLinkVelocity=1, computeForwardKinematics=1)
+        np.testing.assert_allclose(
+            linkState[0], linkStates.positions[j], rtol=0, atol=1e-10)
+        # q and -q are the same rotation.
+        orientation = linkStates.orientations[j]
+        if np.dot(orientation, linkState[1]) < 0:
+          orientation = -orientation
+        np.testing.assert_allclose(
+            linkState[1], orientation, rtol=0, atol=1e-10)
+        np.testing.assert_allclose(
+            linkState[6], linkStates.linearVelocities[j], rtol=0, atol=1e-10)
+        np.testing.assert_allclose(
+            linkState[7], linkStates.angularVelocities[j], rtol=0, atol=1e-10)
+
+  def test_batch_matches_single_poses(self):
+    tree = self.humanoid._kinematicTree
+    inputs = []
+    for t in self.times:
+      pose = self._reference_pose(t)
+      jointPositions, jointVelocities = (
+          self.humanoid.ComputeReferenceJointStates(pose))
+      inputs.append((pose._basePos, pose._baseOrn, pose._baseLinVel,
+                     pose._baseAngVel, jointPositions, jointVelocities))
+    batch = tree.ComputeLinkStates(*[np.stack(x) for x in zip(*inputs)])
+    for i, single in enumerate(inputs):
+      expected = tree.ComputeLinkStates(*single)
+      for field, value in zip(expected, batch):
+        np.testing.assert_allclose(field, value[i], rtol=0, atol=1e-12)
+
+  def test_unsupported_joint_type(self):
+    with self.assertRaises(ValueError):
+      KinematicTree([-1], [pybullet.JOINT_PRISMATIC], [[1, 0, 0]], [[0, 0, 0]],
+                    [[0, 0, 0, 1]], [[0, 0, 0]], [[0, 0, 0, 1]])
+
+
+if __name__ == '__main__':
+  unittest.main()
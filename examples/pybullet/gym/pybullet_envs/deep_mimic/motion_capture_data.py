@@ -1,18 +1,188 @@
+import hashlib
 import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from pybullet_envs.deep_mimic import quaternion_utils
+
+# The degrees of freedom of the joints in a frame of a DeepMimic humanoid3d
+# motion, in the order of the frame. 4 is a spherical joint stored as a
+# (w, x, y, z) quaternion, 1 a revolute joint stored as an angle.
+HUMANOID_JOINT_DOFS = (4, 4, 4, 1, 4, 4, 1, 4, 1, 4, 4, 1)
+
+# A frame starts with the key frame duration, the root position and the root
+# orientation as a (w, x, y, z) quaternion, followed by the joints.
+ROOT_POS_OFFSET = 1
+ROOT_ORN_OFFSET = 4
+JOINTS_OFFSET = 8
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "pybullet_envs", "motions")
+
+# Bump this when the cached arrays change, to ignore the old cache entries.
+_CACHE_FORMAT_VERSION = 1
+_FRAMES_FILE = "frames.npy"
+_VELOCITIES_FILE = "velocities.npy"
+_INFO_FILE = "info.json"
+
+
+def frame_quaternion_offsets(joint_dofs=HUMANOID_JOINT_DOFS):
+  """Returns the frame offsets of the root and spherical joint quaternions."""
+  offsets = [ROOT_ORN_OFFSET]
+  offset = JOINTS_OFFSET
+  for dofs in joint_dofs:
+    if dofs == 4:
+      offsets.append(offset)
+    offset += dofs
+  return offsets
+
+
+def compute_frame_velocities(frames, joint_dofs=HUMANOID_JOINT_DOFS):
+  """Computes the velocities from each frame to the next one.
+
+  Args:
+    frames: The frames, one row per key frame, with unit quaternions.
+    joint_dofs: The degrees of freedom of the joints in a frame.
+
+  Returns:
+    The velocities, one row per key frame: the linear and the angular velocity
+    of the root, then 3 angular velocity components per spherical joint and
+    1 per revolute joint. The last row, which has no next frame, and the rows
+    of frames with zero duration are zero.
+  """
+  frames = np.asarray(frames, dtype=np.float64)
+  start = frames[:-1]
+  end = frames[1:]
+  duration = np.where(start[:, 0] > 0, start[:, 0], np.inf)
+
+  def angular_velocity(offset):
+    # Frames store (w, x, y, z), quaternion_utils uses (x, y, z, w).
+    order = [offset + 1, offset + 2, offset + 3, offset]
+    return quaternion_utils.angular_velocity(
+        start[:, order], end[:, order], duration)
+
+  columns = [
+      (end[:, ROOT_POS_OFFSET:ROOT_POS_OFFSET + 3] -
+       start[:, ROOT_POS_OFFSET:ROOT_POS_OFFSET + 3]) / duration[:, None],
+      angular_velocity(ROOT_ORN_OFFSET)
+  ]
+  offset = JOINTS_OFFSET
+  for dofs in joint_dofs:
+    if dofs == 4:
+      columns.append(angular_velocity(offset))
+    else:
+      columns.append(
+          (end[:, offset:offset + 1] - start[:, offset:offset + 1]) /
+          duration[:, None])
+    offset += dofs
+  velocities = np.zeros((len(frames), sum(column.shape[1]
+                                          for column in columns)))
+  velocities[:-1] = np.concatenate(columns, axis=1)
+  return velocities
+
 
 class MotionCaptureData(object):
-  def __init__(self):
+  """A motion clip, as a float array of frames and their velocities.
+
+  Loading a clip parses its JSON file, normalizes the quaternions and computes
+  the velocities between the frames once, then stores the arrays in a cache
+  directory, keyed by the hash of the file. Later loads of the same file, by
+  any process, memory map the cached arrays, so processes share their pages.
+  """
+
+  def __init__(self, joint_dofs=HUMANOID_JOINT_DOFS):
+    self._joint_dofs = tuple(joint_dofs)
     self.Reset()
 
   def Reset(self):
     self._motion_data = []
+    self._frame_velocities = None
+
+  def Load(self, path, cache_dir=DEFAULT_CACHE_DIR):
+    """Loads a motion clip.
 
-  def Load(self, path):
-    with open(path, 'r') as f:
-      self._motion_data = json.load(f)
+    Args:
+      path: The path of the JSON motion file.
+      cache_dir: The directory of the cached arrays. None disables the cache.
+    """
+    with open(path, 'rb') as f:
+      contents = f.read()
+    cache_path = None
+    if cache_dir is not None:
+      key = hashlib.sha1(contents)
+      key.update(repr((_CACHE_FORMAT_VERSION, self._joint_dofs)).encode())
+      cache_path = os.path.join(cache_dir, key.hexdigest())
+      if self._LoadCache(cache_path):
+        return
+
+    motion_data = json.loads(contents.decode('utf-8'))
+    frames = np.array(motion_data['Frames'], dtype=np.float64)
+    for offset in frame_quaternion_offsets(self._joint_dofs):
+      frames[:, offset:offset + 4] = quaternion_utils.normalize(
+          frames[:, offset:offset + 4])
+    motion_data['Frames'] = frames
+    self._motion_data = motion_data
+    self._frame_velocities = compute_frame_velocities(frames, self._joint_dofs)
+    if cache_path is not None:
+      self._SaveCache(cache_path)
+
+  def _LoadCache(self, cache_path):
+    try:
+      with open(os.path.join(cache_path, _INFO_FILE), 'r') as f:
+        info = json.load(f)
+      frames = np.load(os.path.join(cache_path, _FRAMES_FILE), mmap_mode='r')
+      velocities = np.load(
+          os.path.join(cache_path, _VELOCITIES_FILE), mmap_mode='r')
+    except (IOError, OSError, ValueError):
+      return False
+    # Plain ndarray views of the maps, indexing a np.memmap is slower.
+    info['Frames'] = np.asarray(frames)
+    self._motion_data = info
+    self._frame_velocities = np.asarray(velocities)
+    return True
+
+  def _SaveCache(self, cache_path):
+    """Writes the cache entry, ignoring failures such as read-only disks."""
+    info = {
+        key: value
+        for key, value in self._motion_data.items()
+        if key != 'Frames'
+    }
+    try:
+      cache_dir = os.path.dirname(cache_path)
+      if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+      # Write to a private directory and rename it, so that concurrent loads
+      # never see a partial entry.
+      tmp_path = tempfile.mkdtemp(dir=cache_dir)
+    except (IOError, OSError):
+      return
+    try:
+      np.save(os.path.join(tmp_path, _FRAMES_FILE), self._motion_data['Frames'])
+      np.save(os.path.join(tmp_path, _VELOCITIES_FILE), self._frame_velocities)
+      with open(os.path.join(tmp_path, _INFO_FILE), 'w') as f:
+        json.dump(info, f)
+      os.rename(tmp_path, cache_path)
+    except (IOError, OSError):
+      # Another process may have written the same entry first.
+      shutil.rmtree(tmp_path, ignore_errors=True)
 
   def NumFrames(self):
     return  len(self._motion_data['Frames'])
 
   def KeyFrameDuration(self):
   	return self._motion_data['Frames'][0][0]  # assuming dt stays constant
+
+  def Frames(self):
+    """Returns the frames, one row per key frame, with unit quaternions."""
+    return self._motion_data['Frames']
+
+  def FrameVelocities(self):
+    """Returns the velocities from each frame to the next one.
+
+    See compute_frame_velocities for the layout of a row.
+    """
+    return self._frame_velocities
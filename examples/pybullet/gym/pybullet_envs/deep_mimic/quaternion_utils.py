@@ -0,0 +1,145 @@
+"""Quaternion math on numpy arrays, in the (x, y, z, w) order of pybullet.
+
+All functions broadcast over the leading axes, the last axis holds the
+quaternion (or vector) components.
+"""
+import numpy as np
+
+# The index permutations of a cross product.
+_CROSS_FIRST = [1, 2, 0]
+_CROSS_SECOND = [2, 0, 1]
+
+# The bound on the dot product below which slerp interpolates, bullet's
+# 1 - SIMD_EPSILON in single precision.
+_SLERP_THRESHOLD = 1 - np.finfo(np.float32).eps
+
+
+def normalize(q):
+  """Returns the unit quaternions of q, quaternions of zero length unchanged."""
+  q = np.asarray(q, dtype=np.float64)
+  length = np.linalg.norm(q, axis=-1, keepdims=True)
+  return q / np.where(length > 0, length, 1)
+
+
+def conjugate(q):
+  """Returns the conjugates, which are the inverses of unit quaternions."""
+  q = np.asarray(q, dtype=np.float64)
+  return np.concatenate([-q[..., :3], q[..., 3:]], axis=-1)
+
+
+def cross(a, b):
+  """Returns the cross products of the 3 vectors, faster than np.cross."""
+  a = np.asarray(a, dtype=np.float64)
+  b = np.asarray(b, dtype=np.float64)
+  return (a[..., _CROSS_FIRST] * b[..., _CROSS_SECOND] -
+          a[..., _CROSS_SECOND] * b[..., _CROSS_FIRST])
+
+
+def multiply(q1, q2):
+  """Returns the Hamilton products q1 * q2, q2 is applied first."""
+  q1 = np.asarray(q1, dtype=np.float64)
+  q2 = np.asarray(q2, dtype=np.float64)
+  u1 = q1[..., :3]
+  u2 = q2[..., :3]
+  w1 = q1[..., 3:]
+  w2 = q2[..., 3:]
+  return np.concatenate(
+      [w1 * u2 + w2 * u1 + cross(u1, u2), w1 * w2 - (u1 * u2).sum(
+          axis=-1, keepdims=True)],
+      axis=-1)
+
+
+def rotate(q, v):
+  """Rotates the vectors v by the unit quaternions q."""
+  q = np.asarray(q, dtype=np.float64)
+  # v + 2 w (u x v) + 2 u x (u x v), with u the vector part of q.
+  u = q[..., :3]
+  uv = cross(u, v)
+  return v + 2 * (q[..., 3:] * uv + cross(u, uv))
+
+
+def to_matrix(q):
+  """Returns the rotation matrices of the unit quaternions q."""
+  q = np.asarray(q, dtype=np.float64)
+  x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+  return np.stack([
+      1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w),
+      2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w),
+      2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)
+  ], axis=-1).reshape(q.shape[:-1] + (3, 3))
+
+
+def from_matrix(m):
+  """Returns unit quaternions of the rotation matrices m, up to sign."""
+  m = np.asarray(m, dtype=np.float64)
+  m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+  m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+  m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+  # Each row is proportional to the quaternion, the one with the largest
+  # pivot, on the diagonal, is the best conditioned.
+  candidates = np.stack([
+      np.stack([1 + m00 - m11 - m22, m01 + m10, m02 + m20, m21 - m12], -1),
+      np.stack([m01 + m10, 1 - m00 + m11 - m22, m12 + m21, m02 - m20], -1),
+      np.stack([m02 + m20, m12 + m21, 1 - m00 - m11 + m22, m10 - m01], -1),
+      np.stack([m21 - m12, m02 - m20, m10 - m01, 1 + m00 + m11 + m22], -1),
+  ], axis=-2)
+  pivots = np.argmax(np.diagonal(candidates, axis1=-2, axis2=-1), axis=-1)
+  q = np.take_along_axis(candidates, pivots[..., None, None], axis=-2)
+  return normalize(q[..., 0, :])
+
+
+def angular_velocity(q_start, q_end, duration):
+  """Computes the constant angular velocity that rotates q_start into q_end.
+
+  This is the vectorized equivalent of the axis angle of
+  pybullet.getDifferenceQuaternion(q_start, q_end) divided by the duration.
+
+  Args:
+    q_start: The unit quaternions at the start.
+    q_end: The unit quaternions at the end.
+    duration: The time it takes to rotate, broadcast against the quaternions
+      without their last axis.
+
+  Returns:
+    The angular velocities in the world frame, the last axis has length 3.
+  """
+  q_start = np.asarray(q_start, dtype=np.float64)
+  q_end = np.asarray(q_end, dtype=np.float64)
+  # Rotate along the shortest arc.
+  q_end = np.where(
+      np.sum(q_start * q_end, axis=-1, keepdims=True) < 0, -q_end, q_end)
+  difference = multiply(q_end, conjugate(q_start))
+  sin_half_angle = np.linalg.norm(difference[..., :3], axis=-1, keepdims=True)
+  angle = 2 * np.arctan2(sin_half_angle, difference[..., 3:])
+  axis = difference[..., :3] / np.where(sin_half_angle > 0, sin_half_angle, 1)
+  return axis * angle / np.expand_dims(duration, -1)
+
+
+def slerp(q_start, q_end, fraction):
+  """Interpolates spherically between unit quaternions.
+
+  This is the vectorized equivalent of pybullet.getQuaternionSlerp, including
+  its handling of nearly equal and of opposite quaternions.
+
+  Args:
+    q_start: The unit quaternions at fraction 0.
+    q_end: The unit quaternions at fraction 1.
+    fraction: The interpolation fractions, broadcast against the quaternions
+      without their last axis.
+
+  Returns:
+    The interpolated quaternions.
+  """
+  q_start = np.asarray(q_start, dtype=np.float64)
+  q_end = np.asarray(q_end, dtype=np.float64)
+  fraction = np.asarray(fraction)[..., None]
+  product = (q_start * q_end).sum(axis=-1)[..., None]
+  abs_product = np.abs(product)
+  # Nearly equal quaternions keep the start, like bullet does.
+  interpolate = abs_product < _SLERP_THRESHOLD
+  theta = np.arccos(np.minimum(abs_product, 1))
+  sin_theta = np.where(interpolate, np.sin(theta), 1)
+  start_weight = np.sin((1 - fraction) * theta) / sin_theta
+  end_weight = np.copysign(np.sin(fraction * theta) / sin_theta, product)
+  return np.where(interpolate, start_weight * q_start + end_weight * q_end,
+                  q_start)
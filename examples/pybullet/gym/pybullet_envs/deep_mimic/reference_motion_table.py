@@ -0,0 +1,131 @@
+"""Reference poses of a motion clip, precomputed on a fixed time grid.
+
+With a fixed control time step the reference motion an env follows is fully
+determined by its start sample, so the interpolation can be done once per
+sample instead of once per step and per env.
+"""
+import numpy as np
+
+from pybullet_envs.deep_mimic.humanoid import HumanoidPose
+
+_DEFAULT_MAX_BYTES = 16 * 2**20
+# The number of samples computed at once when the table grows.
+_FILL_BLOCK_SIZE = 256
+
+
+class ReferenceMotionTable(object):
+  """The reference pose, velocity and phase of a clip at times k * sampleTime.
+
+  Sample k holds what Humanoid.SetSimTime(k * sampleTime) followed by
+  InitializePoseFromMotionData and GetPhase would compute. Samples are computed
+  in blocks the first time they are needed, and kept as long as the table stays
+  under its memory cap. Later samples are computed on every lookup. The table
+  can be shared by all humanoids that follow the same clip with the same time
+  step.
+  """
+
+  def __init__(self, motion_data, timeStep, numSubsteps=1,
+               maxBytes=_DEFAULT_MAX_BYTES):
+    """Constructs an empty table.
+
+    Args:
+      motion_data: The MotionCaptureData of the clip.
+      timeStep: The control time step of the env.
+      numSubsteps: The number of samples per control time step.
+      maxBytes: The cap on the memory of the stored samples.
+    """
+    self._motion_data = motion_data
+    self._numSubsteps = numSubsteps
+    self._sampleTime = float(timeStep) / numSubsteps
+    self._keyFrameDuration = motion_data.KeyFrameDuration()
+    self._cycleTime = self._keyFrameDuration * (motion_data.NumFrames() - 1)
+
+    poseSize = len(HumanoidPose.InterpolateFrames(
+        0, motion_data.Frames()[0], motion_data.Frames()[0],
+        motion_data.FrameVelocities()[0])[0])
+    velocitySize = motion_data.FrameVelocities().shape[1]
+    sampleBytes = (poseSize + velocitySize + 1) * np.dtype(np.float64).itemsize
+    self._capacity = int(maxBytes // sampleBytes)
+    # The stored samples are the first self._numStored rows, the arrays double
+    # in size as they fill up, up to the capacity.
+    self._numStored = 0
+    self._poses = np.empty((0, poseSize))
+    self._velocities = np.empty((0, velocitySize))
+    self._phases = np.empty(0)
+
+  @property
+  def sampleTime(self):
+    return self._sampleTime
+
+  @property
+  def numSubsteps(self):
+    return self._numSubsteps
+
+  @property
+  def capacity(self):
+    """The number of samples that are stored, later samples are recomputed."""
+    return self._capacity
+
+  def NumCycleSamples(self):
+    """Returns the number of samples in the first cycle of the clip."""
+    return int(np.ceil(self._cycleTime / self._sampleTime))
+
+  def TimeOfSample(self, index):
+    return index * self._sampleTime
+
+  def Lookup(self, index):
+    """Returns the pose vector, velocity vector and phase of a sample.
+
+    See HumanoidPose.InterpolateFrames for the layout of the vectors. Stored
+    samples are returned as read-only views into the table.
+    """
+    if index >= self._numStored and index < self._capacity:
+      self._Fill(index + 1)
+    if index < self._numStored:
+      pose = self._poses[index]
+      velocity = self._velocities[index]
+      pose.flags.writeable = False
+      velocity.flags.writeable = False
+      return pose, velocity, self._phases[index]
+    poses, velocities, phases = self._Compute(np.array([index]))
+    return poses[0], velocities[0], phases[0]
+
+  def _Fill(self, numSamples):
+    """Stores at least numSamples samples, computed in whole blocks."""
+    start = self._numStored
+    stop = min(self._capacity,
+               start + _FILL_BLOCK_SIZE * int(np.ceil(
+                   float(numSamples - start) / _FILL_BLOCK_SIZE)))
+    if stop > len(self._phases):
+      size = min(self._capacity, max(stop, 2 * len(self._phases)))
+      self._poses = self._Resize(self._poses, size)
+      self._velocities = self._Resize(self._velocities, size)
+      self._phases = self._Resize(self._phases, size)
+    (self._poses[start:stop], self._velocities[start:stop],
+     self._phases[start:stop]) = self._Compute(np.arange(start, stop))
+    self._numStored = stop
+
+  def _Resize(self, array, size):
+    resized = np.empty((size,) + array.shape[1:])
+    resized[:self._numStored] = array[:self._numStored]
+    return resized
+
+  def _Compute(self, indices):
+    """Computes samples like Humanoid.SetSimTime and GetPhase, vectorized."""
+    times = indices * self._sampleTime
+    numFrames = self._motion_data.NumFrames()
+    frameTimes = times - np.floor(times / self._cycleTime) * self._cycleTime
+    frameTimes = np.where(frameTimes < 0, frameTimes + self._cycleTime,
+                          frameTimes)
+    frames = (frameTimes / self._keyFrameDuration).astype(int)
+    framesNext = np.where(frames + 1 >= numFrames, frames, frames + 1)
+    fractions = (frameTimes - frames * self._keyFrameDuration) / (
+        self._keyFrameDuration)
+    phases = np.fmod(times / self._cycleTime, 1.0)
+    phases = np.where(phases < 0, phases + 1, phases)
+
+    motionFrames = self._motion_data.Frames()
+    poses, velocities = HumanoidPose.InterpolateFrames(
+        fractions, motionFrames[frames], motionFrames[framesNext],
+        self._motion_data.FrameVelocities()[frames])
+    return poses, velocities, phases
@@ -0,0 +1,306 @@
+"""
+Measures gym-level throughput of the environments registered by pybullet_envs.
+
+For each environment id this reports the reset latency, the number of steps per second with
+random actions and where the time of a step goes:
+
+	action       motor commands and external forces
+	simulation   stepSimulation
+	observation  joint, link and base state queries, camera images and ray casts
+	contacts     contact and closest point queries
+	python       everything else in step(), like the reward, termination and observation math
+
+Throughput is measured on a plain environment. The per-phase breakdown uses a second instance
+of the environment whose pybullet calls are timed, so the timing overhead does not show up in
+the steps per second.
+
+	python envBenchmark.py --output results.json
+	python envBenchmark.py --env Ant --baseline results.json --tolerance 0.1
+
+With --baseline, an environment whose steps per second dropped or whose reset latency grew by
+more than the tolerance is reported as a regression and the exit status is 1.
+"""
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+
+import argparse
+import functools
+import gc
+import json
+import platform
+import re
+import sys
+import time
+import timeit
+
+import gym
+import gym.spaces
+import numpy as np
+import pybullet
+import pybullet_envs
+
+PHASES = {
+	"action": ["setJointMotorControl2", "setJointMotorControlArray", "setJointMotorControlMultiDof",
+		"setJointMotorControlMultiDofArray", "applyExternalForce", "applyExternalTorque"],
+	"simulation": ["stepSimulation"],
+	"observation": ["getJointState", "getJointStates", "getJointStateMultiDof", "getJointStatesMultiDof",
+		"getLinkState", "getLinkStates", "getBasePositionAndOrientation", "getBaseVelocity", "getCameraImage",
+		"rayTest", "rayTestBatch"],
+	"contacts": ["getContactPoints", "getClosestPoints"],
+}
+
+
+class _TimedFunction(object):
+	"A pybullet function that adds its run time to one of the phases of a PhaseTimer"
+
+	def __init__(self, timer, phase, function):
+		self.timer = timer
+		self.phase = phase
+		self.function = function
+
+	def __call__(self, *args, **kwargs):
+		start = timeit.default_timer()
+		try:
+			return self.function(*args, **kwargs)
+		finally:
+			self.timer.seconds[self.phase] += timeit.default_timer() - start
+
+
+class PhaseTimer(object):
+	"""
+	Times the pybullet calls of each phase while installed.
+
+	The functions in the pybullet module are replaced by timed ones, which covers the code that
+	calls pybullet directly. The BulletClient classes only pass the client id to builtin functions,
+	so their __getattr__ is wrapped to bind the timed functions to the client. Only clients created
+	while the timer is installed are timed, since older ones cached the untimed functions.
+	"""
+
+	def __init__(self):
+		self.seconds = dict((phase, 0.) for phase in PHASES)
+		self._functions = {}
+		self._getattrs = {}
+
+	def _client_classes(self):
+		from pybullet_utils import bullet_client
+		from pybullet_envs.bullet import bullet_client as bullet_bullet_client
+		from pybullet_envs.minitaur.envs import bullet_client as minitaur_bullet_client
+		return [bullet_client.BulletClient, bullet_bullet_client.BulletClient, minitaur_bullet_client.BulletClient]
+
+	def install(self):
+		for phase, names in PHASES.items():
+			for name in names:
+				if hasattr(pybullet, name):
+					self._functions[name] = getattr(pybullet, name)
+					setattr(pybullet, name, _TimedFunction(self, phase, self._functions[name]))
+		for cls in self._client_classes():
+			self._getattrs[cls] = cls.__getattr__
+			cls.__getattr__ = self._client_getattr(cls.__getattr__)
+
+	def uninstall(self):
+		for name, function in self._functions.items():
+			setattr(pybullet, name, function)
+		for cls, getattr_ in self._getattrs.items():
+			cls.__getattr__ = getattr_
+		self._functions = {}
+		self._getattrs = {}
+
+	def _client_getattr(self, getattr_):
+		def __getattr__(client, name):
+			attribute = getattr_(client, name)
+			if isinstance(attribute, _TimedFunction):
+				attribute = _TimedFunction(self, attribute.phase,
+					functools.partial(attribute.function, physicsClientId=client._client))
+				setattr(client, name, attribute)
+			return attribute
+		return __getattr__
+
+	def reset(self):
+		for phase in self.seconds:
+			self.seconds[phase] = 0.
+
+
+def registered_env_ids():
+	return sorted(spec.id for spec in gym.envs.registry.all() if str(spec._entry_point).startswith("pybullet_envs"))
+
+
+def make_env(env_id):
+	"gym.make, but environments that open a GUI by default are made headless"
+	spec = gym.spec(env_id)
+	parameters = inspect.signature(gym.envs.registration.load(spec._entry_point).__init__).parameters
+	kwargs = spec._kwargs
+	spec._kwargs = dict(kwargs, **dict((name, False) for name in ("render", "renders") if name in parameters))
+	try:
+		return gym.make(env_id)
+	finally:
+		spec._kwargs = kwargs
+
+
+def with_env(env_id, measure, *args):
+	"""
+	Calls measure(env, *args) on a new env and closes it. A BulletClient disconnects its client
+	id when it is deleted, so the env is collected right away, before a later env can get the same
+	id.
+	"""
+	env = make_env(env_id)
+	try:
+		return measure(env, *args)
+	finally:
+		env.close()
+		del env
+		gc.collect()
+
+
+def seed_env(env, seed):
+	env.seed(seed)
+	if hasattr(env.action_space, "seed"):
+		env.action_space.seed(seed)
+	else:
+		gym.spaces.prng.seed(seed)
+
+
+def run_steps(env, num_steps, timer=None):
+	"""
+	Steps env with random actions, resetting it whenever an episode ends. Returns the seconds
+	spent in step() and, with a timer, the seconds spent in each phase. Resets are not counted.
+	"""
+	step_seconds = 0.
+	if timer is not None:
+		timer.reset()
+	phase_seconds = dict((phase, 0.) for phase in PHASES)
+	for i in range(num_steps):
+		action = env.action_space.sample()
+		start = timeit.default_timer()
+		_, _, done, _ = env.step(action)
+		step_seconds += timeit.default_timer() - start
+		if timer is not None:
+			phase_seconds = dict(timer.seconds)
+		if done:
+			env.reset()
+			if timer is not None:
+				timer.seconds = dict(phase_seconds)
+	return step_seconds, phase_seconds
+
+
+def measure_throughput(env, args):
+	result = {}
+	seed_env(env, args.seed)
+	start = timeit.default_timer()
+	env.reset()
+	result["first_reset_ms"] = 1000 * (timeit.default_timer() - start)
+	reset_seconds = []
+	for i in range(args.resets):
+		start = timeit.default_timer()
+		env.reset()
+		reset_seconds.append(timeit.default_timer() - start)
+	result["reset_ms"] = 1000 * float(np.median(reset_seconds)) if reset_seconds else None
+
+	run_steps(env, args.warmup)
+	step_seconds, _ = run_steps(env, args.steps)
+	result["steps_per_sec"] = args.steps / step_seconds
+	result["step_ms"] = 1000 * step_seconds / args.steps
+	return result
+
+
+def measure_phases(env, args, timer):
+	"Milliseconds per step spent in each phase, the env has to be made while the timer is installed"
+	seed_env(env, args.seed)
+	env.reset()
+	run_steps(env, args.warmup)
+	step_seconds, phase_seconds = run_steps(env, args.steps, timer)
+	phases = dict((phase, 1000 * seconds / args.steps) for phase, seconds in phase_seconds.items())
+	phases["python"] = 1000 * (step_seconds - sum(phase_seconds.values())) / args.steps
+	return phases
+
+
+def benchmark_env(env_id, args):
+	start = timeit.default_timer()
+	result = with_env(env_id, measure_throughput, args)
+	result["total_s"] = timeit.default_timer() - start
+	if args.phases:
+		timer = PhaseTimer()
+		timer.install()
+		try:
+			result["phases_ms"] = with_env(env_id, measure_phases, args, timer)
+		finally:
+			timer.uninstall()
+	return result
+
+
+def compare(results, baseline, tolerance):
+	"Prints the change against the baseline, returns the ids of the environments that regressed"
+	regressions = []
+	print("%-40s %14s %14s %9s %12s %12s %9s" % ("env", "steps/s", "baseline", "change", "reset ms", "baseline",
+		"change"))
+	for env_id in sorted(results):
+		result, base = results[env_id], baseline.get(env_id)
+		if base is None or "error" in result or "error" in base:
+			continue
+		speed = result["steps_per_sec"] / base["steps_per_sec"] - 1
+		regressed = speed < -tolerance
+		line = "%-40s %14.1f %14.1f %+8.1f%%" % (env_id, result["steps_per_sec"], base["steps_per_sec"], 100 * speed)
+		if result.get("reset_ms") and base.get("reset_ms"):
+			latency = result["reset_ms"] / base["reset_ms"] - 1
+			regressed = regressed or latency > tolerance
+			line += " %12.2f %12.2f %+8.1f%%" % (result["reset_ms"], base["reset_ms"], 100 * latency)
+		if regressed:
+			line += "  REGRESSION"
+			regressions.append(env_id)
+		print(line)
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--env', help='regular expression, only benchmark the ids it matches', default='')
+	parser.add_argument('--steps', help='number of timed steps per environment', type=int, default=1000)
+	parser.add_argument('--warmup', help='number of untimed steps before timing', type=int, default=100)
+	parser.add_argument('--resets', help='number of timed resets after the first one', type=int, default=10)
+	parser.add_argument('--seed', help='RNG seed', type=int, default=0)
+	parser.add_argument('--phases', help='measure the per-phase breakdown', type=int, default=1)
+	parser.add_argument('--output', help='write the results to this JSON file', default='')
+	parser.add_argument('--baseline', help='compare against the results in this JSON file', default='')
+	parser.add_argument('--tolerance', help='relative change that counts as a regression', type=float, default=0.1)
+	args = parser.parse_args()
+
+	results = {}
+	for env_id in registered_env_ids():
+		if not re.search(args.env, env_id):
+			continue
+		try:
+			results[env_id] = benchmark_env(env_id, args)
+			print("%-40s %10.1f steps/s  reset %8.2f ms" % (env_id, results[env_id]["steps_per_sec"],
+				results[env_id]["reset_ms"] or results[env_id]["first_reset_ms"]))
+		except Exception as e:
+			results[env_id] = {"error": "%s: %s" % (type(e).__name__, e)}
+			print("%-40s failed: %s" % (env_id, results[env_id]["error"]))
+
+	report = {
+		"meta": {
+			"pybullet_api_version": pybullet.getAPIVersion(),
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"steps": args.steps,
+			"warmup": args.warmup,
+			"resets": args.resets,
+			"seed": args.seed,
+		},
+		"envs": results,
+	}
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+
+	if args.baseline:
+		with open(args.baseline) as f:
+			baseline = json.load(f)["envs"]
+		if compare(results, baseline, args.tolerance):
+			sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,82 @@
+"""
+Measures how fast the PoissonDisc2D sampler of the Minitaur terrain randomizer generates points
+on square grids of growing size.
+
+	python poissonDiscBenchmark.py --sizes 15,100,300,1000 --output results.json
+
+Each size is run --repeats times with consecutive seeds. For each size this prints the
+number of grid cells, the mean number of points and the mean points per second.
+"""
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+
+import argparse
+import json
+import platform
+import time
+import timeit
+
+import numpy as np
+from pybullet_envs.minitaur.envs.env_randomizers import minitaur_terrain_randomizer
+
+
+def benchmark_size(size, args):
+	points = []
+	seconds = []
+	for i in range(args.repeats):
+		sampler = minitaur_terrain_randomizer.PoissonDisc2D(size, size, args.min_radius, args.max_sample_size,
+			np.random.RandomState(args.seed + i))
+		start = timeit.default_timer()
+		points.append(len(sampler.generate()))
+		seconds.append(timeit.default_timer() - start)
+	cell_length = args.min_radius / np.sqrt(2)
+	return {
+		"cells": (int(size / cell_length) + 1)**2,
+		"points": float(np.mean(points)),
+		"seconds": float(np.mean(seconds)),
+		"points_per_sec": sum(points) / sum(seconds),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--sizes', help='comma separated side lengths of the square grids, in meters',
+		default='15,30,100,300')
+	parser.add_argument('--min_radius', help='minimum distance between points', type=float, default=0.7)
+	parser.add_argument('--max_sample_size', help='number of sample points around an active site', type=int,
+		default=30)
+	parser.add_argument('--repeats', help='number of runs per size', type=int, default=3)
+	parser.add_argument('--seed', help='RNG seed of the first run', type=int, default=0)
+	parser.add_argument('--output', help='write the results to this JSON file', default='')
+	args = parser.parse_args()
+
+	results = {}
+	print("%10s %12s %12s %10s %14s" % ("size", "cells", "points", "seconds", "points/s"))
+	for size in [float(size) for size in args.sizes.split(",")]:
+		result = benchmark_size(size, args)
+		results[str(size)] = result
+		print("%10g %12d %12.0f %10.3f %14.0f" % (size, result["cells"], result["points"], result["seconds"],
+			result["points_per_sec"]))
+
+	if args.output:
+		report = {
+			"meta": {
+				"python": platform.python_version(),
+				"platform": platform.platform(),
+				"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+				"min_radius": args.min_radius,
+				"max_sample_size": args.max_sample_size,
+				"repeats": args.repeats,
+				"seed": args.seed,
+			},
+			"sizes": results,
+		}
+		with open(args.output, "w") as f:
+			json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+	main()
@@ -32,8 +32,10 @@ class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
 			self.stadium_scene.ground_plane_mjcf)
 		self.ground_ids = set([(self.parts[f].bodies[self.parts[f].bodyIndex], self.parts[f].bodyPartIndex) for f in
 							   self.foot_ground_object_names])
+		self.ground_ids_array = np.array(sorted(self.ground_ids)).reshape(-1, 2)
+		self.robot.cache_body_states()
 		self._p.configureDebugVisualizer(pybullet.COV_ENABLE_RENDERING,1)
-		if (self.stateId<0):
+		if (self.stateId<0 and self.ownsPhysicsClient):  # a shared world (VecWalkerEnv) is not ours to restore
 			self.stateId=self._p.saveState()
 			#print("saving state self.stateId:",self.stateId)
 
@@ -55,6 +57,7 @@ class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
 	foot_collision_cost  = -1.0	# touches another leg, or other objects, that cost makes robot avoid smashing feet into itself
 	foot_ground_object_names = set(["floor"])  # to distinguish ground and other objects
 	joints_at_limit_cost = -0.1	# discourage stuck joints
+	use_feet_contact = True  # set to False to skip the contact query, feet_contact then stays zero
 
 	def step(self, a):
 		if not self.scene.multiplayer:  # if multiplayer, action first applied to all robots, then global step() called, then _step() for all robots with the same actions
@@ -74,15 +77,10 @@ class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
 		progress = float(self.potential - potential_old)
 
 		feet_collision_cost = 0.0
-		for i,f in enumerate(self.robot.feet): # TODO: Maybe calculating feet contacts could be done within the robot code
-			contact_ids = set((x[2], x[4]) for x in f.contact_list())
-			#print("CONTACT OF '%d' WITH %d" % (contact_ids, ",".join(contact_names)) )
-			if (self.ground_ids & contact_ids):
-                        	#see Issue 63: https://github.com/openai/roboschool/issues/63
-				#feet_collision_cost += self.foot_collision_cost
-				self.robot.feet_contact[i] = 1.0
-			else:
-				self.robot.feet_contact[i] = 0.0
+		if self.use_feet_contact:
+			#see Issue 63: https://github.com/openai/roboschool/issues/63
+			#feet_collision_cost += self.foot_collision_cost
+			self.robot.calc_feet_contact(self.ground_ids_array)
 
 
 		electricity_cost  = self.electricity_cost  * float(np.abs(a*self.robot.joint_speeds).mean())  # let's assume we have DC motor with controller, and reverse current braking
@@ -148,8 +146,8 @@ class AntBulletEnv(WalkerBaseBulletEnv):
 		WalkerBaseBulletEnv.__init__(self, self.robot, render)
 
 class HumanoidBulletEnv(WalkerBaseBulletEnv):
-	def __init__(self, robot=Humanoid(), render=False):
-		self.robot = robot
+	def __init__(self, robot=None, render=False):
+		self.robot = robot if robot is not None else Humanoid()
 		WalkerBaseBulletEnv.__init__(self, self.robot, render)
 		self.electricity_cost  = 4.25*WalkerBaseBulletEnv.electricity_cost
 		self.stall_torque_cost = 4.25*WalkerBaseBulletEnv.stall_torque_cost
@@ -38,7 +38,11 @@ class BulletClient(object):
       pass
 
   def __getattr__(self, name):
-    """Inject the client id into Bullet functions."""
+    """Inject the client id into Bullet functions.
+
+    The resolved attribute is cached on the instance, so `__getattr__` only
+    runs on the first access of each name.
+    """
     attribute = getattr(pybullet, name)
     if inspect.isbuiltin(attribute):
       if name not in [
@@ -47,4 +51,5 @@ class BulletClient(object):
           "computeProjectionMatrixFOV", "getQuaternionFromEuler",
       ]:  # A temporary hack for now.
         attribute = functools.partial(attribute, physicsClientId=self._client)
+    setattr(self, name, attribute)
     return attribute
@@ -1,6 +1,4 @@
 """Randomize the minitaur_gym_env when reset() is called."""
-import random
-
 import os,  inspect
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(os.path.dirname(currentdir))
@@ -45,31 +43,27 @@ class MinitaurEnvRandomizer(env_randomizer_base.EnvRandomizerBase):
     Args:
       minitaur: the Minitaur instance in minitaur_gym_env environment.
     """
-    base_mass = minitaur.GetBaseMassesFromURDF()
-    randomized_base_mass = random.uniform(
-        np.array(base_mass) * (1.0 + self._minitaur_base_mass_err_range[0]),
-        np.array(base_mass) * (1.0 + self._minitaur_base_mass_err_range[1]))
-    minitaur.SetBaseMasses(randomized_base_mass)
-
-    leg_masses = minitaur.GetLegMassesFromURDF()
-    leg_masses_lower_bound = np.array(leg_masses) * (
-        1.0 + self._minitaur_leg_mass_err_range[0])
-    leg_masses_upper_bound = np.array(leg_masses) * (
-        1.0 + self._minitaur_leg_mass_err_range[1])
-    randomized_leg_masses = [
-        np.random.uniform(leg_masses_lower_bound[i], leg_masses_upper_bound[i])
-        for i in xrange(len(leg_masses))
+    base_mass = np.array(minitaur.GetBaseMassesFromURDF())
+    leg_masses = np.array(minitaur.GetLegMassesFromURDF())
+    # All the links of the base share one ratio, each leg link has its own.
+    lower_bound = [
+        1.0 + self._minitaur_base_mass_err_range[0], BATTERY_VOLTAGE_RANGE[0],
+        MOTOR_VISCOUS_DAMPING_RANGE[0], MINITAUR_LEG_FRICTION[0]
+    ]
+    upper_bound = [
+        1.0 + self._minitaur_base_mass_err_range[1], BATTERY_VOLTAGE_RANGE[1],
+        MOTOR_VISCOUS_DAMPING_RANGE[1], MINITAUR_LEG_FRICTION[1]
     ]
-    minitaur.SetLegMasses(randomized_leg_masses)
+    (base_mass_ratio, randomized_battery_voltage, randomized_motor_damping,
+     randomized_foot_friction) = np.random.uniform(lower_bound, upper_bound)
+    randomized_base_mass = base_mass_ratio * base_mass
+    randomized_leg_masses = np.random.uniform(
+        leg_masses * (1.0 + self._minitaur_leg_mass_err_range[0]),
+        leg_masses * (1.0 + self._minitaur_leg_mass_err_range[1]))
 
-    randomized_battery_voltage = random.uniform(BATTERY_VOLTAGE_RANGE[0],
-                                                BATTERY_VOLTAGE_RANGE[1])
+    with minitaur.BatchDynamicsChanges():
+      minitaur.SetBaseMasses(randomized_base_mass)
+      minitaur.SetLegMasses(randomized_leg_masses)
+      minitaur.SetFootFriction(randomized_foot_friction)
     minitaur.SetBatteryVoltage(randomized_battery_voltage)
-
-    randomized_motor_damping = random.uniform(MOTOR_VISCOUS_DAMPING_RANGE[0],
-                                              MOTOR_VISCOUS_DAMPING_RANGE[1])
     minitaur.SetMotorViscousDamping(randomized_motor_damping)
-
-    randomized_foot_friction = random.uniform(MINITAUR_LEG_FRICTION[0],
-                                              MINITAUR_LEG_FRICTION[1])
-    minitaur.SetFootFriction(randomized_foot_friction)
@@ -39,15 +39,18 @@ class MinitaurEnvRandomizerFromConfig(env_randomizer_base.EnvRandomizerBase):
     """Randomize various physical properties of the environment.
 
     It randomizes the physical parameters according to the input configuration.
+    The changes of the link dynamics are applied together once all parameters
+    are sampled.
 
     Args:
       env: A minitaur gym environment.
     """
     self._randomization_function_dict = self._build_randomization_function_dict(
         env)
-    for param_name, random_range in self._randomization_param_dict.iteritems():
-      self._randomization_function_dict[param_name](
-          lower_bound=random_range[0], upper_bound=random_range[1])
+    with env.minitaur.BatchDynamicsChanges():
+      for param_name, random_range in self._randomization_param_dict.items():
+        self._randomization_function_dict[param_name](
+            lower_bound=random_range[0], upper_bound=random_range[1])
 
   def _build_randomization_function_dict(self, env):
     func_dict = {}
@@ -10,7 +10,6 @@ parentdir = os.path.dirname(os.path.dirname(currentdir))
 parentdir = os.path.dirname(os.path.dirname(parentdir))
 os.sys.path.insert(0,parentdir)
 
-import itertools
 import math
 import enum
 import numpy as np
@@ -25,6 +24,9 @@ _MAX_BLOCK_LENGTH = _MIN_BLOCK_DISTANCE
 _MIN_BLOCK_LENGTH = _MAX_BLOCK_LENGTH / 2
 _MAX_BLOCK_HEIGHT = 0.05
 _MIN_BLOCK_HEIGHT = _MAX_BLOCK_HEIGHT / 2
+# The user data key that marks the terrain body added by the randomizer.
+_TERRAIN_USER_DATA_KEY = "minitaur_terrain"
+_MESH_TERRAIN_KEY = "mesh"
 
 
 class PoissonDisc2D(object):
@@ -35,9 +37,18 @@ class PoissonDisc2D(object):
   Unlike the uniform sampling method that creates small clusters of points,
   Poisson disk method enforces the minimum distance between points and is more
   suitable for generating a spatial distribution of non-overlapping objects.
+
+  The grid is a numpy array, and all the sample points around an active site
+  are tested against it at once, which makes grids of millions of cells (e.g.
+  kilometer scale terrains) practical.
   """
 
-  def __init__(self, grid_length, grid_width, min_radius, max_sample_size):
+  def __init__(self,
+               grid_length,
+               grid_width,
+               min_radius,
+               max_sample_size,
+               random_state=None):
     """Initializes the algorithm.
 
     Args:
@@ -48,7 +59,10 @@ class PoissonDisc2D(object):
       min_radius: The minimum distance between any pair of points.
       max_sample_size: The maximum number of sample points around a active site.
         See details in the algorithm description.
+      random_state: The np.random.RandomState the points are drawn from. The
+        global numpy random state is used if it is None.
     """
+    self._random_state = np.random if random_state is None else random_state
     self._cell_length = min_radius / math.sqrt(2)
     self._grid_length = grid_length
     self._grid_width = grid_width
@@ -57,128 +71,96 @@ class PoissonDisc2D(object):
     self._min_radius = min_radius
     self._max_sample_size = max_sample_size
 
-    # Flattern the 2D grid as an 1D array. The grid is used for fast nearest
-    # point searching.
-    self._grid = [None] * self._grid_size_x * self._grid_size_y
+    # The grid is used for fast nearest point searching. It is flattened as 1D
+    # arrays of the x and y coordinates of the point in each cell, NaN for the
+    # empty cells. The grid has a border of empty cells, so that the neighbors
+    # of every cell are in the arrays.
+    self._row_size = self._grid_size_x + 2
+    grid_size = self._row_size * (self._grid_size_y + 2)
+    self._grid_x = np.full(grid_size, np.nan)
+    self._grid_y = np.full(grid_size, np.nan)
+    # The offsets of a cell and its 8 neighbors in the flattened grid.
+    self._neighbor_offsets = (np.arange(-1, 2) +
+                              self._row_size * np.arange(-1, 2)[:, np.newaxis]
+                             ).ravel()
+    self._neighbor_offset_set = frozenset(self._neighbor_offsets.tolist())
+    self._sample_low = np.array([min_radius, 0])
+    self._sample_range = np.array([2 * min_radius, 2 * math.pi]) - (
+        self._sample_low)
 
     # Generate the first sample point and set it as an active site.
     first_sample = np.array(
-        np.random.random_sample(2)) * [grid_length, grid_width]
-    self._active_list = [first_sample]
+        self._random_state.random_sample(2)) * [grid_length, grid_width]
+    self._active_list = [tuple(first_sample)]
 
     # Also store the sample point in the grid.
-    self._grid[self._point_to_index_1d(first_sample)] = first_sample
-
-  def _point_to_index_1d(self, point):
-    """Computes the index of a point in the grid array.
-
-    Args:
-      point: A 2D point described by its coordinates (x, y).
-
-    Returns:
-      The index of the point within the self._grid array.
-    """
-    return self._index_2d_to_1d(self._point_to_index_2d(point))
-
-  def _point_to_index_2d(self, point):
-    """Computes the 2D index (aka cell ID) of a point in the grid.
-
-    Args:
-      point: A 2D point (list) described by its coordinates (x, y).
-
-    Returns:
-      x_index: The x index of the cell the point belongs to.
-      y_index: The y index of the cell the point belongs to.
-    """
-    x_index = int(point[0] / self._cell_length)
-    y_index = int(point[1] / self._cell_length)
-    return x_index, y_index
-
-  def _index_2d_to_1d(self, index2d):
-    """Converts the 2D index to the 1D position in the grid array.
-
-    Args:
-      index2d: The 2D index of a point (aka the cell ID) in the grid.
-
-    Returns:
-      The 1D position of the cell within the self._grid array.
-    """
-    return index2d[0] + index2d[1] * self._grid_size_x
-
-  def _is_in_grid(self, point):
-    """Checks if the point is inside the grid boundary.
-
-    Args:
-      point: A 2D point (list) described by its coordinates (x, y).
-
-    Returns:
-      Whether the point is inside the grid.
-    """
-    return (0 <= point[0] < self._grid_length) and (0 <= point[1] <
-                                                    self._grid_width)
-
-  def _is_in_range(self, index2d):
-    """Checks if the cell ID is within the grid.
-
-    Args:
-      index2d: The 2D index of a point (aka the cell ID) in the grid.
-
-    Returns:
-      Whether the cell (2D index) is inside the grid.
-    """
-
-    return (0 <= index2d[0] < self._grid_size_x) and (0 <= index2d[1] <
-                                                      self._grid_size_y)
+    index = self._point_to_index_1d(first_sample[0], first_sample[1])
+    self._grid_x[index], self._grid_y[index] = first_sample
 
-  def _is_close_to_existing_points(self, point):
-    """Checks if the point is close to any already sampled (and stored) points.
+  def _point_to_index_1d(self, x, y):
+    """Computes the indices of points in the flattened grid arrays.
 
     Args:
-      point: A 2D point (list) described by its coordinates (x, y).
+      x: The x coordinates of the points.
+      y: The y coordinates of the points.
 
     Returns:
-      True iff the distance of the point to any existing points is smaller than
-      the min_radius
+      The indices of the cells the points belong to.
     """
-    px, py = self._point_to_index_2d(point)
-    # Now we can check nearby cells for existing points
-    for neighbor_cell in itertools.product(
-        xrange(px - 1, px + 2), xrange(py - 1, py + 2)):
-
-      if not self._is_in_range(neighbor_cell):
-        continue
-
-      maybe_a_point = self._grid[self._index_2d_to_1d(neighbor_cell)]
-      if maybe_a_point is not None and np.linalg.norm(
-          maybe_a_point - point) < self._min_radius:
-        return True
-
-    return False
+    x_index = (x / self._cell_length).astype(int)
+    y_index = (y / self._cell_length).astype(int)
+    return (y_index + 1) * self._row_size + x_index + 1
 
   def sample(self):
     """Samples new points around some existing point.
 
-    Removes the sampling base point and also stores the new jksampled points if
+    Removes the sampling base point and also stores the new sampled points if
     they are far enough from all existing points.
     """
     active_point = self._active_list.pop()
-    for _ in xrange(self._max_sample_size):
-      # Generate random points near the current active_point between the radius
-      random_radius = np.random.uniform(self._min_radius, 2 * self._min_radius)
-      random_angle = np.random.uniform(0, 2 * math.pi)
-
-      # The sampled 2D points near the active point
-      sample = random_radius * np.array(
-          [np.cos(random_angle), np.sin(random_angle)]) + active_point
-
-      if not self._is_in_grid(sample):
+    # Generate random points near the current active_point between the radius.
+    # The radius and the angle of each point are drawn in turn, like uniform()
+    # would, without its broadcasting overhead.
+    random_values = self._sample_low + self._sample_range * (
+        self._random_state.random_sample((self._max_sample_size, 2)))
+    random_radius = random_values[:, 0]
+    random_angle = random_values[:, 1]
+
+    # The sampled 2D points near the active point
+    x = random_radius * np.cos(random_angle) + active_point[0]
+    y = random_radius * np.sin(random_angle) + active_point[1]
+    in_grid = ((0 <= x) & (x < self._grid_length) & (0 <= y) &
+               (y < self._grid_width))
+    x = x[in_grid]
+    y = y[in_grid]
+    if not len(x):
+      return
+
+    # Check the cell of each point and its neighbors for existing points.
+    indices = self._point_to_index_1d(x, y)
+    neighbors = indices[:, np.newaxis] + self._neighbor_offsets
+    delta_x = self._grid_x[neighbors] - x[:, np.newaxis]
+    delta_y = self._grid_y[neighbors] - y[:, np.newaxis]
+    is_close = np.sqrt(delta_x * delta_x + delta_y * delta_y) < self._min_radius
+    is_far = ~is_close.any(axis=1)
+    if not is_far.any():
+      return
+
+    # The points that are left are few. They are stored in order, as long as
+    # they are far enough from the ones stored before them.
+    stored = []
+    for index, sample_x, sample_y in zip(indices[is_far].tolist(),
+                                         x[is_far].tolist(),
+                                         y[is_far].tolist()):
+      if any(index - other_index in self._neighbor_offset_set and
+             math.sqrt((other_x - sample_x)**2 +
+                       (other_y - sample_y)**2) < self._min_radius
+             for other_index, other_x, other_y in stored):
         continue
-
-      if self._is_close_to_existing_points(sample):
-        continue
-
-      self._active_list.append(sample)
-      self._grid[self._point_to_index_1d(sample)] = sample
+      stored.append((index, sample_x, sample_y))
+      self._active_list.append((sample_x, sample_y))
+      self._grid_x[index] = sample_x
+      self._grid_y[index] = sample_y
 
   def generate(self):
     """Generates the Poisson disc distribution of 2D points.
@@ -197,12 +179,9 @@ class PoissonDisc2D(object):
     while self._active_list:
       self.sample()
 
-    all_sites = []
-    for p in self._grid:
-      if p is not None:
-        all_sites.append(p)
-
-    return all_sites
+    is_stored = ~np.isnan(self._grid_x)
+    return list(np.stack([self._grid_x[is_stored], self._grid_y[is_stored]],
+                         axis=1))
 
 
 class TerrainType(enum.Enum):
@@ -212,14 +191,20 @@ class TerrainType(enum.Enum):
 
 
 class MinitaurTerrainRandomizer(env_randomizer_base.EnvRandomizerBase):
-  """Generates an uneven terrain in the gym env."""
+  """Generates an uneven terrain in the gym env.
+
+  The collision shape of a terrain is created once per physics client and the
+  terrain body is only replaced when the terrain changes, so resets that keep
+  the simulation (see hard_reset of MinitaurGymEnv) do not rebuild it.
+  """
 
   def __init__(
       self,
       terrain_type=TerrainType.TRIANGLE_MESH,
       mesh_filename="robotics/reinforcement_learning/minitaur/envs/testdata/"
       "triangle_mesh_terrain/terrain9735.obj",
-      mesh_scale=None):
+      mesh_scale=None,
+      num_terrains=None):
     """Initializes the randomizer.
 
     Args:
@@ -227,10 +212,20 @@ class MinitaurTerrainRandomizer(env_randomizer_base.EnvRandomizerBase):
       mesh_filename: The mesh file to be used. The mesh will only be loaded if
         terrain_type is set to TerrainType.TRIANGLE_MESH.
       mesh_scale: the scaling factor for the triangles in the mesh file.
+      num_terrains: The number of different random block terrains. Each reset
+        picks one of them by its seed, they are generated once and cached. If
+        None, a new terrain is generated at every reset.
     """
     self._terrain_type = terrain_type
     self._mesh_filename = mesh_filename
     self._mesh_scale = mesh_scale if mesh_scale else [1.0, 1.0, 0.3]
+    self._num_terrains = num_terrains
+    # The generated block terrains, by seed.
+    self._terrain_blocks = {}
+    # The terrain body in the simulation and its key, by physics client id.
+    self._terrain_bodies = {}
+    # The collision shapes of the terrains, by physics client id and key.
+    self._collision_shapes = {}
 
   def randomize_env(self, env):
     """Generate a random terrain for the current env.
@@ -244,6 +239,57 @@ class MinitaurTerrainRandomizer(env_randomizer_base.EnvRandomizerBase):
     if self._terrain_type is TerrainType.RANDOM_BLOCKS:
       self._generate_convex_blocks(env)
 
+  def _current_terrain(self, pybullet_client):
+    """Returns the terrain in the simulation of the client.
+
+    The terrain body is marked with user data. If the mark is gone, the
+    simulation was reset and the collision shapes of the client are gone too.
+
+    Args:
+      pybullet_client: The pybullet client of the env.
+
+    Returns:
+      The body id and the key of the terrain, or None if the simulation has no
+      terrain added by this randomizer.
+    """
+    client_id = pybullet_client._client
+    terrain = self._terrain_bodies.get(client_id)
+    if terrain is not None and pybullet_client.getUserDataId(
+        terrain[0], _TERRAIN_USER_DATA_KEY) < 0:
+      terrain = None
+      del self._terrain_bodies[client_id]
+      for shape_key in list(self._collision_shapes):
+        if shape_key[0] == client_id:
+          del self._collision_shapes[shape_key]
+    return terrain
+
+  def _add_terrain(self, pybullet_client, key, create_collision_shape,
+                   cache_collision_shape=True):
+    """Adds the static terrain body with the collision shape of key.
+
+    Args:
+      pybullet_client: The pybullet client of the env.
+      key: The key of the terrain.
+      create_collision_shape: A function that creates the collision shape of
+        the terrain and returns its id.
+      cache_collision_shape: Whether to keep the collision shape for later
+        resets.
+
+    Returns:
+      The id of the terrain body.
+    """
+    client_id = pybullet_client._client
+    shape_id = self._collision_shapes.get((client_id, key))
+    if shape_id is None:
+      shape_id = create_collision_shape()
+      if cache_collision_shape:
+        self._collision_shapes[(client_id, key)] = shape_id
+    body_id = pybullet_client.createMultiBody(
+        baseMass=0, baseCollisionShapeIndex=shape_id, basePosition=[0, 0, 0])
+    pybullet_client.addUserData(body_id, _TERRAIN_USER_DATA_KEY, str(key))
+    self._terrain_bodies[client_id] = (body_id, key)
+    return body_id
+
   def _load_triangle_mesh(self, env):
     """Represents the random terrain using a triangle mesh.
 
@@ -254,34 +300,43 @@ class MinitaurTerrainRandomizer(env_randomizer_base.EnvRandomizerBase):
     Args:
       env: A minitaur gym environment.
     """
-    env.pybullet_client.removeBody(env.ground_id)
-    terrain_collision_shape_id = env.pybullet_client.createCollisionShape(
-        shapeType=env.pybullet_client.GEOM_MESH,
-        fileName=self._mesh_filename,
-        flags=1,
-        meshScale=self._mesh_scale)
-    env.ground_id = env.pybullet_client.createMultiBody(
-        baseMass=0,
-        baseCollisionShapeIndex=terrain_collision_shape_id,
-        basePosition=[0, 0, 0])
-
-  def _generate_convex_blocks(self, env):
-    """Adds random convex blocks to the flat ground.
+    pybullet_client = env.pybullet_client
+    terrain = self._current_terrain(pybullet_client)
+    if terrain is not None and terrain[0] == env.ground_id:
+      return
+    pybullet_client.removeBody(env.ground_id)
+    env.ground_id = self._add_terrain(
+        pybullet_client, _MESH_TERRAIN_KEY,
+        lambda: pybullet_client.createCollisionShape(
+            shapeType=pybullet_client.GEOM_MESH,
+            fileName=self._mesh_filename,
+            flags=1,
+            meshScale=self._mesh_scale))
+
+  def _generate_blocks(self, random_state=None):
+    """Generates the random blocks of a terrain.
 
     We use the Possion disk algorithm to add some random blocks on the ground.
     Possion disk algorithm sets the minimum distance between two sampling
     points, thus voiding the clustering effect in uniform N-D distribution.
 
     Args:
-      env: A minitaur gym environment.
+      random_state: The np.random.RandomState the terrain is drawn from. The
+        global numpy random state is used if it is None.
 
+    Returns:
+      The (x, y, z) positions of the block centers and the half extents of the
+      blocks, as two arrays of shape (number of blocks, 3).
     """
-
+    if random_state is None:
+      random_state = np.random
     poisson_disc = PoissonDisc2D(_GRID_LENGTH, _GRID_WIDTH, _MIN_BLOCK_DISTANCE,
-                                 _MAX_SAMPLE_SIZE)
+                                 _MAX_SAMPLE_SIZE, random_state)
 
     block_centers = poisson_disc.generate()
 
+    positions = []
+    half_extents = []
     for center in block_centers:
       # We want the blocks to be in front of the robot.
       shifted_center = np.array(center) - [2, _GRID_WIDTH / 2]
@@ -289,13 +344,49 @@ class MinitaurTerrainRandomizer(env_randomizer_base.EnvRandomizerBase):
       # Do not place blocks near the point [0, 0], where the robot will start.
       if abs(shifted_center[0]) < 1.0 and abs(shifted_center[1]) < 1.0:
         continue
-      half_length = np.random.uniform(_MIN_BLOCK_LENGTH, _MAX_BLOCK_LENGTH) / (
-          2 * math.sqrt(2))
-      half_height = np.random.uniform(_MIN_BLOCK_HEIGHT, _MAX_BLOCK_HEIGHT) / 2
-      box_id = env.pybullet_client.createCollisionShape(
-          env.pybullet_client.GEOM_BOX,
-          halfExtents=[half_length, half_length, half_height])
-      env.pybullet_client.createMultiBody(
-          baseMass=0,
-          baseCollisionShapeIndex=box_id,
-          basePosition=[shifted_center[0], shifted_center[1], half_height])
+      half_length = random_state.uniform(_MIN_BLOCK_LENGTH,
+                                         _MAX_BLOCK_LENGTH) / (2 * math.sqrt(2))
+      half_height = random_state.uniform(_MIN_BLOCK_HEIGHT,
+                                         _MAX_BLOCK_HEIGHT) / 2
+      positions.append([shifted_center[0], shifted_center[1], half_height])
+      half_extents.append([half_length, half_length, half_height])
+    return np.reshape(positions, (-1, 3)), np.reshape(half_extents, (-1, 3))
+
+  def _generate_convex_blocks(self, env):
+    """Adds random convex blocks to the flat ground.
+
+    The blocks of a terrain are the children of one compound collision shape,
+    which is added as a single static body.
+
+    Args:
+      env: A minitaur gym environment.
+
+    """
+    if self._num_terrains is None:
+      key = None
+      positions, half_extents = self._generate_blocks()
+    else:
+      key = np.random.randint(self._num_terrains)
+      if key not in self._terrain_blocks:
+        self._terrain_blocks[key] = self._generate_blocks(
+            np.random.RandomState(key))
+      positions, half_extents = self._terrain_blocks[key]
+
+    pybullet_client = env.pybullet_client
+    terrain = self._current_terrain(pybullet_client)
+    if terrain is not None:
+      body_id, current_key = terrain
+      if key is not None and key == current_key:
+        return
+      pybullet_client.removeBody(body_id)
+      del self._terrain_bodies[pybullet_client._client]
+    if not len(positions):
+      return
+    self._add_terrain(
+        pybullet_client,
+        key,
+        lambda: pybullet_client.createCollisionShapeArray(
+            shapeTypes=[pybullet_client.GEOM_BOX] * len(positions),
+            halfExtents=half_extents.tolist(),
+            collisionFramePositions=positions.tolist()),
+        cache_collision_shape=key is not None)
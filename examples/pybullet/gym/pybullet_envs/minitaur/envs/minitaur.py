@@ -8,12 +8,14 @@ parentdir = os.path.dirname(os.path.dirname(currentdir))
 os.sys.path.insert(0,parentdir)
 
 import collections
+import contextlib
 import copy
 import math
 import re
 
 import numpy as np
 from pybullet_envs.minitaur.envs import motor
+from pybullet_utils import joint_motor_array
 
 INIT_POSITION = [0, 0, .2]
 INIT_RACK_POSITION = [0, 0, 1]
@@ -35,6 +37,28 @@ _KNEE_NAME_PATTERN = re.compile(r"knee\D*")
 SENSOR_NOISE_STDDEV = (0.0, 0.0, 0.0, 0.0, 0.0)
 TWO_PI = 2 * math.pi
 
+# The true motor and base states of one simulation sub-step. Motor values are
+# in the motor direction, as returned by the GetTrue* methods.
+_SensorSnapshot = collections.namedtuple("_SensorSnapshot", [
+    "motor_angles", "motor_velocities", "motor_torques", "base_position",
+    "base_orientation", "base_angular_velocity"
+])
+
+# The simulation state saved by Minitaur.SaveResetState(), and the sensor
+# history and observed torques of the robot at that point.
+_ResetState = collections.namedtuple(
+    "_ResetState", ["state_id", "observation_history", "observed_motor_torques"])
+
+# The joint and link ids, masses and inertias read from a loaded URDF. They are
+# the same for every robot loaded the same way, so they are cached for the
+# whole process in _URDF_METADATA_CACHE, see Minitaur._LoadUrdf().
+_UrdfMetadata = collections.namedtuple("_UrdfMetadata", [
+    "joint_name_to_id", "chassis_link_ids", "leg_link_ids", "motor_link_ids",
+    "foot_link_ids", "base_mass_urdf", "leg_masses_urdf", "link_urdf",
+    "base_inertia_urdf", "leg_inertia_urdf"
+])
+_URDF_METADATA_CACHE = {}
+
 
 def MapToMinusPiToPi(angles):
   """Maps a list of angles to [-pi, pi].
@@ -54,6 +78,59 @@ def MapToMinusPiToPi(angles):
   return mapped_angles
 
 
+class ObservationHistory(object):
+  """The latest observations of a robot, in a preallocated ring buffer.
+
+  history[0] is the newest observation and history[n] the one appended n
+  steps before it. The buffer is allocated on the first append(), when the
+  size of an observation is known.
+  """
+
+  def __init__(self, maxlen):
+    self._maxlen = maxlen
+    self._buffer = None
+    self._scratch = None
+    self._newest = -1
+    self._length = 0
+
+  def __len__(self):
+    return self._length
+
+  def __getitem__(self, n_steps_ago):
+    """Returns a view of an observation, valid until it is overwritten."""
+    if n_steps_ago < 0:
+      n_steps_ago += self._length
+    if not 0 <= n_steps_ago < self._length:
+      raise IndexError("Observation history index out of range.")
+    return self._buffer[(self._newest - n_steps_ago) % self._maxlen]
+
+  def clear(self):
+    self._length = 0
+
+  def append(self, observation):
+    if self._buffer is None:
+      self._buffer = np.zeros((self._maxlen, len(observation)))
+      self._scratch = np.zeros(len(observation))
+    self._newest = (self._newest + 1) % self._maxlen
+    self._buffer[self._newest] = observation
+    self._length = min(self._length + 1, self._maxlen)
+
+  def blend(self, n_steps_ago, alpha, out):
+    """Interpolates between two consecutive observations without allocating.
+
+    Args:
+      n_steps_ago: The newer one of the two observations.
+      alpha: The weight of the older observation, n_steps_ago + 1.
+      out: The array that receives the blended observation.
+    Returns:
+      out.
+    """
+    np.multiply(self[n_steps_ago], 1.0 - alpha, out=out)
+    np.multiply(self[n_steps_ago + 1], alpha, out=self._scratch)
+    out += self._scratch
+    return out
+
+
 class Minitaur(object):
   """The minitaur class that simulates a quadruped robot from Ghost Robotics.
 
@@ -129,12 +206,17 @@ class Minitaur(object):
     self._observation_noise_stdev = observation_noise_stdev
     self._accurate_motor_model_enabled = accurate_motor_model_enabled
     self._remove_default_joint_damping = remove_default_joint_damping
-    self._observation_history = collections.deque(maxlen=100)
+    self._observation_history = ObservationHistory(maxlen=100)
     self._control_observation = []
+    self._pd_observation = []
+    self._sensor_snapshot = None
+    self._stepping = False
     self._chassis_link_ids = [-1]
     self._leg_link_ids = []
     self._motor_link_ids = []
     self._foot_link_ids = []
+    self._link_dynamics = {}
+    self._queued_link_dynamics = None
     self._torque_control_enabled = torque_control_enabled
     self._motor_overheat_protection = motor_overheat_protection
     self._on_rack = on_rack
@@ -161,15 +243,52 @@ class Minitaur(object):
     return self._step_counter * self.time_step
 
   def Step(self, action):
-    for _ in range(self._action_repeat):
-      self.ApplyAction(action)
-      self._pybullet_client.stepSimulation()
-      self.ReceiveObservation()
-      self._step_counter += 1
+    # Within the loop each sub-step reuses the sensors read after the previous
+    # one, see _ReadSensors().
+    self._stepping = True
+    try:
+      for _ in range(self._action_repeat):
+        self.ApplyAction(action)
+        self._pybullet_client.stepSimulation()
+        self.ReceiveObservation()
+        self._step_counter += 1
+    finally:
+      self._stepping = False
+      self._sensor_snapshot = None
 
   def Terminate(self):
     pass
 
+  def _LoadUrdf(self, urdf_path, init_position, flags=0):
+    """Loads the robot and its joint and link ids, masses and inertias.
+
+    Only the first robot of the process that is loaded from urdf_path with the
+    same flags reads them from the simulation, later ones copy them from
+    _URDF_METADATA_CACHE.
+
+    Args:
+      urdf_path: The path of the URDF file.
+      init_position: The initial position of the base.
+      flags: The flags passed to loadURDF.
+    """
+    self.quadruped = self._pybullet_client.loadURDF(
+        urdf_path, init_position, useFixedBase=self._on_rack, flags=flags)
+    self._link_dynamics = {}
+    key = (type(self), os.path.abspath(urdf_path), flags, self._on_rack)
+    metadata = _URDF_METADATA_CACHE.get(key)
+    if metadata is None:
+      self._BuildJointNameToIdDict()
+      self._BuildUrdfIds()
+      self._RecordMassInfoFromURDF()
+      self._RecordInertiaInfoFromURDF()
+      metadata = _UrdfMetadata(**dict(
+          (field, copy.deepcopy(getattr(self, "_" + field)))
+          for field in _UrdfMetadata._fields))
+      _URDF_METADATA_CACHE[key] = metadata
+    else:
+      for field in _UrdfMetadata._fields:
+        setattr(self, "_" + field, copy.deepcopy(getattr(metadata, field)))
+
   def _RecordMassInfoFromURDF(self):
     self._base_mass_urdf = []
     for chassis_id in self._chassis_link_ids:
@@ -246,6 +365,13 @@ class Minitaur(object):
     self._motor_id_list = [
         self._joint_name_to_id[motor_name] for motor_name in MOTOR_NAMES
     ]
+    self._motor_array = joint_motor_array.JointMotorArray(
+        self._pybullet_client,
+        self.quadruped,
+        self._motor_id_list,
+        position_gains=self._kp,
+        velocity_gains=self._kd,
+        forces=self._max_force)
 
   def IsObservationValid(self):
     """Whether the observation is valid for the current time step.
@@ -278,23 +404,16 @@ class Minitaur(object):
       init_position = INIT_POSITION
     if reload_urdf:
       if self._self_collision_enabled:
-        self.quadruped = self._pybullet_client.loadURDF(
+        self._LoadUrdf(
             "%s/quadruped/minitaur.urdf" % self._urdf_root,
             init_position,
-            useFixedBase=self._on_rack,
             flags=self._pybullet_client.URDF_USE_SELF_COLLISION)
       else:
-        self.quadruped = self._pybullet_client.loadURDF(
-            "%s/quadruped/minitaur.urdf" % self._urdf_root,
-            init_position,
-            useFixedBase=self._on_rack)
-      self._BuildJointNameToIdDict()
-      self._BuildUrdfIds()
+        self._LoadUrdf("%s/quadruped/minitaur.urdf" % self._urdf_root,
+                       init_position)
       if self._remove_default_joint_damping:
         self._RemoveDefaultJointDamping()
       self._BuildMotorIdList()
-      self._RecordMassInfoFromURDF()
-      self._RecordInertiaInfoFromURDF()
       self.ResetPose(add_constraint=True)
     else:
       self._pybullet_client.resetBasePositionAndOrientation(
@@ -324,6 +443,40 @@ class Minitaur(object):
           self.ReceiveObservation()
     self.ReceiveObservation()
 
+  def SaveResetState(self):
+    """Saves the state reached by Reset() for RestoreResetState().
+
+    The simulation is saved in memory with saveState, so RestoreResetState()
+    puts the minitaur back into its settled pose without simulating the reset
+    motion again. Dynamics parameters like masses and frictions are not part of
+    the saved state.
+
+    Returns:
+      The saved state. Release it with RemoveResetState().
+    """
+    return _ResetState(
+        state_id=self._pybullet_client.saveState(),
+        observation_history=copy.deepcopy(self._observation_history),
+        observed_motor_torques=np.copy(self._observed_motor_torques))
+
+  def RestoreResetState(self, reset_state):
+    """Resets the minitaur to a state saved by SaveResetState().
+
+    Args:
+      reset_state: The state returned by SaveResetState(), in the current
+        simulation.
+    """
+    self._pybullet_client.restoreState(reset_state.state_id)
+    self._observation_history = copy.deepcopy(reset_state.observation_history)
+    self._observed_motor_torques = np.copy(reset_state.observed_motor_torques)
+    self._overheat_counter = np.zeros(self.num_motors)
+    self._motor_enabled_list = [True] * self.num_motors
+    self._step_counter = 0
+    self._control_observation = self._GetControlObservation()
+
+  def RemoveResetState(self, reset_state):
+    self._pybullet_client.removeState(reset_state.state_id)
+
   def _SetMotorTorqueById(self, motor_id, torque):
     self._pybullet_client.setJointMotorControl2(
         bodyIndex=self.quadruped,
@@ -440,9 +593,7 @@ class Minitaur(object):
     Returns:
       The position of minitaur's base.
     """
-    position, _ = (
-        self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
-    return position
+    return self._ReadSensors().base_position
 
   def GetTrueBaseRollPitchYaw(self):
     """Get minitaur's base orientation in euler angle in the world frame.
@@ -476,12 +627,7 @@ class Minitaur(object):
     Returns:
       Motor angles, mapped to [-pi, pi].
     """
-    motor_angles = [
-        self._pybullet_client.getJointState(self.quadruped, motor_id)[0]
-        for motor_id in self._motor_id_list
-    ]
-    motor_angles = np.multiply(motor_angles, self._motor_direction)
-    return motor_angles
+    return np.array(self._ReadSensors().motor_angles)
 
   def GetMotorAngles(self):
     """Gets the eight motor angles.
@@ -503,12 +649,7 @@ class Minitaur(object):
     Returns:
       Velocities of all eight motors.
     """
-    motor_velocities = [
-        self._pybullet_client.getJointState(self.quadruped, motor_id)[1]
-        for motor_id in self._motor_id_list
-    ]
-    motor_velocities = np.multiply(motor_velocities, self._motor_direction)
-    return motor_velocities
+    return np.array(self._ReadSensors().motor_velocities)
 
   def GetMotorVelocities(self):
     """Get the velocity of all eight motors.
@@ -531,12 +672,7 @@ class Minitaur(object):
     if self._accurate_motor_model_enabled or self._pd_control_enabled:
       return self._observed_motor_torques
     else:
-      motor_torques = [
-          self._pybullet_client.getJointState(self.quadruped, motor_id)[3]
-          for motor_id in self._motor_id_list
-      ]
-      motor_torques = np.multiply(motor_torques, self._motor_direction)
-    return motor_torques
+      return np.array(self._ReadSensors().motor_torques)
 
   def GetMotorTorques(self):
     """Get the amount of torque the motors are exerting.
@@ -556,9 +692,7 @@ class Minitaur(object):
     Returns:
       The orientation of minitaur's base.
     """
-    _, orientation = (
-        self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
-    return orientation
+    return self._ReadSensors().base_orientation
 
   def GetBaseOrientation(self):
     """Get the orientation of minitaur's base, represented as quaternion.
@@ -576,8 +710,7 @@ class Minitaur(object):
     Returns:
       rate of (roll, pitch, yaw) change of the minitaur's base.
     """
-    vel = self._pybullet_client.getBaseVelocity(self.quadruped)
-    return np.asarray([vel[1][0], vel[1][1], vel[1][2]])
+    return np.array(self._ReadSensors().base_angular_velocity)
 
   def GetBaseRollPitchYawRate(self):
     """Get the rate of orientation change of the minitaur's base in euler angle.
@@ -637,14 +770,12 @@ class Minitaur(object):
         actual_torque, observed_torque = self._motor_model.convert_to_torque(
             motor_commands, q, qdot, qdot_true, motor_kps, motor_kds)
         if self._motor_overheat_protection:
-          for i in range(self.num_motors):
-            if abs(actual_torque[i]) > OVERHEAT_SHUTDOWN_TORQUE:
-              self._overheat_counter[i] += 1
-            else:
-              self._overheat_counter[i] = 0
-            if (self._overheat_counter[i] >
-                OVERHEAT_SHUTDOWN_TIME / self.time_step):
-              self._motor_enabled_list[i] = False
+          overheated = np.absolute(actual_torque) > OVERHEAT_SHUTDOWN_TORQUE
+          self._overheat_counter = np.where(overheated,
+                                            self._overheat_counter + 1, 0)
+          self._motor_enabled_list = np.logical_and(
+              self._motor_enabled_list, self._overheat_counter <=
+              OVERHEAT_SHUTDOWN_TIME / self.time_step)
 
         # The torque is already in the observation space because we use
         # GetMotorAngles and GetMotorVelocities.
@@ -654,13 +785,8 @@ class Minitaur(object):
         self._applied_motor_torque = np.multiply(actual_torque,
                                                  self._motor_direction)
 
-        for motor_id, motor_torque, motor_enabled in zip(
-            self._motor_id_list, self._applied_motor_torque,
-            self._motor_enabled_list):
-          if motor_enabled:
-            self._SetMotorTorqueById(motor_id, motor_torque)
-          else:
-            self._SetMotorTorqueById(motor_id, 0)
+        self._motor_array.set_torques(
+            np.where(self._motor_enabled_list, self._applied_motor_torque, 0))
       else:
         torque_commands = -1 * motor_kps * (
             q - motor_commands) - motor_kds * qdot
@@ -673,15 +799,13 @@ class Minitaur(object):
         self._applied_motor_torques = np.multiply(self._observed_motor_torques,
                                                   self._motor_direction)
 
-        for motor_id, motor_torque in zip(self._motor_id_list,
-                                          self._applied_motor_torques):
-          self._SetMotorTorqueById(motor_id, motor_torque)
+        self._motor_array.set_torques(self._applied_motor_torques)
     else:
       motor_commands_with_direction = np.multiply(motor_commands,
                                                   self._motor_direction)
-      for motor_id, motor_command_with_direction in zip(
-          self._motor_id_list, motor_commands_with_direction):
-        self._SetDesiredMotorAngleById(motor_id, motor_command_with_direction)
+      self._motor_array.set_positions(motor_commands_with_direction)
+    # The simulation is stepped next, ReceiveObservation() reads it again.
+    self._sensor_snapshot = None
 
   def ConvertFromLegModel(self, actions):
     """Convert the actions that use leg model to the real motor actions.
@@ -738,8 +862,7 @@ class Minitaur(object):
           "The length of base_mass {} and self._chassis_link_ids {} are not "
           "the same.".format(len(base_mass), len(self._chassis_link_ids)))
     for chassis_id, chassis_mass in zip(self._chassis_link_ids, base_mass):
-      self._pybullet_client.changeDynamics(
-          self.quadruped, chassis_id, mass=chassis_mass)
+      self._ChangeLinkDynamics(chassis_id, mass=chassis_mass)
 
   def SetLegMasses(self, leg_masses):
     """Set the mass of the legs.
@@ -759,12 +882,10 @@ class Minitaur(object):
       raise ValueError("The number of values passed to SetLegMasses are "
                        "different than number of leg links and motors.")
     for leg_id, leg_mass in zip(self._leg_link_ids, leg_masses):
-      self._pybullet_client.changeDynamics(
-          self.quadruped, leg_id, mass=leg_mass)
+      self._ChangeLinkDynamics(leg_id, mass=leg_mass)
     motor_masses = leg_masses[len(self._leg_link_ids):]
     for link_id, motor_mass in zip(self._motor_link_ids, motor_masses):
-      self._pybullet_client.changeDynamics(
-          self.quadruped, link_id, mass=motor_mass)
+      self._ChangeLinkDynamics(link_id, mass=motor_mass)
 
   def SetBaseInertias(self, base_inertias):
     """Set the inertias of minitaur's base.
@@ -788,8 +909,8 @@ class Minitaur(object):
       for inertia_value in chassis_inertia:
         if (np.asarray(inertia_value) < 0).any():
           raise ValueError("Values in inertia matrix should be non-negative.")
-      self._pybullet_client.changeDynamics(
-          self.quadruped, chassis_id, localInertiaDiagonal=chassis_inertia)
+      self._ChangeLinkDynamics(
+          chassis_id, localInertiaDiagonal=chassis_inertia)
 
   def SetLegInertias(self, leg_inertias):
     """Set the inertias of the legs.
@@ -813,16 +934,14 @@ class Minitaur(object):
       for inertia_value in leg_inertias:
         if (np.asarray(inertia_value) < 0).any():
           raise ValueError("Values in inertia matrix should be non-negative.")
-      self._pybullet_client.changeDynamics(
-          self.quadruped, leg_id, localInertiaDiagonal=leg_inertia)
+      self._ChangeLinkDynamics(leg_id, localInertiaDiagonal=leg_inertia)
 
     motor_inertias = leg_inertias[len(self._leg_link_ids):]
     for link_id, motor_inertia in zip(self._motor_link_ids, motor_inertias):
       for inertia_value in motor_inertias:
         if (np.asarray(inertia_value) < 0).any():
           raise ValueError("Values in inertia matrix should be non-negative.")
-      self._pybullet_client.changeDynamics(
-          self.quadruped, link_id, localInertiaDiagonal=motor_inertia)
+      self._ChangeLinkDynamics(link_id, localInertiaDiagonal=motor_inertia)
 
   def SetFootFriction(self, foot_friction):
     """Set the lateral friction of the feet.
@@ -832,8 +951,7 @@ class Minitaur(object):
         shared by all four feet.
     """
     for link_id in self._foot_link_ids:
-      self._pybullet_client.changeDynamics(
-          self.quadruped, link_id, lateralFriction=foot_friction)
+      self._ChangeLinkDynamics(link_id, lateralFriction=foot_friction)
 
   # TODO(b/73748980): Add more API's to set other contact parameters.
   def SetFootRestitution(self, foot_restitution):
@@ -844,8 +962,59 @@ class Minitaur(object):
         This value is shared by all four feet.
     """
     for link_id in self._foot_link_ids:
-      self._pybullet_client.changeDynamics(
-          self.quadruped, link_id, restitution=foot_restitution)
+      self._ChangeLinkDynamics(link_id, restitution=foot_restitution)
+
+  @contextlib.contextmanager
+  def BatchDynamicsChanges(self):
+    """Merges the dynamics changes of the setters called in the block.
+
+    SetBaseMasses, SetLegMasses, SetBaseInertias, SetLegInertias,
+    SetFootFriction and SetFootRestitution only queue their changes in the
+    block. On exit, each link gets a single changeDynamics call with all of its
+    changed parameters, in which the mass is set before the inertia.
+
+    Yields:
+      Nothing, the changes are applied when the block exits.
+    """
+    if self._queued_link_dynamics is not None:
+      yield
+      return
+    self._queued_link_dynamics = collections.OrderedDict()
+    try:
+      yield
+      queued_link_dynamics = self._queued_link_dynamics
+    finally:
+      self._queued_link_dynamics = None
+    for link_id, parameters in queued_link_dynamics.items():
+      self._ChangeLinkDynamics(link_id, **parameters)
+
+  def _ChangeLinkDynamics(self, link_id, **parameters):
+    """Calls changeDynamics with the parameters whose value changed.
+
+    The values set since the URDF was loaded are remembered, so parameters that
+    did not change are skipped. Changing the mass makes pybullet recompute the
+    inertia of the link, so the inertia is then set again if it is given.
+
+    Args:
+      link_id: The link whose dynamics are changed.
+      **parameters: The keyword arguments of changeDynamics.
+    """
+    if self._queued_link_dynamics is not None:
+      self._queued_link_dynamics.setdefault(link_id, {}).update(parameters)
+      return
+    link_dynamics = self._link_dynamics.setdefault(link_id, {})
+    values = dict((name, np.asarray(value, dtype=np.float64).tolist())
+                  for name, value in parameters.items())
+    changed = dict((name, value)
+                   for name, value in values.items()
+                   if link_dynamics.get(name) != value)
+    if "mass" in changed:
+      link_dynamics.pop("localInertiaDiagonal", None)
+      if "localInertiaDiagonal" in values:
+        changed["localInertiaDiagonal"] = values["localInertiaDiagonal"]
+    if changed:
+      self._pybullet_client.changeDynamics(self.quadruped, link_id, **changed)
+      link_dynamics.update(changed)
 
   def SetJointFriction(self, joint_frictions):
     for knee_joint_id, friction in zip(self._foot_link_ids, joint_frictions):
@@ -876,45 +1045,84 @@ class Minitaur(object):
     observation.extend(self.GetTrueBaseRollPitchYawRate())
     return observation
 
+  def _ReadSensors(self):
+    """Reads the true motor and base states.
+
+    Inside Step(), ReceiveObservation() takes a snapshot after each simulation
+    step, which the observation and the PD control and velocity limit of the
+    next ApplyAction() share. Everywhere else, including code that steps or
+    resets the simulation itself, the states are read live.
+
+    Returns:
+      A _SensorSnapshot of the current states.
+    """
+    if self._sensor_snapshot is not None:
+      return self._sensor_snapshot
+    joint_states = self._pybullet_client.getJointStates(
+        self.quadruped, self._motor_id_list)
+    position, orientation = (
+        self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
+    _, angular_velocity = self._pybullet_client.getBaseVelocity(self.quadruped)
+    motor_angles, motor_velocities, _, motor_torques = zip(*joint_states)
+    return _SensorSnapshot(
+        motor_angles=np.multiply(motor_angles, self._motor_direction),
+        motor_velocities=np.multiply(motor_velocities, self._motor_direction),
+        motor_torques=np.multiply(motor_torques, self._motor_direction),
+        base_position=position,
+        base_orientation=orientation,
+        base_angular_velocity=angular_velocity)
+
   def ReceiveObservation(self):
     """Receive the observation from sensors.
 
     This function is called once per step. The observations are only updated
     when this function is called.
     """
-    self._observation_history.appendleft(self.GetTrueObservation())
+    self._sensor_snapshot = None
+    self._sensor_snapshot = self._ReadSensors()
+    observation = self.GetTrueObservation()
+    if len(self._control_observation) != len(observation):
+      self._control_observation = np.zeros(len(observation))
+      self._pd_observation = np.zeros(len(observation))
+    self._observation_history.append(observation)
     self._control_observation = self._GetControlObservation()
+    if not self._stepping:
+      self._sensor_snapshot = None
 
-  def _GetDelayedObservation(self, latency):
+  def _GetDelayedObservation(self, latency, out=None):
     """Get observation that is delayed by the amount specified in latency.
 
     Args:
       latency: The latency (in seconds) of the delayed observation.
+      out: Optional array to write the observation to, a new one if None.
     Returns:
       observation: The observation which was actually latency seconds ago.
     """
-    if latency <= 0 or len(self._observation_history) == 1:
-      observation = self._observation_history[0]
+    history = self._observation_history
+    if out is None:
+      out = np.zeros(len(history[0]))
+    if latency <= 0 or len(history) == 1:
+      out[:] = history[0]
     else:
       n_steps_ago = int(latency / self.time_step)
-      if n_steps_ago + 1 >= len(self._observation_history):
-        return self._observation_history[-1]
+      if n_steps_ago + 1 >= len(history):
+        out[:] = history[-1]
+        return out
       remaining_latency = latency - n_steps_ago * self.time_step
       blend_alpha = remaining_latency / self.time_step
-      observation = (
-          (1.0 - blend_alpha) * np.array(self._observation_history[n_steps_ago])
-          + blend_alpha * np.array(self._observation_history[n_steps_ago + 1]))
-    return observation
+      history.blend(n_steps_ago, blend_alpha, out)
+    return out
 
   def _GetPDObservation(self):
-    pd_delayed_observation = self._GetDelayedObservation(self._pd_latency)
+    pd_delayed_observation = self._GetDelayedObservation(
+        self._pd_latency, self._pd_observation)
     q = pd_delayed_observation[0:self.num_motors]
     qdot = pd_delayed_observation[self.num_motors:2 * self.num_motors]
-    return (np.array(q), np.array(qdot))
+    return (q, qdot)
 
   def _GetControlObservation(self):
     control_delayed_observation = self._GetDelayedObservation(
-        self._control_latency)
+        self._control_latency, self._control_observation)
     return control_delayed_observation
 
   def _AddSensorNoise(self, sensor_values, noise_stdev):
@@ -956,6 +1164,7 @@ class Minitaur(object):
     """
     self._kp = kp
     self._kd = kd
+    self._motor_array.set_gains(kp, kd)
     if self._accurate_motor_model_enabled:
       self._motor_model.set_motor_gains(kp, kd)
 
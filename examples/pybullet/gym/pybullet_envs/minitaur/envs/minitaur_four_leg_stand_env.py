@@ -8,7 +8,6 @@ import time
 from gym import spaces
 import numpy as np
 from pybullet_envs.minitaur.envs import minitaur_gym_env
-from pybullet_envs.minitaur.envs import minitaur_logging
 
 INIT_EXTENSION_POS = 2.0
 INIT_SWING_POS = 0.0
@@ -217,9 +216,8 @@ class MinitaurFourLegStandEnv(minitaur_gym_env.MinitaurGymEnv):
     done = self._termination()
     obs = self._get_true_observation()
     reward = self._reward()
-    if self._log_path is not None:
-      minitaur_logging.update_episode_proto(self._episode_proto, self.minitaur,
-                                            action, self._env_step_counter)
+    if self._episode_log is not None:
+      self._episode_log.append(self.minitaur, action)
     if done:
       self.minitaur.Terminate()
     return np.array(self._get_observation()), reward, done, {}
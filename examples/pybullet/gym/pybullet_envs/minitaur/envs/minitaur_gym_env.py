@@ -19,7 +19,6 @@ import pybullet_data
 from pybullet_envs.minitaur.envs import minitaur
 from pybullet_envs.minitaur.envs import minitaur_derpy
 from pybullet_envs.minitaur.envs import minitaur_logging
-from pybullet_envs.minitaur.envs import minitaur_logging_pb2
 from pybullet_envs.minitaur.envs import minitaur_rainbow_dash
 from pybullet_envs.minitaur.envs import motor
 from pkg_resources import parse_version
@@ -91,6 +90,7 @@ class MinitaurGymEnv(gym.Env):
                torque_control_enabled=False,
                motor_overheat_protection=False,
                hard_reset=True,
+               soft_reset=False,
                on_rack=False,
                render=False,
                num_steps_to_log=1000,
@@ -146,6 +146,10 @@ class MinitaurGymEnv(gym.Env):
       hard_reset: Whether to wipe the simulation and load everything when reset
         is called. If set to false, reset just place the minitaur back to start
         position and set its pose to initial configuration.
+      soft_reset: Whether to run the reset motion only once and save the
+        settled simulation with saveState. Later resets with the same
+        arguments and number of bodies restore it instead, taking precedence
+        over hard_reset, and only apply the env randomizers again.
       on_rack: Whether to place the minitaur on rack. This is only used to debug
         the walking gait. In this mode, the minitaur's base is hanged midair so
         that its walking gait is clearer to visualize.
@@ -161,8 +165,8 @@ class MinitaurGymEnv(gym.Env):
           the terrrain during reset(), or add perturbation forces during step().
       forward_reward_cap: The maximum value that forward reward is capped at.
         Disabled (Inf) by default.
-      log_path: The path to write out logs. For the details of logging, refer to
-        minitaur_logging.proto.
+      log_path: The path to write out logs. Each episode is streamed to its own
+        file, for the details of logging, refer to minitaur_logging.py.
     Raises:
       ValueError: If the urdf_version is not supported.
     """
@@ -220,6 +224,9 @@ class MinitaurGymEnv(gym.Env):
     self._cam_pitch = -30
     self._forward_reward_cap = forward_reward_cap
     self._hard_reset = True
+    self._soft_reset = soft_reset
+    self._reset_state = None
+    self._reset_state_key = None
     self._last_frame_time = 0.0
     self._control_latency = control_latency
     self._pd_latency = pd_latency
@@ -228,7 +235,7 @@ class MinitaurGymEnv(gym.Env):
     self._reflection = reflection
     self._env_randomizers = convert_to_list(
         env_randomizer) if env_randomizer else []
-    self._episode_proto = minitaur_logging_pb2.MinitaurEpisode()
+    self._episode_log = None
     if self._is_render:
       self._pybullet_client = bullet_client.BulletClient(
           connection_mode=pybullet.GUI)
@@ -249,7 +256,9 @@ class MinitaurGymEnv(gym.Env):
     self._hard_reset = hard_reset  # This assignment need to be after reset()
 
   def close(self):
-    self.logging.save_episode(self._episode_proto)
+    if self._episode_log is not None:
+      self._episode_log.close()
+      self._episode_log = None
     self.minitaur.Terminate()
 
   def add_env_randomizer(self, env_randomizer):
@@ -258,10 +267,44 @@ class MinitaurGymEnv(gym.Env):
   def reset(self, initial_motor_angles=None, reset_duration=1.0):
     self._pybullet_client.configureDebugVisualizer(
         self._pybullet_client.COV_ENABLE_RENDERING, 0)
-    self.logging.save_episode(self._episode_proto)
-    self._episode_proto = minitaur_logging_pb2.MinitaurEpisode()
-    minitaur_logging.preallocate_episode_proto(self._episode_proto,
-                                               self._num_steps_to_log)
+    if self._episode_log is not None:
+      self._episode_log.close()
+    self._episode_log = self.logging.start_episode(self._num_steps_to_log)
+    # A saved state can only be restored into a world with as many bodies, env
+    # randomizers may have added some (like a terrain) since it was saved.
+    reset_state_key = (None if initial_motor_angles is None else
+                       tuple(initial_motor_angles), reset_duration,
+                       self._pybullet_client.getNumBodies())
+    if (self._soft_reset and self._reset_state is not None and
+        self._reset_state_key == reset_state_key):
+      self.minitaur.RestoreResetState(self._reset_state)
+    else:
+      self._reset_minitaur(initial_motor_angles, reset_duration)
+      if self._soft_reset:
+        # Restored states only play out the same with a fixed pair order.
+        self._pybullet_client.setPhysicsEngineParameter(
+            deterministicOverlappingPairs=1)
+        if self._reset_state is not None:
+          self.minitaur.RemoveResetState(self._reset_state)
+        self._reset_state = self.minitaur.SaveResetState()
+        self._reset_state_key = reset_state_key
+
+    # Loop over all env randomizers.
+    for env_randomizer in self._env_randomizers:
+      env_randomizer.randomize_env(self)
+
+    self._pybullet_client.setPhysicsEngineParameter(enableConeFriction=0)
+    self._env_step_counter = 0
+    self._last_base_position = [0, 0, 0]
+    self._objectives = []
+    self._pybullet_client.resetDebugVisualizerCamera(
+        self._cam_dist, self._cam_yaw, self._cam_pitch, [0, 0, 0])
+    self._pybullet_client.configureDebugVisualizer(
+        self._pybullet_client.COV_ENABLE_RENDERING, 1)
+    return self._get_observation()
+
+  def _reset_minitaur(self, initial_motor_angles, reset_duration):
+    """Resets the minitaur by simulating its reset motion."""
     if self._hard_reset:
       self._pybullet_client.resetSimulation()
       self._pybullet_client.setPhysicsEngineParameter(
@@ -298,25 +341,13 @@ class MinitaurGymEnv(gym.Env):
                 torque_control_enabled=self._torque_control_enabled,
                 motor_overheat_protection=motor_protect,
                 on_rack=self._on_rack))
+      # States saved before are wiped with the simulation.
+      self._reset_state = None
     self.minitaur.Reset(
         reload_urdf=False,
         default_motor_angles=initial_motor_angles,
         reset_time=reset_duration)
 
-    # Loop over all env randomizers.
-    for env_randomizer in self._env_randomizers:
-      env_randomizer.randomize_env(self)
-
-    self._pybullet_client.setPhysicsEngineParameter(enableConeFriction=0)
-    self._env_step_counter = 0
-    self._last_base_position = [0, 0, 0]
-    self._objectives = []
-    self._pybullet_client.resetDebugVisualizerCamera(
-        self._cam_dist, self._cam_yaw, self._cam_pitch, [0, 0, 0])
-    self._pybullet_client.configureDebugVisualizer(
-        self._pybullet_client.COV_ENABLE_RENDERING, 1)
-    return self._get_observation()
-
   def seed(self, seed=None):
     self.np_random, seed = seeding.np_random(seed)
     return [seed]
@@ -371,9 +402,8 @@ class MinitaurGymEnv(gym.Env):
     self.minitaur.Step(action)
     reward = self._reward()
     done = self._termination()
-    if self._log_path is not None:
-      minitaur_logging.update_episode_proto(self._episode_proto, self.minitaur,
-                                            action, self._env_step_counter)
+    if self._episode_log is not None:
+      self._episode_log.append(self.minitaur, action)
     self._env_step_counter += 1
     if done:
       self.minitaur.Terminate()
@@ -1,9 +1,13 @@
-"""A proto buffer based logging system for minitaur experiments.
+"""A logging system for minitaur experiments.
 
 The logging system records the time since reset, base position, orientation,
-angular velocity and motor information (joint angle, speed, and torque) into a
-proto buffer. See minitaur_logging.proto for more details. The episode_proto is
-updated per time step by the environment and saved onto disk for each episode.
+angular velocity and motor information (joint angle, speed, and torque) of each
+time step. EpisodeLogWriter streams them to a binary file of EPISODE_LOG_DTYPE
+records, which load_episode_log() maps back into memory with one column per
+field. The episode can be exported to the proto buffer described in
+minitaur_logging.proto with episode_log_to_proto(). The older proto path, where
+the episode_proto is updated per time step by the environment and saved onto
+disk for each episode, is kept for existing logs.
 """
 
 from __future__ import absolute_import
@@ -17,13 +21,29 @@ os.sys.path.insert(0,parentdir)
 
 import datetime
 import os
+import queue
+import threading
 import time
 
+import numpy as np
 import tensorflow as tf
 from pybullet_envs.minitaur.envs import minitaur_logging_pb2
 
 NUM_MOTORS = 8
 
+# One record per time step, the fields match MinitaurStateAction.
+EPISODE_LOG_DTYPE = np.dtype([
+    ("info_valid", np.bool_),
+    ("time", np.float64),
+    ("motor_angles", np.float64, (NUM_MOTORS,)),
+    ("motor_velocities", np.float64, (NUM_MOTORS,)),
+    ("motor_torques", np.float64, (NUM_MOTORS,)),
+    ("motor_actions", np.float64, (NUM_MOTORS,)),
+    ("base_position", np.float64, (3,)),
+    ("base_orientation", np.float64, (3,)),
+    ("base_angular_vel", np.float64, (3,)),
+])
+
 
 def _update_base_state(base_state, values):
   base_state.x = values[0]
@@ -99,11 +119,196 @@ def update_episode_proto(episode_proto, minitaur, action, step):
                      minitaur.GetBaseRollPitchYawRate())
 
 
+class EpisodeLogWriter(object):
+  """Streams the states/action of the minitaur to a binary log file.
+
+  Each step is written into a preallocated chunk of EPISODE_LOG_DTYPE records.
+  Full chunks are appended to the file by a background thread, so only a few
+  chunks of the episode are held in memory and stepping does not wait for the
+  disk. An error of the thread is raised by the next append() that needs a new
+  chunk, or by close().
+  """
+
+  def __init__(self, log_path, max_num_steps=None, chunk_size=1000):
+    """Opens the log file.
+
+    Args:
+      log_path: The path of the log file, it is overwritten.
+      max_num_steps: The max number of steps that will be recorded, or None to
+        record all of them.
+      chunk_size: The number of steps written to the file at once.
+    """
+    self.log_path = log_path
+    self._max_num_steps = max_num_steps
+    self._num_steps = 0
+    self._file = open(log_path, "wb")
+    # Two chunks are enough to fill one while the other one is written.
+    self._free_chunks = queue.Queue()
+    for _ in range(2):
+      self._free_chunks.put(np.zeros(chunk_size, dtype=EPISODE_LOG_DTYPE))
+    self._full_chunks = queue.Queue()
+    self._chunk = self._free_chunks.get()
+    self._chunk_index = 0
+    self._error = None
+    self._thread = threading.Thread(target=self._write_chunks)
+    self._thread.daemon = True
+    self._thread.start()
+
+  @property
+  def num_steps(self):
+    return self._num_steps
+
+  def append(self, minitaur, action):
+    """Records the states/action of the minitaur for the current step.
+
+    Args:
+      minitaur: The minitaur instance. See envs.minitaur for details.
+      action: The action applied at this time step. The action is an 8-element
+        numpy floating-point array.
+
+    Raises:
+      Exception: The error that stopped the writing of the file.
+    """
+    if self._max_num_steps is not None and (
+        self._num_steps >= self._max_num_steps):
+      return
+    step_log = self._chunk[self._chunk_index]
+    step_log["info_valid"] = minitaur.IsObservationValid()
+    step_log["time"] = minitaur.GetTimeSinceReset()
+    step_log["motor_angles"] = minitaur.GetMotorAngles()
+    step_log["motor_velocities"] = minitaur.GetMotorVelocities()
+    step_log["motor_torques"] = minitaur.GetMotorTorques()
+    step_log["motor_actions"] = action
+    step_log["base_position"] = minitaur.GetBasePosition()
+    step_log["base_orientation"] = minitaur.GetBaseRollPitchYaw()
+    step_log["base_angular_vel"] = minitaur.GetBaseRollPitchYawRate()
+    self._num_steps += 1
+    self._chunk_index += 1
+    if self._chunk_index == len(self._chunk):
+      self._full_chunks.put((self._chunk, self._chunk_index))
+      self._chunk = self._get_free_chunk()
+      self._chunk_index = 0
+
+  def close(self):
+    """Writes the remaining steps and closes the file.
+
+    An episode without any recorded step leaves no file behind.
+
+    Returns:
+      The path of the log file, or None if no step was recorded.
+
+    Raises:
+      Exception: The error that stopped the writing of the file, which is then
+        truncated.
+    """
+    if self._file is not None:
+      if self._chunk_index:
+        self._full_chunks.put((self._chunk, self._chunk_index))
+      self._full_chunks.put(None)
+      self._thread.join()
+      self._file.close()
+      self._file = None
+      if self._error is not None:
+        raise self._error
+      if not self._num_steps:
+        os.remove(self.log_path)
+    return self.log_path if self._num_steps else None
+
+  def _get_free_chunk(self):
+    """Waits for a written chunk, unless the writing thread stopped."""
+    while True:
+      if self._error is not None:
+        raise self._error
+      try:
+        return self._free_chunks.get(timeout=0.1)
+      except queue.Empty:
+        if not self._thread.is_alive() and self._error is None:
+          raise RuntimeError("The episode log writer thread exited.")
+
+  def _write_chunks(self):
+    try:
+      while True:
+        item = self._full_chunks.get()
+        if item is None:
+          return
+        chunk, num_steps = item
+        self._file.write(chunk[:num_steps].tobytes())
+        self._free_chunks.put(chunk)
+    except Exception as error:  # pylint: disable=broad-except
+      # Stored for the main thread, which would otherwise wait for the chunk.
+      self._error = error
+
+
+def load_episode_log(log_path):
+  """Maps a log written by EpisodeLogWriter into memory.
+
+  Args:
+    log_path: The full path of the log file.
+  Returns:
+    A read-only record array, log["motor_angles"] is a [num_steps, 8] column.
+  """
+  if not os.path.getsize(log_path):
+    return np.zeros(0, dtype=EPISODE_LOG_DTYPE)
+  return np.memmap(log_path, dtype=EPISODE_LOG_DTYPE, mode="r")
+
+
+def episode_log_to_proto(episode_log):
+  """Exports a log loaded with load_episode_log() to a MinitaurEpisode proto.
+
+  Args:
+    episode_log: The records of the episode.
+  Returns:
+    The minitaur episode proto.
+  """
+  episode_proto = minitaur_logging_pb2.MinitaurEpisode()
+  for record in episode_log:
+    step_log = episode_proto.state_action.add()
+    step_log.info_valid = bool(record["info_valid"])
+    time_in_seconds = float(record["time"])
+    step_log.time.seconds = int(time_in_seconds)
+    step_log.time.nanos = int((time_in_seconds - int(time_in_seconds)) * 1e9)
+    for i in range(NUM_MOTORS):
+      motor_state = step_log.motor_states.add()
+      motor_state.angle = record["motor_angles"][i]
+      motor_state.velocity = record["motor_velocities"][i]
+      motor_state.torque = record["motor_torques"][i]
+      motor_state.action = record["motor_actions"][i]
+    _update_base_state(step_log.base_position, record["base_position"])
+    _update_base_state(step_log.base_orientation, record["base_orientation"])
+    _update_base_state(step_log.base_angular_vel, record["base_angular_vel"])
+  return episode_proto
+
+
 class MinitaurLogging(object):
   """A logging system that records the states/action of the minitaur."""
 
   def __init__(self, log_path=None):
     self._log_path = log_path
+    self._num_episodes = 0
+
+  def start_episode(self, max_num_steps=None):
+    """Opens an EpisodeLogWriter for a new episode in self._log_path.
+
+    The file name is a time stamp and the number of the episode, for example
+    "/tmp/logs/minitaur_log_yyyy-mm-dd-hhmmss_3.bin".
+
+    Args:
+      max_num_steps: The max number of steps that will be recorded, or None to
+        record all of them.
+    Returns:
+      The EpisodeLogWriter, or None if there is no log path.
+    """
+    if not self._log_path:
+      return None
+    if not os.path.exists(self._log_path):
+      os.makedirs(self._log_path)
+    time_stamp = datetime.datetime.fromtimestamp(time.time()).strftime(
+        "%Y-%m-%d-%H%M%S")
+    log_path = os.path.join(
+        self._log_path, "minitaur_log_{}_{}.bin".format(time_stamp,
+                                                        self._num_episodes))
+    self._num_episodes += 1
+    return EpisodeLogWriter(log_path, max_num_steps)
 
   # TODO(jietan): Consider using recordio to write the logs.
   def save_episode(self, episode_proto):
@@ -0,0 +1,145 @@
+"""Tests for the binary episode logs of minitaur_logging."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from pybullet_envs.minitaur.envs import minitaur_logging
+
+
+class MockMinitaur(object):
+  """Reports different, predictable states at every step."""
+
+  def __init__(self):
+    self.step = 0
+    self.num_motors = minitaur_logging.NUM_MOTORS
+
+  def IsObservationValid(self):
+    return self.step % 2 == 0
+
+  def GetTimeSinceReset(self):
+    return 0.25 * self.step + 0.125
+
+  def GetMotorAngles(self):
+    return np.arange(self.num_motors) + self.step
+
+  def GetMotorVelocities(self):
+    return np.arange(self.num_motors) - self.step
+
+  def GetMotorTorques(self):
+    return np.arange(self.num_motors) * self.step
+
+  def GetBasePosition(self):
+    return (self.step, 1.0, 2.0)
+
+  def GetBaseRollPitchYaw(self):
+    return (0.5, self.step, 0.25)
+
+  def GetBaseRollPitchYawRate(self):
+    return (-1.0, -2.0, self.step)
+
+
+class FailingFile(object):
+  """A file whose writes fail, as with a full disk."""
+
+  def write(self, unused_data):
+    raise IOError("No space left on device")
+
+  def close(self):
+    pass
+
+
+class EpisodeLogWriterTest(tf.test.TestCase):
+
+  def _write_episode(self, log_path, num_steps, **kwargs):
+    minitaur = MockMinitaur()
+    writer = minitaur_logging.EpisodeLogWriter(log_path, **kwargs)
+    for step in range(num_steps):
+      minitaur.step = step
+      writer.append(minitaur, np.full(minitaur.num_motors, step * 0.5))
+    return writer.close()
+
+  def test_round_trip_with_partial_last_chunk(self):
+    log_path = os.path.join(self.get_temp_dir(), "partial.bin")
+    self.assertEqual(
+        log_path, self._write_episode(log_path, num_steps=10, chunk_size=4))
+    episode_log = minitaur_logging.load_episode_log(log_path)
+    self.assertEqual(10, len(episode_log))
+    minitaur = MockMinitaur()
+    for step, record in enumerate(episode_log):
+      minitaur.step = step
+      self.assertEqual(minitaur.IsObservationValid(), record["info_valid"])
+      self.assertEqual(minitaur.GetTimeSinceReset(), record["time"])
+      self.assertAllEqual(minitaur.GetMotorAngles(), record["motor_angles"])
+      self.assertAllEqual(
+          minitaur.GetMotorVelocities(), record["motor_velocities"])
+      self.assertAllEqual(minitaur.GetMotorTorques(), record["motor_torques"])
+      self.assertAllEqual(
+          np.full(minitaur.num_motors, step * 0.5), record["motor_actions"])
+      self.assertAllEqual(minitaur.GetBasePosition(), record["base_position"])
+      self.assertAllEqual(
+          minitaur.GetBaseRollPitchYaw(), record["base_orientation"])
+      self.assertAllEqual(
+          minitaur.GetBaseRollPitchYawRate(), record["base_angular_vel"])
+
+  def test_max_num_steps(self):
+    log_path = os.path.join(self.get_temp_dir(), "limited.bin")
+    self._write_episode(log_path, num_steps=10, max_num_steps=7, chunk_size=3)
+    episode_log = minitaur_logging.load_episode_log(log_path)
+    self.assertEqual(7, len(episode_log))
+    self.assertAllEqual(np.arange(7), episode_log["base_position"][:, 0])
+
+  def test_empty_episode_leaves_no_file(self):
+    log_path = os.path.join(self.get_temp_dir(), "empty.bin")
+    self.assertIsNone(self._write_episode(log_path, num_steps=0))
+    self.assertFalse(os.path.exists(log_path))
+
+  def test_episode_log_to_proto(self):
+    log_path = os.path.join(self.get_temp_dir(), "proto.bin")
+    self._write_episode(log_path, num_steps=5, chunk_size=2)
+    episode_proto = minitaur_logging.episode_log_to_proto(
+        minitaur_logging.load_episode_log(log_path))
+    self.assertEqual(5, len(episode_proto.state_action))
+    minitaur = MockMinitaur()
+    for step, step_log in enumerate(episode_proto.state_action):
+      minitaur.step = step
+      self.assertEqual(minitaur.IsObservationValid(), step_log.info_valid)
+      time_in_seconds = minitaur.GetTimeSinceReset()
+      self.assertEqual(int(time_in_seconds), step_log.time.seconds)
+      self.assertEqual(
+          int((time_in_seconds - int(time_in_seconds)) * 1e9),
+          step_log.time.nanos)
+      self.assertAllEqual(
+          minitaur.GetMotorAngles(),
+          [motor_state.angle for motor_state in step_log.motor_states])
+      self.assertAllEqual(
+          minitaur.GetMotorTorques(),
+          [motor_state.torque for motor_state in step_log.motor_states])
+      self.assertAllEqual(
+          np.full(minitaur.num_motors, step * 0.5),
+          [motor_state.action for motor_state in step_log.motor_states])
+      self.assertEqual(step, step_log.base_position.x)
+      self.assertEqual(step, step_log.base_orientation.y)
+      self.assertEqual(step, step_log.base_angular_vel.z)
+
+  def test_write_error_is_raised(self):
+    log_path = os.path.join(self.get_temp_dir(), "failing.bin")
+    minitaur = MockMinitaur()
+    writer = minitaur_logging.EpisodeLogWriter(log_path, chunk_size=2)
+    writer._file.close()
+    writer._file = FailingFile()
+    action = np.zeros(minitaur.num_motors)
+    with self.assertRaises(IOError):
+      for _ in range(10):
+        writer.append(minitaur, action)
+    with self.assertRaises(IOError):
+      writer.close()
+
+
+if __name__ == "__main__":
+  tf.test.main()
@@ -4,10 +4,13 @@ import numpy
 from pybullet_envs.minitaur.envs import minitaur_logging
 
 parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-parser.add_argument('--log_file', help='path to protobuf file', default='')
+parser.add_argument('--log_file', help='path to protobuf file, or to a .bin episode log', default='')
 args = parser.parse_args()
-logging = minitaur_logging.MinitaurLogging()
-episode = logging.restore_episode(args.log_file)
+if args.log_file.endswith(".bin"):
+	episode = minitaur_logging.episode_log_to_proto(minitaur_logging.load_episode_log(args.log_file))
+else:
+	logging = minitaur_logging.MinitaurLogging()
+	episode = logging.restore_episode(args.log_file)
 #print(dir (episode))
 #print("episode=",episode)
 fields = episode.ListFields()
@@ -33,22 +33,117 @@ class BehaviorParameters(
         standing_height, desired_incline_angle)
 
 
+# The sign of the swing in the motor angles of each leg.
+_LEG_SWING_SIGNS = np.array([(-1)**(i // 2) for i in range(_NUM_LEGS)])
+# The leg pose indices of the swings and of the extensions of the legs of
+# DIAGONAL_LEG_PAIR_1 and of DIAGONAL_LEG_PAIR_2.
+_LEG_PAIR_POSE_INDICES = np.array(
+    [[pair, np.add(pair, _NUM_LEGS)]
+     for pair in (DIAGONAL_LEG_PAIR_1, DIAGONAL_LEG_PAIR_2)])
+# The leg pair, 0 for DIAGONAL_LEG_PAIR_1 and 1 for DIAGONAL_LEG_PAIR_2, of each
+# leg.
+_LEG_PAIR = np.array(
+    [0 if i in DIAGONAL_LEG_PAIR_1 else 1 for i in range(_NUM_LEGS)])
+
+# The leg kinematics below work on single values as well as on arrays. Leg poses
+# (swing, extension) and foot positions (x, y) are pairs, for arrays the last
+# axis has length 2, so the poses of many legs or robots are converted in one
+# call. Single values take the math module path, which is several times faster
+# than NumPy on scalars.
+
+
+def _stack_pair(first, second):
+  """Stacks two broadcastable arrays along a new last axis of length 2."""
+  pair = np.empty(np.broadcast(first, second).shape + (2,))
+  pair[..., 0] = first
+  pair[..., 1] = second
+  return pair
+
+
+def _unstack_pair(pair):
+  """The inverse of _stack_pair."""
+  pair = np.asarray(pair)
+  return pair[..., 0], pair[..., 1]
+
+
+_Operations = collections.namedtuple("_Operations", [
+    "sin", "cos", "asin", "acos", "atan", "sqrt", "minimum", "maximum", "where",
+    "all", "stack_pair", "unstack_pair"
+])
+
+_SCALAR_OPERATIONS = _Operations(
+    sin=math.sin,
+    cos=math.cos,
+    asin=math.asin,
+    acos=math.acos,
+    atan=math.atan,
+    sqrt=math.sqrt,
+    minimum=min,
+    maximum=max,
+    where=lambda condition, x, y: x if condition else y,
+    all=bool,
+    stack_pair=lambda first, second: (first, second),
+    unstack_pair=lambda pair: pair)
+
+_ARRAY_OPERATIONS = _Operations(
+    sin=np.sin,
+    cos=np.cos,
+    asin=np.arcsin,
+    acos=np.arccos,
+    atan=np.arctan,
+    sqrt=np.sqrt,
+    minimum=np.minimum,
+    maximum=np.maximum,
+    where=np.where,
+    all=np.all,
+    stack_pair=_stack_pair,
+    unstack_pair=_unstack_pair)
+
+
+def _operations(values=(), pairs=()):
+  """Returns the array operations if a value or a pair is a batch."""
+  for value in values:
+    if getattr(value, "ndim", 0) > 0:
+      return _ARRAY_OPERATIONS
+  for pair in pairs:
+    if getattr(pair, "ndim", 1) > 1:
+      return _ARRAY_OPERATIONS
+  return _SCALAR_OPERATIONS
+
+
+def _pair(first, second):
+  """Makes a leg pose or a foot position, a tuple for single values."""
+  return _operations((first, second)).stack_pair(first, second)
+
+
 def motor_angles_to_leg_pose(motor_angles):
-  leg_pose = np.zeros(_NUM_MOTORS)
-  for i in range(_NUM_LEGS):
-    leg_pose[i] = 0.5 * (-1)**(i // 2) * (
-        motor_angles[2 * i + 1] - motor_angles[2 * i])
-    leg_pose[_NUM_LEGS + i] = 0.5 * (
-        motor_angles[2 * i] + motor_angles[2 * i + 1])
-  return leg_pose
+  """Converts the 8 motor angles to the leg swings, then the leg extensions.
+
+  Args:
+    motor_angles: The motor angles, the last axis has length 8.
+
+  Returns:
+    The leg poses, the 4 swings followed by the 4 extensions, with the shape
+    of motor_angles.
+  """
+  motor_angles = np.asarray(motor_angles)
+  first_motor_angles = motor_angles[..., 0::2]
+  second_motor_angles = motor_angles[..., 1::2]
+  return np.concatenate([
+      0.5 * _LEG_SWING_SIGNS * (second_motor_angles - first_motor_angles),
+      0.5 * (first_motor_angles + second_motor_angles)
+  ],
+                        axis=-1)
 
 
 def leg_pose_to_motor_angles(leg_pose):
-  motor_pose = np.zeros(_NUM_MOTORS)
-  for i in range(_NUM_LEGS):
-    motor_pose[2 * i] = leg_pose[_NUM_LEGS + i] - (-1)**(i // 2) * leg_pose[i]
-    motor_pose[2 * i + 1] = (
-        leg_pose[_NUM_LEGS + i] + (-1)**(i // 2) * leg_pose[i])
+  """The inverse of motor_angles_to_leg_pose."""
+  leg_pose = np.asarray(leg_pose)
+  leg_swing = _LEG_SWING_SIGNS * leg_pose[..., :_NUM_LEGS]
+  leg_extension = leg_pose[..., _NUM_LEGS:]
+  motor_pose = np.zeros(leg_pose.shape[:-1] + (_NUM_MOTORS,))
+  motor_pose[..., 0::2] = leg_extension - leg_swing
+  motor_pose[..., 1::2] = leg_extension + leg_swing
   return motor_pose
 
 
@@ -58,14 +153,14 @@ def leg_pose_to_foot_position(leg_pose):
   l2 = _LOWER_SHORT_LEG_LEN
   l3 = _LOWER_LONG_LEG_LEN
 
-  ext = leg_pose[1]
-  alpha = math.asin(l1 * math.sin(ext) / l2)
+  ops = _operations(pairs=(leg_pose,))
+  sw, ext = ops.unstack_pair(leg_pose)
+  alpha = ops.asin(l1 * ops.sin(ext) / l2)
 
-  sw = leg_pose[0]
-  x = l3 * math.sin(alpha + sw) - l1 * math.sin(ext + sw)
-  y = l3 * math.cos(alpha + sw) - l1 * math.cos(ext + sw)
+  x = l3 * ops.sin(alpha + sw) - l1 * ops.sin(ext + sw)
+  y = l3 * ops.cos(alpha + sw) - l1 * ops.cos(ext + sw)
 
-  return (x, -y)
+  return ops.stack_pair(x, -y)
 
 
 def foot_position_to_leg_pose(foot_position):
@@ -74,24 +169,24 @@ def foot_position_to_leg_pose(foot_position):
   l2 = _LOWER_SHORT_LEG_LEN
   l3 = _LOWER_LONG_LEG_LEN
 
-  x = foot_position[0]
-  y = foot_position[1]
-  assert (y < 0)
+  ops = _operations(pairs=(foot_position,))
+  x, y = ops.unstack_pair(foot_position)
+  assert ops.all(y < 0)
   hip_toe_sqr = x**2 + y**2
   cos_beta = (l1 * l1 + l3 * l3 - hip_toe_sqr) / (2 * l1 * l3)
   hip_ankle_sqr = l1 * l1 + l2 * l2 - 2 * l1 * l2 * cos_beta
-  hip_ankle = math.sqrt(hip_ankle_sqr)
+  hip_ankle = ops.sqrt(hip_ankle_sqr)
   cos_ext = -(l1 * l1 + hip_ankle_sqr - l2 * l2) / (2 * l1 * hip_ankle)
-  ext = math.acos(cos_ext)
+  ext = ops.acos(cos_ext)
 
-  hip_toe = math.sqrt(hip_toe_sqr)
+  hip_toe = ops.sqrt(hip_toe_sqr)
   cos_theta = (hip_toe_sqr + hip_ankle_sqr -
                (l3 - l2)**2) / (2 * hip_ankle * hip_toe)
 
-  assert cos_theta > 0
-  theta = math.acos(cos_theta)
-  sw = math.asin(x / hip_toe) - theta
-  return (-sw, ext)
+  assert ops.all(cos_theta > 0)
+  theta = ops.acos(cos_theta)
+  sw = ops.asin(x / hip_toe) - theta
+  return ops.stack_pair(-sw, ext)
 
 
 def foot_horizontal_position_to_leg_swing(foot_horizontal_position,
@@ -104,25 +199,27 @@ def foot_horizontal_position_to_leg_swing(foot_horizontal_position,
   l1 = _UPPER_LEG_LEN
   l2 = _LOWER_SHORT_LEG_LEN
   l3 = _LOWER_LONG_LEG_LEN
+  ops = _operations((foot_horizontal_position, leg_extension))
   ext = leg_extension
-  alpha = math.asin(l1 / l2 * math.sin(ext))
+  alpha = ops.asin(l1 / l2 * ops.sin(ext))
 
-  toe_hip_orth = l3 * math.sin(alpha) - l1 * math.sin(ext)
-  toe_hip_proj = l3 * math.cos(alpha) - l1 * math.cos(ext)
+  toe_hip_orth = l3 * ops.sin(alpha) - l1 * ops.sin(ext)
+  toe_hip_proj = l3 * ops.cos(alpha) - l1 * ops.cos(ext)
 
-  theta = math.atan(toe_hip_orth / toe_hip_proj)
+  theta = ops.atan(toe_hip_orth / toe_hip_proj)
 
   # We may allow theta < 0 for backward foot location.
   # assert theta > 0
 
-  toe_hip_len = math.sqrt(toe_hip_orth**2 + toe_hip_proj**2)
+  toe_hip_len = ops.sqrt(toe_hip_orth**2 + toe_hip_proj**2)
 
   # Cap the foot horizontal (projected) position so the target leg pose is
   # always feasible.
-  foot_position = max(
-      min(toe_hip_len * 0.8, foot_horizontal_position), -toe_hip_len * 0.5)
+  foot_position = ops.maximum(
+      ops.minimum(toe_hip_len * 0.8, foot_horizontal_position),
+      -toe_hip_len * 0.5)
 
-  sw_and_theta = math.asin(foot_position / toe_hip_len)
+  sw_and_theta = ops.asin(foot_position / toe_hip_len)
 
   sw = sw_and_theta - theta
 
@@ -134,8 +231,9 @@ def extension_to_ankle_dist(ext):
   l1 = _UPPER_LEG_LEN
   l2 = _LOWER_SHORT_LEG_LEN
   l3 = _LOWER_LONG_LEG_LEN
-  alpha = math.asin(l1 / l2 * math.sin(ext))
-  return l2 * math.cos(alpha) - l1 * math.cos(ext)
+  ops = _operations((ext,))
+  alpha = ops.asin(l1 / l2 * ops.sin(ext))
+  return l2 * ops.cos(alpha) - l1 * ops.cos(ext)
 
 
 def ankle_dist_to_extension(dist):
@@ -143,24 +241,27 @@ def ankle_dist_to_extension(dist):
   l2 = _LOWER_SHORT_LEG_LEN
   l3 = _LOWER_LONG_LEG_LEN
   cos_ext = -(l1**2 + dist**2 - l2**2) / (2 * l1 * dist)
-  return math.acos(cos_ext)
+  return _operations((cos_ext,)).acos(cos_ext)
 
 
 def generate_swing_trajectory(phase, init_pose, end_pose):
+  ops = _operations((phase,), (init_pose, end_pose))
+  init_sw, init_ext = ops.unstack_pair(init_pose)
+  end_sw, end_ext = ops.unstack_pair(end_pose)
   # Try phase compression
-  normalized_phase = math.sqrt(min(phase * 1.5, 1))
+  normalized_phase = ops.sqrt(ops.minimum(phase * 1.5, 1))
 
   # For swing, we use a linear interpolation:
-  sw = (end_pose[0] - init_pose[0]) * normalized_phase + init_pose[0]
+  sw = (end_sw - init_sw) * normalized_phase + init_sw
 
   # For extension, we can fit a second order polynomial:
-  min_ext = (init_pose[1] + end_pose[1]) / 2 - 0.8
-  min_ext = max(min_ext, 0.5)
+  min_ext = (init_ext + end_ext) / 2 - 0.8
+  min_ext = ops.maximum(min_ext, 0.5)
   phi = 0.7
 
   min_delta = extension_to_ankle_dist(min_ext)
-  init_delta = extension_to_ankle_dist(init_pose[1])
-  end_delta = extension_to_ankle_dist(end_pose[1])
+  init_delta = extension_to_ankle_dist(init_ext)
+  end_delta = extension_to_ankle_dist(end_ext)
 
   # The polynomial is: a * phi^2 + b * phi + c
   delta_1 = min_delta - init_delta
@@ -178,18 +279,46 @@ def generate_swing_trajectory(phase, init_pose, end_pose):
   l1 = _UPPER_LEG_LEN
   l2 = _LOWER_SHORT_LEG_LEN
 
-  delta = min(max(delta, l2 - l1 + 0.01), l2 + l1 - 0.01)
+  delta = ops.minimum(ops.maximum(delta, l2 - l1 + 0.01), l2 + l1 - 0.01)
 
   ext = ankle_dist_to_extension(delta)
 
-  return (sw, ext)
+  return ops.stack_pair(sw, ext)
 
 
 def generate_stance_trajectory(phase, init_pose, end_pose):
-  normalized_phase = math.sqrt(phase)
-  sw = (end_pose[0] - init_pose[0]) * normalized_phase + init_pose[0]
-  ext = end_pose[1]
-  return (sw, ext)
+  ops = _operations((phase,), (init_pose, end_pose))
+  init_sw, _ = ops.unstack_pair(init_pose)
+  end_sw, end_ext = ops.unstack_pair(end_pose)
+  normalized_phase = ops.sqrt(phase)
+  sw = (end_sw - init_sw) * normalized_phase + init_sw
+  return ops.stack_pair(sw, end_ext)
+
+
+def estimate_base_velocity(stance_leg_pose, stance_start_leg_pose, phase,
+                           stance_duration):
+  """Estimates the forward speed of the base from the stance legs.
+
+  Args:
+    stance_leg_pose: The current average pose of the stance legs.
+    stance_start_leg_pose: Their average pose at the start of the stance.
+    phase: The stance/swing phase in [0, 1).
+    stance_duration: The duration of a stance.
+
+  Returns:
+    The forward speed, 0 early in the stance.
+  """
+  # TODO(tingnan): consider using a sensor fusion.
+  ops = _operations((phase, stance_duration),
+                    (stance_leg_pose, stance_start_leg_pose))
+  delta_sw = (ops.unstack_pair(stance_leg_pose)[0] -
+              ops.unstack_pair(stance_start_leg_pose)[0])
+
+  x, y = ops.unstack_pair(leg_pose_to_foot_position(stance_leg_pose))
+  toe_hip_len = ops.sqrt(x**2 + y**2)
+  horizontal_dist = toe_hip_len * delta_sw
+  return ops.where(phase < 0.1, 0,
+                   horizontal_dist / (stance_duration * ops.maximum(phase, 0.1)))
 
 
 class RaibertSwingLegController(object):
@@ -202,44 +331,51 @@ class RaibertSwingLegController(object):
     self._leg_extension_clearance = leg_extension_clearance
     self._leg_trajectory_generator = leg_trajectory_generator
 
-  def get_action(self, raibiert_controller):
-    current_speed = raibiert_controller.estimate_base_velocity()
-    phase = raibiert_controller.get_phase()
+  def get_leg_pose(self, raibiert_controller):
+    """Computes the desired pose of the swing legs, which all share it.
 
-    leg_pose_set = []
-    for i in raibiert_controller.swing_set:
-      target_foot_horizontal_position = (
-          raibiert_controller.behavior_parameters.stance_duration / 2 *
-          current_speed + self._speed_gain *
-          (current_speed -
-           raibiert_controller.behavior_parameters.desired_forward_speed))
+    Args:
+      raibiert_controller: A MinitaurRaibertTrottingController, or a
+        BatchRaibertTrottingController to get the poses of all of its robots.
 
-      # Use the swing phase [0, 1] to track the foot. The idea is
-      # straightforward:
-      # 1) Calculate the target swing and leg extension based on target foot position.
-      # 2) Generate a smooth Bezier curve between current leg pose and target pose
-      # 3) Find the next leg pose on the curve based on how much time left.
+    Returns:
+      The desired (swing, extension) of the swing legs.
+    """
+    current_speed = raibiert_controller.estimate_base_velocity()
+    phase = raibiert_controller.get_phase()
 
-      # 1) Convert the target foot
-      target_leg_extension = (
-          raibiert_controller.nominal_leg_extension -
-          self._leg_extension_clearance)
-      target_leg_swing = foot_horizontal_position_to_leg_swing(
-          target_foot_horizontal_position, leg_extension=target_leg_extension)
+    target_foot_horizontal_position = (
+        raibiert_controller.behavior_parameters.stance_duration / 2 *
+        current_speed + self._speed_gain *
+        (current_speed -
+         raibiert_controller.behavior_parameters.desired_forward_speed))
 
-      target_leg_pose = (target_leg_swing, target_leg_extension)
+    # Use the swing phase [0, 1] to track the foot. The idea is
+    # straightforward:
+    # 1) Calculate the target swing and leg extension based on target foot position.
+    # 2) Generate a smooth Bezier curve between current leg pose and target pose
+    # 3) Find the next leg pose on the curve based on how much time left.
 
-      # 2) Generates the curve from the current leg pose to the target leg pose.
-      # and Find the next leg pose on the curve based on current swing phase.
+    # 1) Convert the target foot
+    target_leg_extension = (
+        raibiert_controller.nominal_leg_extension -
+        self._leg_extension_clearance)
+    target_leg_swing = foot_horizontal_position_to_leg_swing(
+        target_foot_horizontal_position, leg_extension=target_leg_extension)
 
-      desired_leg_pose = self._leg_trajectory_generator(
-          phase, raibiert_controller.swing_start_leg_pose, target_leg_pose)
+    target_leg_pose = _pair(target_leg_swing, target_leg_extension)
 
-      leg_pose_set.append(desired_leg_pose)
+    # 2) Generates the curve from the current leg pose to the target leg pose.
+    # and Find the next leg pose on the curve based on current swing phase.
 
     # 3) adjust the pose with a feedback term to maintain leg height
 
-    return leg_pose_set
+    return self._leg_trajectory_generator(
+        phase, raibiert_controller.swing_start_leg_pose, target_leg_pose)
+
+  def get_action(self, raibiert_controller):
+    return [self.get_leg_pose(raibiert_controller)] * len(
+        raibiert_controller.swing_set)
 
 
 class RaibertStanceLegController(object):
@@ -250,29 +386,37 @@ class RaibertStanceLegController(object):
     self._speed_gain = speed_gain
     self._leg_trajectory_generator = leg_trajectory_generator
 
-  def get_action(self, raibiert_controller):
-    phase = raibiert_controller.get_phase()
-    current_speed = raibiert_controller.estimate_base_velocity()
-    leg_pose_set = []
-    for i in raibiert_controller.stance_set:
-      desired_forward_speed = (
-          raibiert_controller.behavior_parameters.desired_forward_speed)
-      target_foot_position = -(
-          raibiert_controller.behavior_parameters.stance_duration / 2 *
-          current_speed - self._speed_gain *
-          (current_speed - desired_forward_speed))
+  def get_leg_pose(self, raibiert_controller):
+    """Computes the desired pose of the stance legs, which all share it.
 
-      target_leg_pose = (foot_horizontal_position_to_leg_swing(
-          target_foot_position,
-          leg_extension=raibiert_controller.nominal_leg_extension),
-                         raibiert_controller.nominal_leg_extension)
+    Args:
+      raibiert_controller: A MinitaurRaibertTrottingController, or a
+        BatchRaibertTrottingController to get the poses of all of its robots.
 
-      desired_leg_pose = self._leg_trajectory_generator(
-          phase, raibiert_controller.stance_start_leg_pose, target_leg_pose)
-
-      leg_pose_set.append(desired_leg_pose)
+    Returns:
+      The desired (swing, extension) of the stance legs.
+    """
+    phase = raibiert_controller.get_phase()
+    current_speed = raibiert_controller.estimate_base_velocity()
+    desired_forward_speed = (
+        raibiert_controller.behavior_parameters.desired_forward_speed)
+    target_foot_position = -(
+        raibiert_controller.behavior_parameters.stance_duration / 2 *
+        current_speed - self._speed_gain *
+        (current_speed - desired_forward_speed))
+
+    target_leg_pose = _pair(
+        foot_horizontal_position_to_leg_swing(
+            target_foot_position,
+            leg_extension=raibiert_controller.nominal_leg_extension),
+        raibiert_controller.nominal_leg_extension)
+
+    return self._leg_trajectory_generator(
+        phase, raibiert_controller.stance_start_leg_pose, target_leg_pose)
 
-    return leg_pose_set
+  def get_action(self, raibiert_controller):
+    return [self.get_leg_pose(raibiert_controller)] * len(
+        raibiert_controller.stance_set)
 
 
 class MinitaurRaibertTrottingController(object):
@@ -332,16 +476,17 @@ class MinitaurRaibertTrottingController(object):
 
   def _get_average_leg_pose(self, leg_indices):
     """Get the average leg pose."""
-    current_leg_pose = motor_angles_to_leg_pose(self._robot.GetMotorAngles())
+    current_leg_pose = motor_angles_to_leg_pose(
+        self._robot.GetMotorAngles()).tolist()
 
     # extract the swing leg pose from the current_leg_pose
-    leg_pose = []
+    leg_swing = 0
+    leg_extension = 0
     for index in leg_indices:
-      leg_pose.append(
-          [current_leg_pose[index], current_leg_pose[index + _NUM_LEGS]])
-
-    leg_pose = np.array(leg_pose)
-    return np.mean(leg_pose, axis=0)
+      leg_swing += current_leg_pose[index]
+      leg_extension += current_leg_pose[index + _NUM_LEGS]
+    return np.array([leg_swing / len(leg_indices),
+                     leg_extension / len(leg_indices)])
 
   def get_swing_leg_pose(self):
     """Get the current swing legs' average pose."""
@@ -378,18 +523,9 @@ class MinitaurRaibertTrottingController(object):
       self._stance_start_leg_pose = self.get_stance_leg_pose()
 
   def estimate_base_velocity(self):
-    # TODO(tingnan): consider using a sensor fusion.
-    stance_leg_pose = self.get_stance_leg_pose()
-
-    delta_sw = stance_leg_pose[0] - self._stance_start_leg_pose[0]
-
-    x, y = leg_pose_to_foot_position(stance_leg_pose)
-    toe_hip_len = math.sqrt(x**2 + y**2)
-    horizontal_dist = toe_hip_len * delta_sw
-    phase = self.get_phase()
-    speed = 0 if phase < 0.1 else horizontal_dist / (
-        self._behavior_parameters.stance_duration * phase)
-    return speed
+    return estimate_base_velocity(self.get_stance_leg_pose(),
+                                  self._stance_start_leg_pose, self.get_phase(),
+                                  self._behavior_parameters.stance_duration)
 
   def get_swing_leg_action(self):
     return self._swing_leg_controller.get_action(self)
@@ -399,18 +535,156 @@ class MinitaurRaibertTrottingController(object):
 
   def get_action(self):
     leg_pose = [0] * _NUM_MOTORS
-    swing_leg_pose = self.get_swing_leg_action()
-    j = 0
-    for i in self._swing_set:
-      leg_pose[i] = swing_leg_pose[j][0]
-      leg_pose[i + _NUM_LEGS] = swing_leg_pose[j][1]
-      j += 1
-
-    stance_leg_pose = self.get_stance_leg_action()
-    j = 0
-    for i in self._stance_set:
-      leg_pose[i] = stance_leg_pose[j][0]
-      leg_pose[i + _NUM_LEGS] = stance_leg_pose[j][1]
-      j += 1
+    for leg_set, leg_set_pose in ((self._swing_set,
+                                   self.get_swing_leg_action()),
+                                  (self._stance_set,
+                                   self.get_stance_leg_action())):
+      for i, (leg_swing, leg_extension) in zip(leg_set, leg_set_pose):
+        leg_pose[i] = leg_swing
+        leg_pose[i + _NUM_LEGS] = leg_extension
+
+    return leg_pose_to_motor_angles(leg_pose)
+
+
+class BatchRaibertTrottingController(object):
+  """A Raibert style trotting controller for a batch of Minitaurs.
+
+  Steps like one MinitaurRaibertTrottingController per robot, but the legs of
+  all robots are computed with array operations. It gets the motor angles of
+  the robots instead of the robots, e.g. from the observations of a batch of
+  Minitaur gym envs, whose first 8 values are the motor angles.
+  """
+
+  def __init__(self,
+               motor_angles,
+               behavior_parameters=BehaviorParameters(),
+               swing_leg_controller=RaibertSwingLegController(),
+               stance_leg_controller=RaibertStanceLegController()):
+    """Initializes the controller.
+
+    Args:
+      motor_angles: The current motor angles of the robots, with shape
+        (number of robots, 8).
+      behavior_parameters: The BehaviorParameters. Each field is either shared
+        by all robots or an array with one value per robot.
+      swing_leg_controller: Computes the pose of the swing legs.
+      stance_leg_controller: Computes the pose of the stance legs.
+    """
+    motor_angles = np.asarray(motor_angles)
+    self._num_robots = len(motor_angles)
+    self._time = np.zeros(self._num_robots)
+    self._behavior_parameters = behavior_parameters
+
+    # One nominal extension per robot, even if the standing height is shared.
+    standing_height = (
+        np.zeros(self._num_robots) + self._behavior_parameters.standing_height)
+    nominal_leg_pose = foot_position_to_leg_pose(
+        _stack_pair(0, -standing_height))
+    self._nominal_leg_extension = nominal_leg_pose[:, 1]
+
+    self._swing_leg_controller = swing_leg_controller
+    self._stance_leg_controller = stance_leg_controller
+
+    # Whether DIAGONAL_LEG_PAIR_1 is swinging, for each robot.
+    self._is_pair_1_swinging = np.ones(self._num_robots, dtype=bool)
+    self._set_leg_pose(motor_angles)
+    self._swing_start_leg_pose = self.get_swing_leg_pose()
+    self._stance_start_leg_pose = self.get_stance_leg_pose()
+    self._base_velocity = None
+
+  @property
+  def behavior_parameters(self):
+    return self._behavior_parameters
+
+  @behavior_parameters.setter
+  def behavior_parameters(self, behavior_parameters):
+    self._behavior_parameters = behavior_parameters
+
+  @property
+  def nominal_leg_extension(self):
+    return self._nominal_leg_extension
+
+  @property
+  def is_pair_1_swinging(self):
+    return self._is_pair_1_swinging
 
+  @property
+  def swing_start_leg_pose(self):
+    return self._swing_start_leg_pose
+
+  @property
+  def stance_start_leg_pose(self):
+    return self._stance_start_leg_pose
+
+  def _set_leg_pose(self, motor_angles):
+    """Computes the average pose of each leg pair of each robot."""
+    leg_pose = motor_angles_to_leg_pose(motor_angles)
+    # The (swing, extension) of DIAGONAL_LEG_PAIR_1 and DIAGONAL_LEG_PAIR_2.
+    self._leg_pair_pose = np.mean(leg_pose[:, _LEG_PAIR_POSE_INDICES], axis=-1)
+
+  def get_swing_leg_pose(self):
+    """Get the current swing legs' average pose of each robot."""
+    return np.where(self._is_pair_1_swinging[:, np.newaxis],
+                    self._leg_pair_pose[:, 0], self._leg_pair_pose[:, 1])
+
+  def get_stance_leg_pose(self):
+    """Get the current stance legs' average pose of each robot."""
+    return np.where(self._is_pair_1_swinging[:, np.newaxis],
+                    self._leg_pair_pose[:, 1], self._leg_pair_pose[:, 0])
+
+  def get_phase(self):
+    """Compute the current stance/swing phase of each robot."""
+    return np.fmod(self._time, self._behavior_parameters.stance_duration
+                  ) / self._behavior_parameters.stance_duration
+
+  def update(self, t, motor_angles):
+    """Switches the swing/stance legs of the robots based on timing.
+
+    Args:
+      t: The time since the reset, shared by all robots or one per robot.
+      motor_angles: The current motor angles of the robots, with shape
+        (number of robots, 8).
+    """
+    self._time = np.zeros(self._num_robots) + t
+    self._set_leg_pose(motor_angles)
+    swing_stance_phase = np.fmod(
+        self._time, 2 * self._behavior_parameters.stance_duration)
+    is_pair_1_swinging = (
+        swing_stance_phase < self._behavior_parameters.stance_duration)
+
+    # If there is a stance/swing switch, also records the starting pose.
+    switched = is_pair_1_swinging != self._is_pair_1_swinging
+    if np.any(switched):
+      self._is_pair_1_swinging = is_pair_1_swinging
+      self._swing_start_leg_pose = np.where(switched[:, np.newaxis],
+                                            self.get_swing_leg_pose(),
+                                            self._swing_start_leg_pose)
+      self._stance_start_leg_pose = np.where(switched[:, np.newaxis],
+                                             self.get_stance_leg_pose(),
+                                             self._stance_start_leg_pose)
+    self._base_velocity = None
+
+  def estimate_base_velocity(self):
+    # The swing and the stance leg controllers both need it.
+    if self._base_velocity is None:
+      self._base_velocity = estimate_base_velocity(
+          self.get_stance_leg_pose(), self._stance_start_leg_pose,
+          self.get_phase(), self._behavior_parameters.stance_duration)
+    return self._base_velocity
+
+  def get_action(self):
+    """Computes the motor angles of the robots.
+
+    Returns:
+      The desired motor angles, with shape (number of robots, 8).
+    """
+    swing_leg_pose = self._swing_leg_controller.get_leg_pose(self)
+    stance_leg_pose = self._stance_leg_controller.get_leg_pose(self)
+    # The (swing, extension) of DIAGONAL_LEG_PAIR_1 and DIAGONAL_LEG_PAIR_2.
+    leg_pair_pose = np.where(
+        self._is_pair_1_swinging[:, np.newaxis, np.newaxis],
+        np.stack([swing_leg_pose, stance_leg_pose], axis=1),
+        np.stack([stance_leg_pose, swing_leg_pose], axis=1))
+    leg_pose = leg_pair_pose[:, _LEG_PAIR].transpose(0, 2, 1).reshape(
+        self._num_robots, _NUM_MOTORS)
     return leg_pose_to_motor_angles(leg_pose)
@@ -12,6 +12,7 @@ parentdir = os.path.dirname(os.path.dirname(os.path.dirname(currentdir)))
 os.sys.path.insert(0,parentdir)
 
 
+import numpy as np
 import tensorflow as tf
 from pybullet_envs.minitaur.envs import minitaur_raibert_controller
 from pybullet_envs.minitaur.envs import minitaur_gym_env
@@ -25,6 +26,9 @@ flags.DEFINE_float(
     "control_latency", 0.02, "The latency between sensor measurement and action"
     " execution the robot.")
 flags.DEFINE_string("log_path", None, "The directory to write the log file.")
+flags.DEFINE_integer(
+    "num_robots", 1, "The number of robots. More than one are driven by one "
+    "BatchRaibertTrottingController, without rendering.")
 
 
 def speed(t):
@@ -36,23 +40,57 @@ def speed(t):
     return -max_speed
 
 
+def make_env(render):
+  return minitaur_gym_env.MinitaurGymEnv(
+      urdf_version=minitaur_gym_env.RAINBOW_DASH_V0_URDF_VERSION,
+      control_time_step=0.006,
+      action_repeat=6,
+      pd_latency=0.003,
+      control_latency=FLAGS.control_latency,
+      motor_kp=FLAGS.motor_kp,
+      motor_kd=FLAGS.motor_kd,
+      remove_default_joint_damping=True,
+      leg_model_enabled=False,
+      render=render,
+      on_rack=False,
+      accurate_motor_model_enabled=True,
+      log_path=FLAGS.log_path)
+
+
+def run_batch(num_robots):
+  """Drives a batch of robots, each with a different maximum speed."""
+  envs = [make_env(render=False) for _ in range(num_robots)]
+  try:
+    for env in envs:
+      env.reset()
+    max_speed_ratios = np.linspace(1, 0.5, num_robots)
+
+    controller = minitaur_raibert_controller.BatchRaibertTrottingController(
+        np.array([env.minitaur.GetMotorAngles() for env in envs]))
+
+    tstart = np.array([env.minitaur.GetTimeSinceReset() for env in envs])
+    for _ in range(1000):
+      t = np.array([env.minitaur.GetTimeSinceReset() for env in envs]) - tstart
+      controller.behavior_parameters = (
+          minitaur_raibert_controller.BehaviorParameters(
+              desired_forward_speed=max_speed_ratios *
+              np.array([speed(robot_t) for robot_t in t])))
+      controller.update(
+          t, np.array([env.minitaur.GetMotorAngles() for env in envs]))
+      for env, action in zip(envs, controller.get_action()):
+        env.step(action)
+  finally:
+    for env in envs:
+      env.close()
+
+
 def main(argv):
   del argv
+  if FLAGS.num_robots > 1:
+    run_batch(FLAGS.num_robots)
+    return
   try:
-    env = minitaur_gym_env.MinitaurGymEnv(
-        urdf_version=minitaur_gym_env.RAINBOW_DASH_V0_URDF_VERSION,
-        control_time_step=0.006,
-        action_repeat=6,
-        pd_latency=0.003,
-        control_latency=FLAGS.control_latency,
-        motor_kp=FLAGS.motor_kp,
-        motor_kd=FLAGS.motor_kd,
-        remove_default_joint_damping=True,
-        leg_model_enabled=False,
-        render=True,
-        on_rack=False,
-        accurate_motor_model_enabled=True,
-        log_path=FLAGS.log_path)
+    env = make_env(render=True)
     env.reset()
 
     controller = minitaur_raibert_controller.MinitaurRaibertTrottingController(
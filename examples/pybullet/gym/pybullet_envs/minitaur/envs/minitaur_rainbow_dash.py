@@ -42,24 +42,18 @@ class MinitaurRainbowDash(minitaur.Minitaur):
       init_position = minitaur.INIT_POSITION
     if reload_urdf:
       if self._self_collision_enabled:
-        self.quadruped = self._pybullet_client.loadURDF(
+        self._LoadUrdf(
             "%s/quadruped/minitaur_rainbow_dash.urdf" % self._urdf_root,
             init_position,
-            useFixedBase=self._on_rack,
             flags=(
                 self._pybullet_client.URDF_USE_SELF_COLLISION_EXCLUDE_PARENT))
       else:
-        self.quadruped = self._pybullet_client.loadURDF(
+        self._LoadUrdf(
             "%s/quadruped/minitaur_rainbow_dash.urdf" % self._urdf_root,
-            init_position,
-            useFixedBase=self._on_rack)
-      self._BuildJointNameToIdDict()
-      self._BuildUrdfIds()
+            init_position)
       if self._remove_default_joint_damping:
         self._RemoveDefaultJointDamping()
       self._BuildMotorIdList()
-      self._RecordMassInfoFromURDF()
-      self._RecordInertiaInfoFromURDF()
       self.ResetPose(add_constraint=True)
     else:
       self._pybullet_client.resetBasePositionAndOrientation(
@@ -24,6 +24,9 @@ class MotorModel(object):
 
   The internal motor model takes the following factors into consideration:
   pd gains, viscous friction, back-EMF voltage and current-torque profile.
+
+  All inputs can be arrays of shape [NUM_MOTORS] for one robot, or of shape
+  [N, NUM_MOTORS] to convert a batch of robots or sub-steps in one call.
   """
 
   def __init__(self, torque_control_enabled=False, kp=1.2, kd=0):
@@ -34,9 +37,9 @@ class MotorModel(object):
     self._voltage = MOTOR_VOLTAGE
     self._torque_constant = MOTOR_TORQUE_CONSTANT
     self._viscous_damping = MOTOR_VISCOUS_DAMPING
-    self._current_table = [0, 10, 20, 30, 40, 50, 60]
-    self._torque_table = [0, 1, 1.9, 2.45, 3.0, 3.25, 3.5]
-    self._strength_ratios = [1.0] * NUM_MOTORS
+    self._current_table = np.array([0, 10, 20, 30, 40, 50, 60], dtype=float)
+    self._torque_table = np.array([0, 1, 1.9, 2.45, 3.0, 3.25, 3.5])
+    self._strength_ratios = np.ones(NUM_MOTORS)
 
   def set_strength_ratios(self, ratios):
     """Set the strength of each motors relative to the default value.
@@ -101,15 +104,16 @@ class MotorModel(object):
       observed_torque: The torque observed by the sensor.
     """
     if self._torque_control_enabled:
-      pwm = motor_commands
+      pwm = np.asarray(motor_commands)
     else:
       if kp is None:
-        kp = np.full(NUM_MOTORS, self._kp)
+        kp = self._kp
       if kd is None:
-        kd = np.full(NUM_MOTORS, self._kd)
-      pwm = -1 * kp * (motor_angle - motor_commands) - kd * motor_velocity
+        kd = self._kd
+      pwm = -1 * np.asarray(kp) * (np.asarray(motor_angle) - motor_commands
+                                  ) - np.asarray(kd) * motor_velocity
 
-    pwm = np.clip(pwm, -1.0, 1.0)
+    pwm = _clip(pwm, -1.0, 1.0)
     return self._convert_to_torque_from_pwm(pwm, true_motor_velocity)
 
   def _convert_to_torque_from_pwm(self, pwm, true_motor_velocity):
@@ -123,22 +127,24 @@ class MotorModel(object):
       actual_torque: The torque that needs to be applied to the motor.
       observed_torque: The torque observed by the sensor.
     """
-    observed_torque = np.clip(
-        self._torque_constant *
-        (np.asarray(pwm) * self._voltage / self._resistance),
+    pwm_voltage = np.asarray(pwm) * self._voltage
+    observed_torque = _clip(
+        self._torque_constant * (pwm_voltage / self._resistance),
         -OBSERVED_TORQUE_LIMIT, OBSERVED_TORQUE_LIMIT)
 
     # Net voltage is clipped at 50V by diodes on the motor controller.
-    voltage_net = np.clip(
-        np.asarray(pwm) * self._voltage -
-        (self._torque_constant + self._viscous_damping) *
+    voltage_net = _clip(
+        pwm_voltage - (self._torque_constant + self._viscous_damping) *
         np.asarray(true_motor_velocity), -VOLTAGE_CLIPPING, VOLTAGE_CLIPPING)
     current = voltage_net / self._resistance
-    current_sign = np.sign(current)
-    current_magnitude = np.absolute(current)
     # Saturate torque based on empirical current relation.
-    actual_torque = np.interp(current_magnitude, self._current_table,
-                              self._torque_table)
-    actual_torque = np.multiply(current_sign, actual_torque)
-    actual_torque = np.multiply(self._strength_ratios, actual_torque)
+    actual_torque = np.interp(
+        np.absolute(current), self._current_table, self._torque_table)
+    actual_torque *= np.sign(current)
+    actual_torque *= self._strength_ratios
     return actual_torque, observed_torque
+
+
+def _clip(values, lower, upper):
+  """np.clip for arrays without NaNs, without its overhead on small arrays."""
+  return np.minimum(np.maximum(values, lower), upper)
@@ -19,6 +19,7 @@ class XmlBasedRobot:
 		self.objects = []
 		self.jdict = None
 		self.ordered_joints = None
+		self.joint_states = None
 		self.robot_body = None
 
 		high = np.ones([action_dim])
@@ -224,6 +225,7 @@ class BodyPart:
 		self._p = bullet_client
 		self.bodyIndex = bodyIndex
 		self.bodyPartIndex = bodyPartIndex
+		self.body_states = None
 		self.initialPosition = self.current_position()
 		self.initialOrientation = self.current_orientation()
 		self.bp_pose = Pose_Helper(self)
@@ -238,9 +240,13 @@ class BodyPart:
 	def get_position(self): return self.current_position()
 
 	def get_pose(self):
+		if self.body_states is not None:
+			return self.body_states.pose(self.bodyPartIndex)
 		return self.state_fields_of_pose_of(self.bodies[self.bodyIndex], self.bodyPartIndex)
 
 	def speed(self):
+		if self.body_states is not None:
+			return self.body_states.speed(self.bodyPartIndex)
 		if self.bodyPartIndex == -1:
 			(vx, vy, vz), _ = self._p.getBaseVelocity(self.bodies[self.bodyIndex])
 		else:
@@ -258,23 +264,137 @@ class BodyPart:
 
 	def reset_position(self, position):
 		self._p.resetBasePositionAndOrientation(self.bodies[self.bodyIndex], position, self.get_orientation())
+		self.invalidate_states()
 
 	def reset_orientation(self, orientation):
 		self._p.resetBasePositionAndOrientation(self.bodies[self.bodyIndex], self.get_position(), orientation)
+		self.invalidate_states()
 
 	def reset_velocity(self, linearVelocity=[0,0,0], angularVelocity =[0,0,0]):
 		self._p.resetBaseVelocity(self.bodies[self.bodyIndex], linearVelocity, angularVelocity)
+		self.invalidate_states()
 
 	def reset_pose(self, position, orientation):
 		self._p.resetBasePositionAndOrientation(self.bodies[self.bodyIndex], position, orientation)
+		self.invalidate_states()
 
 	def pose(self):
 		return self.bp_pose
 
+	def invalidate_states(self):
+		if self.body_states is not None:
+			self.body_states.invalidate()
+
 	def contact_list(self):
 		return self._p.getContactPoints(self.bodies[self.bodyIndex], -1, self.bodyPartIndex, -1)
 
 
+def current_step(scene):
+	return scene.step_counter if scene is not None else 0
+
+
+class BodyStates:
+	"""
+	Per-step cache of the base and link states of one body. All links are read at once with
+	getLinkStates, and the cache is refreshed on the first read after each global_step() of the scene.
+	Row 0 of the arrays is the base, row i+1 is link i.
+	"""
+	def __init__(self, bullet_client, body_id, scene):
+		self._p = bullet_client
+		self.body_id = body_id
+		self.scene = scene
+		self.link_indices = list(range(self._p.getNumJoints(body_id)))
+		self.poses = np.zeros((len(self.link_indices) + 1, 7))
+		self.speeds = np.zeros((len(self.link_indices) + 1, 3))
+		self.poses_step = None
+		self.speeds_step = None
+
+	def invalidate(self):
+		self.poses_step = None
+		self.speeds_step = None
+
+	def pose(self, link_id):
+		step = current_step(self.scene)
+		if self.poses_step != step:
+			pos, orn = self._p.getBasePositionAndOrientation(self.body_id)
+			self.poses[0, :3] = pos
+			self.poses[0, 3:] = orn
+			if self.link_indices:
+				states = self._p.getLinkStates(self.body_id, self.link_indices)
+				self.poses[1:, :3] = [s[0] for s in states]
+				self.poses[1:, 3:] = [s[1] for s in states]
+			self.poses_step = step
+		return self.poses[link_id + 1].copy()
+
+	def speed(self, link_id):
+		step = current_step(self.scene)
+		if self.speeds_step != step:
+			self.speeds[0], _ = self._p.getBaseVelocity(self.body_id)
+			if self.link_indices:
+				states = self._p.getLinkStates(self.body_id, self.link_indices, computeLinkVelocity=1)
+				self.speeds[1:] = [s[6] for s in states]
+			self.speeds_step = step
+		return self.speeds[link_id + 1].copy()
+
+
+class JointStates:
+	"""
+	Snapshot of the positions and velocities of a list of joints, read with a single
+	getJointStates call per body. Joints attached to the snapshot read their state from it.
+	If a scene is given, the snapshot is refreshed on the first read after each global_step().
+	"""
+	def __init__(self, bullet_client, joints, scene=None):
+		self._p = bullet_client
+		self.scene = scene
+		self.joints = list(joints)
+		self.position = np.zeros(len(self.joints))
+		self.velocity = np.zeros(len(self.joints))
+		self.lower_limits = np.array([j.lowerLimit for j in self.joints])
+		self.upper_limits = np.array([j.upperLimit for j in self.joints])
+		self.mid_points = 0.5 * (self.lower_limits + self.upper_limits)
+		self.ranges = self.upper_limits - self.lower_limits
+		self.valid_step = None
+
+		# group the joints per body, so every body is read with one call
+		self.body_groups = []
+		groups = {}
+		for n, j in enumerate(self.joints):
+			body_id = j.bodies[j.bodyIndex]
+			if body_id not in groups:
+				groups[body_id] = ([], [])
+				self.body_groups.append((body_id,) + groups[body_id])
+			groups[body_id][0].append(j.jointIndex)
+			groups[body_id][1].append(n)
+			j.joint_states = self
+			j.state_index = n
+
+	def update(self):
+		for body_id, joint_indices, slots in self.body_groups:
+			states = self._p.getJointStates(body_id, joint_indices)
+			self.position[slots] = [s[0] for s in states]
+			self.velocity[slots] = [s[1] for s in states]
+		self.valid_step = current_step(self.scene)
+
+	def invalidate(self):
+		self.valid_step = None
+
+	def fetch(self):
+		if self.valid_step != current_step(self.scene):
+			self.update()
+		return self
+
+	def relative_position(self):
+		"""
+		Positions scaled to -1..+1 between the joint limits and scaled velocities, interleaved
+		as [pos0, vel0, pos1, vel1, ...] like Joint.current_relative_position().
+		"""
+		self.fetch()
+		j = np.empty(2 * len(self.joints))
+		j[0::2] = 2 * (self.position - self.mid_points) / self.ranges
+		j[1::2] = 0.1 * self.velocity
+		return j
+
+
 class Joint:
 	def __init__(self, bullet_client, joint_name, bodies, bodyIndex, jointIndex):
 		self.bodies = bodies
@@ -282,6 +402,9 @@ class Joint:
 		self.bodyIndex = bodyIndex
 		self.jointIndex = jointIndex
 		self.joint_name = joint_name
+		self.joint_states = None
+		self.state_index = None
+		self.body_states = None
 
 		jointInfo = self._p.getJointInfo(self.bodies[self.bodyIndex], self.jointIndex)
 		self.lowerLimit = jointInfo[8]
@@ -291,6 +414,7 @@ class Joint:
 
 	def set_state(self, x, vx):
 		self._p.resetJointState(self.bodies[self.bodyIndex], self.jointIndex, x, vx)
+		self.invalidate_states()
 
 	def current_position(self): # just some synonyme method
 		return self.get_state()
@@ -304,6 +428,9 @@ class Joint:
 		)
 
 	def get_state(self):
+		if self.joint_states is not None:
+			states = self.joint_states.fetch()
+			return states.position[self.state_index], states.velocity[self.state_index]
 		x, vx,_,_ = self._p.getJointState(self.bodies[self.bodyIndex],self.jointIndex)
 		return x, vx
 
@@ -336,7 +463,15 @@ class Joint:
 
 	def reset_position(self, position, velocity):
 		self._p.resetJointState(self.bodies[self.bodyIndex],self.jointIndex,targetValue=position, targetVelocity=velocity)
+		self.invalidate_states()
 		self.disable_motor()
 
+	def invalidate_states(self):
+		"A reset joint moves the links below it, so the link states of its body are stale as well"
+		if self.joint_states is not None:
+			self.joint_states.invalidate()
+		if self.body_states is not None:
+			self.body_states.invalidate()
+
 	def disable_motor(self):
 		self._p.setJointMotorControl2(self.bodies[self.bodyIndex],self.jointIndex,controlMode=pybullet.POSITION_CONTROL, targetPosition=0, targetVelocity=0, positionGain=0.1, velocityGain=0.1, force=0)
@@ -3,7 +3,8 @@ import numpy as np
 import pybullet 
 import os
 import pybullet_data
-from robot_bases import BodyPart
+from robot_bases import BodyPart, BodyStates, JointStates
+from pybullet_utils.joint_motor_array import JointMotorArray
 
 class WalkerBase(MJCFBasedRobot):
 	def __init__(self,  fn, robot_name, action_dim, obs_dim, power):
@@ -19,19 +20,57 @@ class WalkerBase(MJCFBasedRobot):
 		self._p = bullet_client
 		for j in self.ordered_joints:
 			j.reset_current_position(self.np_random.uniform(low=-0.1, high=0.1), 0)
+		self.joint_states = JointStates(self._p, self.ordered_joints, self.scene)
+		self.cache_body_states()
+		self.motor_array = self.create_motor_array(self.ordered_joints)
+		self.motor_gains = None
 
 		self.feet = [self.parts[f] for f in self.foot_list]
 		self.feet_contact = np.array([0.0 for f in self.foot_list], dtype=np.float32)
+		self.feet_by_body = {}
+		for i, f in enumerate(self.feet):
+			feet_index, feet_links = self.feet_by_body.setdefault(f.bodies[f.bodyIndex], ([], []))
+			feet_index.append(i)
+			feet_links.append(f.bodyPartIndex)
 		self.scene.actor_introduce(self)
 		self.initial_z = None
 
+	def cache_body_states(self):
+		"Share one per-step BodyStates cache between all parts of the same body, joint resets invalidate it"
+		body_states = {}
+		for part in self.parts.values():
+			body_id = part.bodies[part.bodyIndex]
+			if body_id not in body_states:
+				body_states[body_id] = BodyStates(self._p, body_id, self.scene)
+			part.body_states = body_states[body_id]
+		for joint in self.jdict.values():
+			joint.body_states = body_states.get(joint.bodies[joint.bodyIndex])
+
+	def calc_feet_contact(self, ground_ids):
+		"""Set feet_contact from one getContactPoints query per body, instead of one per foot.
+		ground_ids is an array of (bodyUniqueId, linkIndex) rows a foot has to touch to count as contact."""
+		self.feet_contact[:] = 0.0
+		for body_id, (feet_index, feet_links) in self.feet_by_body.items():
+			contacts = self._p.getContactPoints(bodyA=body_id)
+			if not contacts:
+				continue
+			c = np.array([x[2:5] for x in contacts])  # bodyUniqueIdB, linkIndexA, linkIndexB
+			on_ground = ((c[:, None, 0] == ground_ids[:, 0]) & (c[:, None, 2] == ground_ids[:, 1])).any(axis=1)
+			self.feet_contact[feet_index] = np.isin(feet_links, c[on_ground, 1])
+
+	def create_motor_array(self, joints):
+		# all joints of a walker belong to the same body
+		return JointMotorArray(self._p, joints[0].bodies[joints[0].bodyIndex], [j.jointIndex for j in joints])
+
 	def apply_action(self, a):
 		assert (np.isfinite(a).all())
-		for n, j in enumerate(self.ordered_joints):
-			j.set_motor_torque(self.power * j.power_coef * float(np.clip(a[n], -1, +1)))
+		if self.motor_gains is None:
+			# computed on first use, robot_specific_reset of subclasses may still change power_coef
+			self.motor_gains = self.power * np.array([j.power_coef for j in self.ordered_joints])
+		self.motor_array.set_torques(self.motor_gains * np.clip(a, -1, +1))
 
 	def calc_state(self):
-		j = np.array([j.current_relative_position() for j in self.ordered_joints], dtype=np.float32).flatten()
+		j = self.joint_states.relative_position().astype(np.float32)
 		# even elements [0::2] position, scaled to -1..+1 between limits
 		# odd elements  [1::2] angular speed, scaled to show -1..+1
 		self.joint_speeds = j[1::2]
@@ -157,6 +196,7 @@ class Humanoid(WalkerBase):
 		self.motor_names += ["left_shoulder1", "left_shoulder2", "left_elbow"]
 		self.motor_power += [75, 75, 75]
 		self.motors = [self.jdict[n] for n in self.motor_names]
+		self.motor_array = self.create_motor_array(self.motors)
 		if self.random_yaw:
 			position = [0,0,0]
 			orientation = [0,0,0]
@@ -184,8 +224,9 @@ class Humanoid(WalkerBase):
 	def apply_action(self, a):
 		assert( np.isfinite(a).all() )
 		force_gain = 1
-		for i, m, power in zip(range(17), self.motors, self.motor_power):
-			m.set_motor_torque(float(force_gain * power * self.power * np.clip(a[i], -1, +1)))
+		if self.motor_gains is None:
+			self.motor_gains = force_gain * np.array(self.motor_power) * self.power
+		self.motor_array.set_torques(self.motor_gains * np.clip(a, -1, +1))
 
 	def alive_bonus(self, z, pitch):
 		return +2 if z > 0.78 else -1   # 2 here because 17 joints produce a lot of electricity cost just from policy noise, living must be better than dying
@@ -21,6 +21,7 @@ class Scene:
         self.human_render_detected = False  # if user wants render("human"), we open test window
 
         self.multiplayer_robots = {}
+        self.step_counter = 0  # advanced by global_step(), lets robots invalidate per-step caches
 
     def test_window(self):
         "Call this function every frame, to see what's going on. Not necessary in learning."
@@ -50,6 +51,7 @@ class Scene:
         observations from robots using step() with the same action.
         """
         self.cpp_world.step(self.frame_skip)
+        self.step_counter += 1
 
 class SingleRobotEmptyScene(Scene):
     multiplayer = False  # this class is used "as is" for InvertedPendulum, Reacher
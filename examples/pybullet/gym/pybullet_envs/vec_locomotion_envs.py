@@ -0,0 +1,140 @@
+from .scene_stadium import StadiumScene
+import numpy as np
+import pybullet
+from pybullet_utils import bullet_client
+
+# Bullet puts dynamic bodies in group 1 (DefaultFilter) and static ones in group 2 (StaticFilter), the envs
+# use the remaining bits of the 32 bit signed group, one bit per env
+SCENE_COLLISION_GROUPS = 1 | 2
+ENV_COLLISION_GROUP_SHIFT = 2
+NUM_ENV_COLLISION_GROUPS = 31 - ENV_COLLISION_GROUP_SHIFT
+
+
+class VecStadiumScene(StadiumScene):
+	"Stadium shared by all robots of a VecWalkerEnv, they are stepped together by one global_step()"
+	multiplayer = True
+
+
+class VecWalkerEnv:
+	"""
+	N copies of a locomotion env that live in a single physics server.
+
+	All actions are applied first, then the simulation is stepped once for all robots, then
+	observations and rewards are collected per robot, just like in a multiplayer scene. Robots
+	(and the objects their env creates, like the flag and cube of the flagrun envs) are put into a
+	collision group per env, so they only collide with the ground, themselves and their own objects.
+
+	A robot that is done is reset on its own, the returned observation is then the first one of the
+	new episode and the last one of the finished episode is in info["terminal_observation"].
+	"""
+
+	def __init__(self, env_cls, num_envs, render=False, max_episode_steps=None):
+		self.num_envs = num_envs
+		self.max_episode_steps = max_episode_steps
+		self.isRender = render
+		if render:
+			self._p = bullet_client.BulletClient(connection_mode=pybullet.GUI)
+		else:
+			self._p = bullet_client.BulletClient()
+		self.physicsClientId = self._p._client
+		self._p.configureDebugVisualizer(pybullet.COV_ENABLE_GUI,0)
+
+		self.scene = VecStadiumScene(self._p, gravity=9.8, timestep=0.0165/4, frame_skip=4)
+		self.scene.episode_restart(self._p)
+
+		self.envs = [env_cls() for i in range(num_envs)]
+		for i, env in enumerate(self.envs):
+			# the env reuses the shared client and scene, so it neither creates nor restores a world of its own
+			env._p = self._p
+			env.physicsClientId = self.physicsClientId
+			env.ownsPhysicsClient = False
+			env.scene = env.stadium_scene = self.scene
+			env.robot.player_n = i
+		self.action_space = self.envs[0].action_space
+		self.observation_space = self.envs[0].observation_space
+
+		self.initial_states = [None] * num_envs
+		self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+		self.env_bodies = None
+
+	def _body_ids(self):
+		return set(self._p.getBodyUniqueId(i) for i in range(self._p.getNumBodies()))
+
+	def _load(self):
+		"First reset of all envs, loads the robots and keeps them from colliding with each other"
+		self.env_bodies = []
+		obs = []
+		for i, env in enumerate(self.envs):
+			bodies_before = self._body_ids()
+			obs.append(env.reset())
+			self.env_bodies.append(sorted(self._body_ids() - bodies_before))
+			# ordered joints are randomized by robot_specific_reset, but others (like the root joints of the
+			# hopper) and the base have to be put back explicitly, a standalone env uses restoreState for that
+			self.initial_states[i] = [(b, self._p.getBasePositionAndOrientation(b),
+				[self._p.getJointState(b, j)[0] for j in range(self._p.getNumJoints(b))]) for b in env.robot.objects]
+
+		links = [[(b, link) for b in bodies for link in range(-1, self._p.getNumJoints(b))] for bodies in self.env_bodies]
+		# every env gets a collision group bit of its own, its links only collide with that bit and with the
+		# scene, which keeps the default groups of Bullet (DefaultFilter for dynamic, StaticFilter for static bodies)
+		for i in range(self.num_envs):
+			group = 1 << (ENV_COLLISION_GROUP_SHIFT + i % NUM_ENV_COLLISION_GROUPS)
+			for b, link in links[i]:
+				self._p.setCollisionFilterGroupMask(b, link, group, group | SCENE_COLLISION_GROUPS)
+		# envs that share a bit, there are more envs than bits, are kept apart link by link
+		for i in range(NUM_ENV_COLLISION_GROUPS, self.num_envs):
+			for j in range(i % NUM_ENV_COLLISION_GROUPS, i, NUM_ENV_COLLISION_GROUPS):
+				for a, link_a in links[i]:
+					for b, link_b in links[j]:
+						self._p.setCollisionFilterPair(a, b, link_a, link_b, 0)
+		return np.stack(obs)
+
+	def seed(self, seed=None):
+		return [env.seed(None if seed is None else seed + i)[0] for i, env in enumerate(self.envs)]
+
+	def reset_env(self, i):
+		"Reset robot i only, the other robots keep running"
+		for b, (position, orientation), joint_positions in self.initial_states[i]:
+			self._p.resetBasePositionAndOrientation(b, position, orientation)
+			self._p.resetBaseVelocity(b, [0, 0, 0], [0, 0, 0])
+			for j, q in enumerate(joint_positions):
+				self._p.resetJointState(b, j, q, 0)
+		self.episode_steps[i] = 0
+		return self.envs[i].reset()
+
+	def reset(self):
+		if self.env_bodies is None:
+			return self._load()
+		self.episode_steps[:] = 0
+		return np.stack([self.reset_env(i) for i in range(self.num_envs)])
+
+	def step(self, actions):
+		"""
+		actions has shape (num_envs, action_dim), returns stacked observations (num_envs, obs_dim),
+		rewards (num_envs,), dones (num_envs,) and a list of info dicts.
+		"""
+		for env, a in zip(self.envs, actions):
+			env.robot.apply_action(a)
+		self.scene.global_step()
+
+		obs = np.zeros((self.num_envs,) + self.observation_space.shape, dtype=np.float32)
+		rewards = np.zeros(self.num_envs)
+		dones = np.zeros(self.num_envs, dtype=bool)
+		infos = []
+		self.episode_steps += 1
+		for i, (env, a) in enumerate(zip(self.envs, actions)):
+			state, reward, done, info = env.step(a)  # multiplayer scene: only collects state and reward
+			if self.max_episode_steps is not None and self.episode_steps[i] >= self.max_episode_steps:
+				done = True
+			if done:
+				info["terminal_observation"] = state
+				state = self.reset_env(i)
+			obs[i] = state
+			rewards[i] = reward
+			dones[i] = done
+			infos.append(info)
+		return obs, rewards, dones, infos
+
+	def close(self):
+		if self.physicsClientId >= 0:
+			self._p.disconnect()
+		self.physicsClientId = -1
@@ -0,0 +1,95 @@
+import os, inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+os.sys.path.insert(0, parentdir)
+
+import unittest
+import numpy as np
+
+from pybullet_envs.gym_locomotion_envs import HopperBulletEnv, HumanoidBulletEnv
+from pybullet_envs.vec_locomotion_envs import VecWalkerEnv
+
+
+def standalone_rollout(env_cls, seed, actions):
+	"Observations and rewards of a standalone env for the given actions, until it is done"
+	env = env_cls()
+	env.seed(seed)
+	obs = [env.reset()]
+	rewards = []
+	for a in actions:
+		state, reward, done, _ = env.step(a)
+		obs.append(state)
+		rewards.append(reward)
+		if done:
+			break
+	env.close()
+	return np.array(obs), np.array(rewards)
+
+
+class TestVecWalkerEnv(unittest.TestCase):
+
+	def test_stacked_shapes(self):
+		env = VecWalkerEnv(HopperBulletEnv, 3)
+		env.seed(0)
+		obs = env.reset()
+		self.assertEqual((3,) + env.observation_space.shape, obs.shape)
+		obs, rewards, dones, infos = env.step(np.zeros((3,) + env.action_space.shape))
+		self.assertEqual((3,) + env.observation_space.shape, obs.shape)
+		self.assertEqual((3,), rewards.shape)
+		self.assertEqual((3,), dones.shape)
+		self.assertEqual(3, len(infos))
+		env.close()
+
+	def test_auto_reset(self):
+		env = VecWalkerEnv(HopperBulletEnv, 2, max_episode_steps=3)
+		env.seed(0)
+		env.reset()
+		actions = np.zeros((2,) + env.action_space.shape)
+		for _ in range(2):
+			obs, _, dones, infos = env.step(actions)
+			self.assertFalse(dones.any())
+			self.assertFalse(any("terminal_observation" in info for info in infos))
+		# robot 1 starts a new episode early, so only robot 0 is done at the next step
+		first_obs = env.reset_env(1)
+		obs, _, dones, infos = env.step(actions)
+		self.assertEqual([True, False], list(dones))
+		self.assertEqual(env.observation_space.shape, infos[0]["terminal_observation"].shape)
+		self.assertFalse(np.allclose(infos[0]["terminal_observation"], obs[0]))
+		self.assertNotIn("terminal_observation", infos[1])
+		self.assertEqual([0, 1], list(env.episode_steps))
+		self.assertFalse(np.allclose(first_obs, obs[1]))
+		env.close()
+
+	def test_single_env_matches_standalone(self):
+		env = VecWalkerEnv(HopperBulletEnv, 1)
+		env.seed(0)
+		actions = np.random.RandomState(0).uniform(-1, 1, (50,) + env.action_space.shape)
+		expected_obs, expected_rewards = standalone_rollout(HopperBulletEnv, 0, actions)
+		obs = [env.reset()[0]]
+		rewards = []
+		for a in actions[:len(expected_rewards)]:
+			state, reward, done, info = env.step(a[np.newaxis])
+			obs.append(info[0]["terminal_observation"] if done[0] else state[0])
+			rewards.append(reward[0])
+		env.close()
+		np.testing.assert_allclose(expected_obs, obs, rtol=0, atol=1e-6)
+		np.testing.assert_allclose(expected_rewards, rewards, rtol=0, atol=1e-6)
+
+	def test_robots_do_not_collide(self):
+		# all humanoids start at the origin, each one has to move like a standalone env
+		env = VecWalkerEnv(HumanoidBulletEnv, 3)
+		env.seed(0)
+		actions = np.random.RandomState(0).uniform(-1, 1, (30, 3) + env.action_space.shape)
+		obs = [env.reset()]
+		for a in actions:
+			state, _, dones, infos = env.step(a)
+			obs.append([info["terminal_observation"] if done else s for s, done, info in zip(state, dones, infos)])
+		env.close()
+		obs = np.array(obs)
+		for i in range(3):
+			expected_obs, _ = standalone_rollout(HumanoidBulletEnv, i, actions[:, i])
+			np.testing.assert_allclose(expected_obs, obs[:len(expected_obs), i], rtol=0, atol=1e-6)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -32,13 +32,28 @@ class BulletClient(object):
 
   def __del__(self):
     """Clean up connection if not already done."""
-    try:
-      pybullet.disconnect(physicsClientId=self._client)
-    except pybullet.error:
-      pass
+    if self._client >= 0:
+      try:
+        pybullet.disconnect(physicsClientId=self._client)
+      except pybullet.error:
+        pass
+
+  def disconnect(self):
+    """Disconnects from the simulation.
+
+    The client id can be handed out again by the next connect, so it is
+    forgotten here and __del__ does not disconnect the new connection.
+    """
+    pybullet.disconnect(physicsClientId=self._client)
+    self._client = -1
 
   def __getattr__(self, name):
-    """Inject the client id into Bullet functions."""
+    """Inject the client id into Bullet functions.
+
+    The resolved attribute is stored on the instance, so that later lookups
+    of the same name bypass `__getattr__` and the wrapper is only built once
+    per client and name.
+    """
     attribute = getattr(pybullet, name)
     if inspect.isbuiltin(attribute):
       if name not in [
@@ -47,4 +62,5 @@ class BulletClient(object):
           "computeProjectionMatrixFOV", "getQuaternionFromEuler",
       ]:  # A temporary hack for now.
         attribute = functools.partial(attribute, physicsClientId=self._client)
+    setattr(self, name, attribute)
     return attribute
@@ -0,0 +1,65 @@
+"""Measure the per-call overhead of BulletClient for hot pybullet functions.
+
+Compares calling pybullet directly, going through the uncached
+`BulletClient.__getattr__` path on every call (the previous behaviour), and
+the memoized client attributes.
+"""
+import functools
+import inspect
+import os
+import timeit
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0, parentdir)
+
+import pybullet
+import pybullet_data
+import pybullet_utils.bullet_client as bc
+
+NUM_CALLS = 100000
+
+
+def uncached_getattr(client, name):
+  """Resolve `name` the way BulletClient did before attributes were cached."""
+  attribute = getattr(pybullet, name)
+  if inspect.isbuiltin(attribute):
+    if name not in [
+        "invertTransform", "multiplyTransforms", "getMatrixFromQuaternion",
+        "getEulerFromQuaternion", "computeViewMatrixFromYawPitchRoll",
+        "computeProjectionMatrixFOV", "getQuaternionFromEuler",
+    ]:
+      attribute = functools.partial(attribute, physicsClientId=client._client)
+  return attribute
+
+
+def report(label, seconds):
+  print("%-40s %12.0f calls/sec" % (label, NUM_CALLS / seconds))
+
+
+def main():
+  p = bc.BulletClient(connection_mode=pybullet.DIRECT)
+  p.setAdditionalSearchPath(pybullet_data.getDataPath())
+  robot = p.loadMJCF("mjcf/ant.xml")[-1]
+  client = p._client
+
+  calls = [
+      ("getJointState",
+       lambda: pybullet.getJointState(robot, 0, physicsClientId=client),
+       lambda: uncached_getattr(p, "getJointState")(robot, 0),
+       lambda: p.getJointState(robot, 0)),
+      ("setJointMotorControl2",
+       lambda: pybullet.setJointMotorControl2(
+           robot, 0, pybullet.TORQUE_CONTROL, force=0, physicsClientId=client),
+       lambda: uncached_getattr(p, "setJointMotorControl2")(
+           robot, 0, pybullet.TORQUE_CONTROL, force=0),
+       lambda: p.setJointMotorControl2(robot, 0, pybullet.TORQUE_CONTROL, force=0)),
+  ]
+  for name, direct, uncached, cached in calls:
+    report(name + " (pybullet)", timeit.timeit(direct, number=NUM_CALLS))
+    report(name + " (uncached client)", timeit.timeit(uncached, number=NUM_CALLS))
+    report(name + " (cached client)", timeit.timeit(cached, number=NUM_CALLS))
+
+
+if __name__ == "__main__":
+  main()
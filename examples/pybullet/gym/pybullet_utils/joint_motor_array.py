@@ -0,0 +1,117 @@
+"""Batched motor commands for a fixed set of joints of one body."""
+from __future__ import absolute_import
+from __future__ import division
+import numpy as np
+
+# Defaults of setJointMotorControl2 and setJointMotorControlArray.
+DEFAULT_POSITION_GAIN = 0.1
+DEFAULT_VELOCITY_GAIN = 1.0
+DEFAULT_MAX_FORCE = 100000.0
+
+
+class JointMotorArray(object):
+  """Applies torque, position or velocity targets to a set of joints.
+
+  All targets of one control mode are submitted with a single
+  setJointMotorControlArray call, instead of one setJointMotorControl2 call per
+  joint. Per-joint gains and force limits are kept as arrays and only have to
+  be updated when they change.
+  """
+
+  def __init__(self,
+               pybullet_client,
+               body_id,
+               joint_indices,
+               position_gains=DEFAULT_POSITION_GAIN,
+               velocity_gains=DEFAULT_VELOCITY_GAIN,
+               forces=DEFAULT_MAX_FORCE):
+    """Creates the motor array.
+
+    Args:
+      pybullet_client: A BulletClient, or the pybullet module itself.
+      body_id: The unique id of the body that owns the joints.
+      joint_indices: The indices of the controlled joints. Targets passed to
+        the set_* methods are given in this order.
+      position_gains: Scalar or per-joint position gains.
+      velocity_gains: Scalar or per-joint velocity gains.
+      forces: Scalar or per-joint maximum motor forces, used by position and
+        velocity control.
+    """
+    self._pybullet_client = pybullet_client
+    self.body_id = body_id
+    self.joint_indices = list(joint_indices)
+    self.position_gains = self._to_array(position_gains)
+    self.velocity_gains = self._to_array(velocity_gains)
+    self.forces = self._to_array(forces)
+
+  @property
+  def num_joints(self):
+    return len(self.joint_indices)
+
+  def _to_array(self, values):
+    return np.array(np.broadcast_to(values, (self.num_joints,)), dtype=np.float64)
+
+  def set_gains(self, position_gains=None, velocity_gains=None):
+    """Updates the stored position and/or velocity gains."""
+    if position_gains is not None:
+      self.position_gains = self._to_array(position_gains)
+    if velocity_gains is not None:
+      self.velocity_gains = self._to_array(velocity_gains)
+
+  def set_forces(self, forces):
+    """Updates the stored maximum motor forces."""
+    self.forces = self._to_array(forces)
+
+  def set_torques(self, torques):
+    """Applies one torque per joint with TORQUE_CONTROL."""
+    self._pybullet_client.setJointMotorControlArray(
+        self.body_id,
+        self.joint_indices,
+        self._pybullet_client.TORQUE_CONTROL,
+        forces=torques)
+
+  def set_positions(self, positions, target_velocities=None, max_velocities=None):
+    """Applies one target position per joint with POSITION_CONTROL.
+
+    Args:
+      positions: The target positions.
+      target_velocities: Optional target velocities, zero if not given.
+      max_velocities: Optional per-joint velocity limits. They are not
+        supported by setJointMotorControlArray, so each joint falls back to its
+        own setJointMotorControl2 call when they are given.
+    """
+    if target_velocities is None:
+      target_velocities = np.zeros(self.num_joints)
+    if max_velocities is not None:
+      max_velocities = self._to_array(max_velocities)
+      for i, joint_index in enumerate(self.joint_indices):
+        self._pybullet_client.setJointMotorControl2(
+            self.body_id,
+            joint_index,
+            self._pybullet_client.POSITION_CONTROL,
+            targetPosition=positions[i],
+            targetVelocity=target_velocities[i],
+            force=self.forces[i],
+            maxVelocity=max_velocities[i],
+            positionGain=self.position_gains[i],
+            velocityGain=self.velocity_gains[i])
+      return
+    self._pybullet_client.setJointMotorControlArray(
+        self.body_id,
+        self.joint_indices,
+        self._pybullet_client.POSITION_CONTROL,
+        targetPositions=positions,
+        targetVelocities=target_velocities,
+        forces=self.forces,
+        positionGains=self.position_gains,
+        velocityGains=self.velocity_gains)
+
+  def set_velocities(self, velocities):
+    """Applies one target velocity per joint with VELOCITY_CONTROL."""
+    self._pybullet_client.setJointMotorControlArray(
+        self.body_id,
+        self.joint_indices,
+        self._pybullet_client.VELOCITY_CONTROL,
+        targetVelocities=velocities,
+        forces=self.forces,
+        velocityGains=self.velocity_gains)
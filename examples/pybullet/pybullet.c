@@ -4430,7 +4430,7 @@ static PyObject* pybullet_getJointStates(PyObject* self, PyObject* args, PyObjec
 	Py_INCREF(Py_None);
 	return Py_None;
 }
-static PyObject* pybullet_getLinkState(PyObject* self, PyObject* args, PyObject* keywds)
+static PyObject* pybullet_linkStateToPyTuple(const struct b3LinkState* linkState, int computeLinkVelocity)
 {
 	PyObject* pyLinkState;
 	PyObject* pyLinkStateWorldPosition;
@@ -4441,7 +4441,85 @@ static PyObject* pybullet_getLinkState(PyObject* self, PyObject* args, PyObject*
 	PyObject* pyLinkStateWorldLinkFrameOrientation;
 	PyObject* pyLinkStateWorldLinkLinearVelocity;
 	PyObject* pyLinkStateWorldLinkAngularVelocity;
+	int i;
+
+	pyLinkStateWorldPosition = PyTuple_New(3);
+	for (i = 0; i < 3; ++i)
+	{
+		PyTuple_SetItem(pyLinkStateWorldPosition, i,
+						PyFloat_FromDouble(linkState->m_worldPosition[i]));
+	}
+
+	pyLinkStateWorldOrientation = PyTuple_New(4);
+	for (i = 0; i < 4; ++i)
+	{
+		PyTuple_SetItem(pyLinkStateWorldOrientation, i,
+						PyFloat_FromDouble(linkState->m_worldOrientation[i]));
+	}
+
+	pyLinkStateLocalInertialPosition = PyTuple_New(3);
+	for (i = 0; i < 3; ++i)
+	{
+		PyTuple_SetItem(pyLinkStateLocalInertialPosition, i,
+						PyFloat_FromDouble(linkState->m_localInertialPosition[i]));
+	}
+
+	pyLinkStateLocalInertialOrientation = PyTuple_New(4);
+	for (i = 0; i < 4; ++i)
+	{
+		PyTuple_SetItem(pyLinkStateLocalInertialOrientation, i,
+						PyFloat_FromDouble(linkState->m_localInertialOrientation[i]));
+	}
+
+	pyLinkStateWorldLinkFramePosition = PyTuple_New(3);
+	for (i = 0; i < 3; ++i)
+	{
+		PyTuple_SetItem(pyLinkStateWorldLinkFramePosition, i,
+						PyFloat_FromDouble(linkState->m_worldLinkFramePosition[i]));
+	}
+
+	pyLinkStateWorldLinkFrameOrientation = PyTuple_New(4);
+	for (i = 0; i < 4; ++i)
+	{
+		PyTuple_SetItem(pyLinkStateWorldLinkFrameOrientation, i,
+						PyFloat_FromDouble(linkState->m_worldLinkFrameOrientation[i]));
+	}
 
+	if (computeLinkVelocity)
+	{
+		pyLinkState = PyTuple_New(8);
+	}
+	else
+	{
+		pyLinkState = PyTuple_New(6);
+	}
+
+	PyTuple_SetItem(pyLinkState, 0, pyLinkStateWorldPosition);
+	PyTuple_SetItem(pyLinkState, 1, pyLinkStateWorldOrientation);
+	PyTuple_SetItem(pyLinkState, 2, pyLinkStateLocalInertialPosition);
+	PyTuple_SetItem(pyLinkState, 3, pyLinkStateLocalInertialOrientation);
+	PyTuple_SetItem(pyLinkState, 4, pyLinkStateWorldLinkFramePosition);
+	PyTuple_SetItem(pyLinkState, 5, pyLinkStateWorldLinkFrameOrientation);
+
+	if (computeLinkVelocity)
+	{
+		pyLinkStateWorldLinkLinearVelocity = PyTuple_New(3);
+		pyLinkStateWorldLinkAngularVelocity = PyTuple_New(3);
+		for (i = 0; i < 3; ++i)
+		{
+			PyTuple_SetItem(pyLinkStateWorldLinkLinearVelocity, i,
+							PyFloat_FromDouble(linkState->m_worldLinearVelocity[i]));
+			PyTuple_SetItem(pyLinkStateWorldLinkAngularVelocity, i,
+							PyFloat_FromDouble(linkState->m_worldAngularVelocity[i]));
+		}
+		PyTuple_SetItem(pyLinkState, 6, pyLinkStateWorldLinkLinearVelocity);
+		PyTuple_SetItem(pyLinkState, 7, pyLinkStateWorldLinkAngularVelocity);
+	}
+	return pyLinkState;
+}
+
+static PyObject* pybullet_getLinkState(PyObject* self, PyObject* args, PyObject* keywds)
+{
 	struct b3LinkState linkState;
 
 	int bodyUniqueId = -1;
@@ -4449,7 +4527,6 @@ static PyObject* pybullet_getLinkState(PyObject* self, PyObject* args, PyObject*
 	int computeLinkVelocity = 0;
 	int computeForwardKinematics = 0;
 
-	int i;
 	b3PhysicsClientHandle sm = 0;
 
 	int physicsClientId = 0;
@@ -4507,85 +4584,118 @@ static PyObject* pybullet_getLinkState(PyObject* self, PyObject* args, PyObject*
 
 			if (b3GetLinkState(sm, status_handle, linkIndex, &linkState))
 			{
-				pyLinkStateWorldPosition = PyTuple_New(3);
-				for (i = 0; i < 3; ++i)
-				{
-					PyTuple_SetItem(pyLinkStateWorldPosition, i,
-									PyFloat_FromDouble(linkState.m_worldPosition[i]));
-				}
+				return pybullet_linkStateToPyTuple(&linkState, computeLinkVelocity);
+			}
+		}
+	}
 
-				pyLinkStateWorldOrientation = PyTuple_New(4);
-				for (i = 0; i < 4; ++i)
-				{
-					PyTuple_SetItem(pyLinkStateWorldOrientation, i,
-									PyFloat_FromDouble(linkState.m_worldOrientation[i]));
-				}
+	Py_INCREF(Py_None);
+	return Py_None;
+}
 
-				pyLinkStateLocalInertialPosition = PyTuple_New(3);
-				for (i = 0; i < 3; ++i)
-				{
-					PyTuple_SetItem(pyLinkStateLocalInertialPosition, i,
-									PyFloat_FromDouble(linkState.m_localInertialPosition[i]));
-				}
+static PyObject* pybullet_getLinkStates(PyObject* self, PyObject* args, PyObject* keywds)
+{
+	struct b3LinkState linkState;
 
-				pyLinkStateLocalInertialOrientation = PyTuple_New(4);
-				for (i = 0; i < 4; ++i)
-				{
-					PyTuple_SetItem(pyLinkStateLocalInertialOrientation, i,
-									PyFloat_FromDouble(linkState.m_localInertialOrientation[i]));
-				}
+	int bodyUniqueId = -1;
+	PyObject* linkIndicesObj = 0;
+	PyObject* linkIndicesSeq = 0;
+	PyObject* pyLinkStates = 0;
+	int computeLinkVelocity = 0;
+	int computeForwardKinematics = 0;
+	int numLinks = 0;
+	int numBodyLinks = 0;
+	int status_type = 0;
+	int i;
+	b3SharedMemoryCommandHandle cmd_handle;
+	b3SharedMemoryStatusHandle status_handle;
 
-				pyLinkStateWorldLinkFramePosition = PyTuple_New(3);
-				for (i = 0; i < 3; ++i)
-				{
-					PyTuple_SetItem(pyLinkStateWorldLinkFramePosition, i,
-									PyFloat_FromDouble(linkState.m_worldLinkFramePosition[i]));
-				}
+	b3PhysicsClientHandle sm = 0;
 
-				pyLinkStateWorldLinkFrameOrientation = PyTuple_New(4);
-				for (i = 0; i < 4; ++i)
-				{
-					PyTuple_SetItem(pyLinkStateWorldLinkFrameOrientation, i,
-									PyFloat_FromDouble(linkState.m_worldLinkFrameOrientation[i]));
-				}
+	int physicsClientId = 0;
+	static char* kwlist[] = {"bodyUniqueId", "linkIndices", "computeLinkVelocity", "computeForwardKinematics", "physicsClientId", NULL};
+	if (!PyArg_ParseTupleAndKeywords(args, keywds, "iO|iii", kwlist, &bodyUniqueId, &linkIndicesObj, &computeLinkVelocity, &computeForwardKinematics, &physicsClientId))
+	{
+		return NULL;
+	}
+	sm = getPhysicsClient(physicsClientId);
+	if (sm == 0)
+	{
+		PyErr_SetString(SpamError, "Not connected to physics server.");
+		return NULL;
+	}
 
-				if (computeLinkVelocity)
-				{
-					pyLinkState = PyTuple_New(8);
-				}
-				else
-				{
-					pyLinkState = PyTuple_New(6);
-				}
+	if (bodyUniqueId < 0)
+	{
+		PyErr_SetString(SpamError, "getLinkStates failed; invalid bodyUniqueId");
+		return NULL;
+	}
 
-				PyTuple_SetItem(pyLinkState, 0, pyLinkStateWorldPosition);
-				PyTuple_SetItem(pyLinkState, 1, pyLinkStateWorldOrientation);
-				PyTuple_SetItem(pyLinkState, 2, pyLinkStateLocalInertialPosition);
-				PyTuple_SetItem(pyLinkState, 3, pyLinkStateLocalInertialOrientation);
-				PyTuple_SetItem(pyLinkState, 4, pyLinkStateWorldLinkFramePosition);
-				PyTuple_SetItem(pyLinkState, 5, pyLinkStateWorldLinkFrameOrientation);
+	linkIndicesSeq = PySequence_Fast(linkIndicesObj, "expected a sequence of link indices");
+	if (linkIndicesSeq == 0)
+	{
+		PyErr_SetString(SpamError, "expected a sequence of link indices");
+		return NULL;
+	}
 
-				if (computeLinkVelocity)
-				{
-					pyLinkStateWorldLinkLinearVelocity = PyTuple_New(3);
-					pyLinkStateWorldLinkAngularVelocity = PyTuple_New(3);
-					for (i = 0; i < 3; ++i)
-					{
-						PyTuple_SetItem(pyLinkStateWorldLinkLinearVelocity, i,
-										PyFloat_FromDouble(linkState.m_worldLinearVelocity[i]));
-						PyTuple_SetItem(pyLinkStateWorldLinkAngularVelocity, i,
-										PyFloat_FromDouble(linkState.m_worldAngularVelocity[i]));
-					}
-					PyTuple_SetItem(pyLinkState, 6, pyLinkStateWorldLinkLinearVelocity);
-					PyTuple_SetItem(pyLinkState, 7, pyLinkStateWorldLinkAngularVelocity);
-				}
-				return pyLinkState;
-			}
+	numLinks = PySequence_Size(linkIndicesObj);
+	if (numLinks == 0)
+	{
+		Py_DECREF(linkIndicesSeq);
+		return PyTuple_New(0);
+	}
+
+	numBodyLinks = b3GetNumJoints(sm, bodyUniqueId);
+	for (i = 0; i < numLinks; i++)
+	{
+		int linkIndex = pybullet_internalGetIntFromSequence(linkIndicesSeq, i);
+		if ((linkIndex < 0) || (linkIndex >= numBodyLinks))
+		{
+			Py_DECREF(linkIndicesSeq);
+			PyErr_SetString(SpamError, "getLinkStates failed; invalid linkIndex");
+			return NULL;
 		}
 	}
 
-	Py_INCREF(Py_None);
-	return Py_None;
+	cmd_handle = b3RequestActualStateCommandInit(sm, bodyUniqueId);
+
+	if (computeLinkVelocity)
+	{
+		b3RequestActualStateCommandComputeLinkVelocity(cmd_handle, computeLinkVelocity);
+	}
+
+	if (computeForwardKinematics)
+	{
+		b3RequestActualStateCommandComputeForwardKinematics(cmd_handle, computeForwardKinematics);
+	}
+
+	status_handle = b3SubmitClientCommandAndWaitStatus(sm, cmd_handle);
+
+	status_type = b3GetStatusType(status_handle);
+	if (status_type != CMD_ACTUAL_STATE_UPDATE_COMPLETED)
+	{
+		Py_DECREF(linkIndicesSeq);
+		PyErr_SetString(SpamError, "getLinkStates failed.");
+		return NULL;
+	}
+
+	pyLinkStates = PyTuple_New(numLinks);
+	for (i = 0; i < numLinks; i++)
+	{
+		int linkIndex = pybullet_internalGetIntFromSequence(linkIndicesSeq, i);
+		if (b3GetLinkState(sm, status_handle, linkIndex, &linkState))
+		{
+			PyTuple_SetItem(pyLinkStates, i, pybullet_linkStateToPyTuple(&linkState, computeLinkVelocity));
+		}
+		else
+		{
+			Py_INCREF(Py_None);
+			PyTuple_SetItem(pyLinkStates, i, Py_None);
+		}
+	}
+
+	Py_DECREF(linkIndicesSeq);
+	return pyLinkStates;
 }
 
 static PyObject* pybullet_readUserDebugParameter(PyObject* self, PyObject* args, PyObject* keywds)
@@ -10423,6 +10533,12 @@ static PyMethodDef SpamMethods[] = {
 	 " center of mass (COM) of the link, relative to the world reference"
 	 " frame."},
 
+	{"getLinkStates", (PyCFunction)pybullet_getLinkStates, METH_VARARGS | METH_KEYWORDS,
+	 "linkStates = getLinkStates(objectUniqueId, linkIndices, computeLinkVelocity=0,\n"
+	 "                           computeForwardKinematics=0, physicsClientId=0)\n"
+	 "Same as getLinkState, for a list of link indices of one body, using a"
+	 " single state request. Returns a tuple with one link state per index."},
+
 	{"resetJointState", (PyCFunction)pybullet_resetJointState, METH_VARARGS | METH_KEYWORDS,
 	 "resetJointState(objectUniqueId, jointIndex, targetValue, targetVelocity=0, physicsClientId=0)\n"
 	 "Reset the state (position, velocity etc) for a joint on a body "